@@ -0,0 +1,226 @@
+"""
+End-to-end crawl benchmark: ``run_crawl`` against a synthetic local site (fake_site.py),
+once per storage backend.
+
+    python benchmarks/bench_crawl.py [--pages 1000 --fanout 8 --latency-ms 5 ...]
+    python benchmarks/bench_crawl.py --storage fs,s3 --save-baseline
+    python benchmarks/bench_crawl.py --check          # exit 1 on a regression
+
+The site is served from a child process and every scenario crawls in a fresh child
+process, so peak RSS and CPU time are the crawler's alone. ``s3`` writes to moto's
+server standing in for the S3 endpoint (``moto[server]``, in the dev extras). Baselines
+live in benchmarks/baseline.json; commit it so a change in throughput shows up in review.
+"""
+import argparse, asyncio, json, multiprocessing as mp, os, platform, queue, resource
+import statistics, sys, tempfile, time
+from dataclasses import asdict, fields
+from pathlib import Path
+
+from fake_site import SiteSpec, make_app
+
+BASELINE = Path(__file__).with_name("baseline.json")
+# how much worse than the baseline a number may get before --check fails
+TOLERANCE = {"pages_per_s": -0.25, "p50_ms": 0.5, "p99_ms": 0.5, "cpu_ms_per_page": 0.3,
+             "peak_rss_mb": 0.3}
+
+
+def _serve(spec: SiteSpec, ready) -> None:
+    from aiohttp import web
+
+    async def main() -> None:
+        runner = web.AppRunner(make_app(spec), access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        ready.put(runner.addresses[0][1])
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
+
+
+def _moto(ready) -> None:
+    import logging, threading
+    from moto.server import ThreadedMotoServer
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = ThreadedMotoServer(ip_address="127.0.0.1", port=0, verbose=False)
+    server.start()
+    ready.put(server.get_host_and_port()[1])
+    threading.Event().wait()
+
+
+class TimedFetcher:
+    """Wraps an HtmlFetcher and keeps the latency of every page fetch."""
+
+    def __init__(self, inner) -> None:
+        self.inner = inner
+        self.samples: list[float] = []
+
+    async def fetch_html(self, url, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return await self.inner.fetch_html(url, **kwargs)
+        finally:
+            self.samples.append(time.perf_counter() - t0)
+
+
+async def _crawl(base: str, storage_root: str, depth: int, concurrency: int) -> dict:
+    from crawl_pipeline import logging as crawl_log
+    from crawl_pipeline.adapters import aiohttp_binary
+    from crawl_pipeline.adapters.links_fast import FastLinkExtractor
+    from crawl_pipeline.adapters.simple_html_fetcher import SimpleHtmlFetcher
+    from crawl_pipeline.adapters.storage_exec import StorageWriter
+    from crawl_pipeline.adapters.storage_selector import get_storage
+    from crawl_pipeline.config import Limits, Politeness, RetryPolicy
+    from crawl_pipeline.models import CrawlRequest
+    from crawl_pipeline.pipeline.crawl import run_crawl
+    from crawl_pipeline.telemetry import Metrics
+
+    crawl_log.configure(path=os.devnull)
+    limits = Limits(max_files=10**9, max_pages=10**9, max_total_bytes=1 << 40,
+                    max_concurrency_total=concurrency, max_concurrency_html=concurrency,
+                    max_concurrency_bin=concurrency, max_connections_per_host=concurrency)
+    req = CrawlRequest(url=base, depth=depth, file_types=("html", "pdf"),
+                       storage_root=storage_root, limits=limits,
+                       retry=RetryPolicy(max_attempts=3, backoff_base_s=0.01, jitter_s=0.0),
+                       politeness=Politeness(host_rate_per_s=1e6, host_burst=10**6,
+                                             max_rate_per_s=1e6))
+    storage = StorageWriter.from_limits(get_storage(storage_root, limits=limits), limits)
+    fetcher = TimedFetcher(SimpleHtmlFetcher())
+    metrics = Metrics()
+
+    async def save(url, html):
+        path = await storage.save_bytes(content=html, url=url, canonical_type="html",
+                                        root=storage_root)
+        return {"url": url, "status": 200, "content_type": "text/html", "path": path}
+
+    cpu0, t0 = time.process_time(), time.perf_counter()
+    try:
+        saved = await run_crawl(req, html_fetcher=fetcher, fetch_and_save_html=save,
+                                link_extractor=FastLinkExtractor(), limits=limits,
+                                binary_fetcher=aiohttp_binary, storage=storage, metrics=metrics)
+    finally:
+        storage.close()
+    wall, cpu = time.perf_counter() - t0, time.process_time() - cpu0
+    pages = len(fetcher.samples)
+    q = statistics.quantiles(fetcher.samples, n=100) if pages > 1 else [0.0] * 99
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    retries = sum(v for k, v in metrics.snapshot()["counters"].items()
+                  if k.startswith("crawl_retries_total"))
+    return {
+        "pages": pages,
+        "saved": len(saved),
+        "wall_s": round(wall, 3),
+        "pages_per_s": round(pages / wall, 1),
+        "p50_ms": round(q[49] * 1e3, 2),
+        "p99_ms": round(q[98] * 1e3, 2),
+        "cpu_ms_per_page": round(cpu * 1e3 / max(1, pages), 3),
+        "peak_rss_mb": round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1),
+        "retries": retries,
+        "mb_downloaded": round(metrics.counter("crawl_bytes_total", host="127.0.0.1") / 1e6, 1),
+    }
+
+
+def _scenario(base: str, storage_root: str, depth: int, concurrency: int, out) -> None:
+    out.put(asyncio.run(_crawl(base, storage_root, depth, concurrency)))
+
+
+def _run_child(ctx, target, *args, timeout: float = 600):
+    """Start ``target(*args, queue)`` in a child; returns its first message and the child."""
+    q = ctx.Queue()
+    p = ctx.Process(target=target, args=(*args, q), daemon=True)
+    p.start()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            return q.get(timeout=0.5), p
+        except queue.Empty:
+            if not p.is_alive():
+                raise RuntimeError(f"{target.__name__} exited with code {p.exitcode}")
+    p.terminate()
+    raise TimeoutError(f"{target.__name__} gave no result within {timeout}s")
+
+
+def _regressions(result: dict, base: dict) -> list[str]:
+    out = []
+    for key, tol in TOLERANCE.items():
+        old, new = base.get(key), result.get(key)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        if (tol < 0 and change < tol) or (tol > 0 and change > tol):
+            out.append(f"{key} {old} -> {new} ({change:+.0%})")
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    for f in fields(SiteSpec):
+        ap.add_argument(f"--{f.name.replace('_', '-')}", type=type(f.default), default=f.default)
+    ap.add_argument("--storage", default="fs", help="comma-separated: fs, s3")
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--save-baseline", action="store_true")
+    ap.add_argument("--check", action="store_true", help="exit 1 if worse than the baseline")
+    args = vars(ap.parse_args())
+    backends = args.pop("storage").split(",")
+    concurrency, save, check = args.pop("concurrency"), args.pop("save_baseline"), args.pop("check")
+    spec = SiteSpec(**args)
+
+    ctx = mp.get_context("spawn")
+    port, server = _run_child(ctx, _serve, spec)
+    children = [server]
+    base = f"http://127.0.0.1:{port}/"
+    results: dict[str, dict] = {}
+    try:
+        with tempfile.TemporaryDirectory(prefix="bench-crawl-") as tmp:
+            for backend in backends:
+                if backend == "fs":
+                    root = tmp
+                elif backend == "s3":
+                    import boto3
+                    moto_port, moto = _run_child(ctx, _moto)
+                    children.append(moto)
+                    os.environ.update(AWS_ENDPOINT_URL=f"http://127.0.0.1:{moto_port}",
+                                      AWS_ACCESS_KEY_ID="bench", AWS_SECRET_ACCESS_KEY="bench",
+                                      AWS_DEFAULT_REGION="us-east-1")
+                    boto3.client("s3").create_bucket(Bucket="bench")
+                    root = "s3://bench/crawl"
+                else:
+                    raise SystemExit(f"unknown storage backend {backend!r}")
+                results[backend], child = _run_child(ctx, _scenario, base, root, spec.depth,
+                                                     concurrency)
+                child.join()
+    finally:
+        for child in children:
+            child.terminate()
+
+    print(f"site: {spec.reachable()} pages, fanout {spec.fanout}, depth {spec.depth}, "
+          f"latency {spec.latency_ms}±{spec.jitter_ms} ms, errors {spec.error_rate:.0%}, "
+          f"binaries {spec.binary_ratio:.0%} x {spec.binary_kb} KiB; concurrency {concurrency}")
+    cols = ("pages", "pages_per_s", "p50_ms", "p99_ms", "cpu_ms_per_page", "peak_rss_mb",
+            "retries", "mb_downloaded")
+    print(f"{'storage':<8}" + "".join(f"{c:>16}" for c in cols))
+    for name, r in results.items():
+        print(f"{name:<8}" + "".join(f"{r[c]:>16}" for c in cols))
+
+    stored = json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+    config = {"spec": asdict(spec), "concurrency": concurrency}
+    failed = []
+    if stored.get("config") == config:
+        for name, r in results.items():
+            failed += [f"{name}: {msg}" for msg in _regressions(r, stored["results"].get(name, {}))]
+    elif check:
+        print("baseline was recorded with different settings; nothing to compare")
+    for msg in failed:
+        print(f"REGRESSION {msg}")
+    if save:
+        machine = {"python": platform.python_version(), "machine": platform.machine(),
+                   "cpus": os.cpu_count(), "system": platform.system()}
+        BASELINE.write_text(json.dumps({"config": config, "machine": machine,
+                                        "results": results}, indent=2) + "\n")
+        print(f"baseline saved to {BASELINE}")
+    if check and failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Micro-benchmark: links_basic (html.parser) vs links_fast (byte regex scanner).
+
+    python benchmarks/bench_links.py [--anchors 2000] [--repeat 20]
+"""
+import argparse, random, time
+
+from crawl_pipeline.adapters import links_basic, links_fast
+
+
+def synthetic_page(anchors: int, seed: int = 0) -> bytes:
+    rnd = random.Random(seed)
+    parts = [b"<html><head><title>bench</title>",
+             b'<link rel="stylesheet" href="/static/site.css"></head><body>']
+    for i in range(anchors):
+        parts.append(b"<div class=\"row\"><p>%s</p>" % (b"lorem ipsum " * rnd.randint(1, 8)))
+        parts.append(b'<a class="nav" href="/section/%d/page-%d.html?ref=%d">item %d</a></div>\n'
+                     % (i % 17, i, rnd.randint(0, 999), i))
+    parts.append(b"</body></html>")
+    return b"".join(parts)
+
+
+def bench(fn, *args, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--anchors", type=int, default=2000)
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    page = synthetic_page(args.anchors)
+    base = "https://example.com/index.html"
+    basic = bench(links_basic.extract, base, page, repeat=args.repeat)
+    fast = bench(links_fast.extract, base, page, repeat=args.repeat)
+
+    def chunked() -> None:
+        s = links_fast.LinkScanner(base)
+        for i in range(0, len(page), 64 * 1024):
+            s.feed(page[i:i + 64 * 1024])
+        s.links()
+
+    streamed = bench(chunked, repeat=args.repeat)
+    mb = len(page) / 1e6
+    print(f"page: {mb:.2f} MB, {args.anchors} anchors (best of {args.repeat})")
+    for name, t in (("links_basic", basic), ("links_fast", fast),
+                    ("links_fast 64K chunks", streamed)):
+        print(f"{name:<22} {t * 1e3:8.2f} ms  {mb / t:8.1f} MB/s  x{basic / t:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Synthetic website for offline crawl benchmarks, served by aiohttp.
+
+Page ``i`` links its children ``i*fanout+1 .. i*fanout+fanout`` (a tree cut off at
+``pages`` pages or ``depth`` levels), the home page and, with probability
+``binary_ratio``, a PDF. Everything is derived from ``seed``, so one spec always
+produces the same site, latencies and failures.
+
+    python benchmarks/fake_site.py --pages 2000 --fanout 8 --latency-ms 20
+"""
+import argparse, asyncio, random, re
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+
+from aiohttp import web
+
+
+@dataclass(frozen=True)
+class SiteSpec:
+    pages: int = 1000
+    fanout: int = 8
+    depth: int = 6
+    latency_ms: float = 5.0       # mean server think time per response
+    jitter_ms: float = 5.0        # uniform +/- around the mean
+    error_rate: float = 0.0       # share of URLs whose first request answers 503
+    binary_ratio: float = 0.1     # share of pages linking a PDF
+    binary_kb: int = 256
+    page_kb: int = 16             # filler text per page
+    seed: int = 0
+
+    def reachable(self) -> int:
+        """Pages reachable within ``depth`` levels (the home page is level 0)."""
+        n, level, width = 0, 0, 1
+        while level <= self.depth and n < self.pages:
+            n += min(width, self.pages - n)
+            width *= self.fanout
+            level += 1
+        return n
+
+
+def _rng(spec: SiteSpec, key: str) -> random.Random:
+    return random.Random(f"{spec.seed}:{key}")
+
+
+def _level(spec: SiteSpec, i: int) -> int:
+    level = 0
+    while i > 0:
+        i = (i - 1) // spec.fanout
+        level += 1
+    return level
+
+
+@lru_cache(maxsize=4096)
+def _page(spec: SiteSpec, i: int) -> bytes:
+    rnd = _rng(spec, f"page{i}")
+    links = ['<a href="/">home</a>']
+    if _level(spec, i) < spec.depth:
+        first = i * spec.fanout + 1
+        links += [f'<a href="/p/{c}">page {c}</a>'
+                  for c in range(first, min(first + spec.fanout, spec.pages))]
+    if rnd.random() < spec.binary_ratio:
+        links.append(f'<a href="/doc/{i}.pdf">report {i}</a>')
+    filler = ("<p>" + "lorem ipsum dolor sit amet " * 36 + "</p>") * max(1, spec.page_kb)
+    return (f"<html><head><title>page {i}</title></head><body><nav>{''.join(links)}</nav>"
+            f"{filler}</body></html>").encode()
+
+
+@lru_cache(maxsize=256)
+def _pdf(spec: SiteSpec, i: int) -> bytes:
+    body = _rng(spec, f"doc{i}").randbytes(spec.binary_kb * 1024)
+    return b"%PDF-1.4\n" + body
+
+
+_RANGE = re.compile(r"bytes=(\d+)-(\d*)")
+STATS = web.AppKey("stats", dict)
+
+
+def make_app(spec: SiteSpec) -> web.Application:
+    """The site as an aiohttp app; ``app[STATS]`` counts what was served."""
+    stats = {"requests": 0, "errors": 0, "bytes": 0}
+    failed_once: set[str] = set()
+
+    async def think(request: web.Request) -> None:
+        stats["requests"] += 1
+        rnd = _rng(spec, f"lat{request.path}")
+        delay = spec.latency_ms + rnd.uniform(-spec.jitter_ms, spec.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+    def flaky(path: str) -> bool:
+        if path in failed_once or _rng(spec, f"err{path}").random() >= spec.error_rate:
+            return False
+        failed_once.add(path)
+        stats["errors"] += 1
+        return True
+
+    async def page(request: web.Request) -> web.Response:
+        await think(request)
+        i = int(request.match_info.get("i", 0))
+        if i >= spec.pages:
+            raise web.HTTPNotFound()
+        if flaky(request.path):
+            return web.Response(status=503, headers={"Retry-After": "0"})
+        body = _page(spec, i)
+        stats["bytes"] += len(body)
+        return web.Response(body=body, content_type="text/html")
+
+    async def doc(request: web.Request) -> web.Response:
+        await think(request)
+        body = _pdf(spec, int(request.match_info["i"]))
+        if request.method == "HEAD":
+            return web.Response(headers={"Content-Length": str(len(body)),
+                                         "Content-Type": "application/pdf",
+                                         "Accept-Ranges": "bytes"})
+        if flaky(request.path):
+            return web.Response(status=503, headers={"Retry-After": "0"})
+        m = _RANGE.fullmatch(request.headers.get("Range", ""))
+        if m:
+            start, end = int(m[1]), int(m[2] or len(body) - 1)
+            part = body[start:end + 1]
+            stats["bytes"] += len(part)
+            return web.Response(status=206, body=part, content_type="application/pdf", headers={
+                "Content-Range": f"bytes {start}-{start + len(part) - 1}/{len(body)}"})
+        stats["bytes"] += len(body)
+        return web.Response(body=body, content_type="application/pdf")
+
+    async def robots(request: web.Request) -> web.Response:
+        return web.Response(status=404)
+
+    app = web.Application()
+    app[STATS] = stats
+    app.router.add_get("/", page)
+    app.router.add_get("/p/{i:\\d+}", page)
+    app.router.add_route("*", "/doc/{i:\\d+}.pdf", doc)
+    app.router.add_get("/robots.txt", robots)
+    return app
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    for name, value in asdict(SiteSpec()).items():
+        ap.add_argument(f"--{name.replace('_', '-')}", type=type(value), default=value)
+    ap.add_argument("--port", type=int, default=8765)
+    args = vars(ap.parse_args())
+    port = args.pop("port")
+    spec = SiteSpec(**args)
+    print(f"serving {spec.reachable()} reachable pages on http://127.0.0.1:{port}/")
+    web.run_app(make_app(spec), host="127.0.0.1", port=port, print=None)
+
+
+if __name__ == "__main__":
+    main()
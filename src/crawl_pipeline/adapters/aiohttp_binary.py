@@ -1,11 +1,18 @@
 from __future__ import annotations
-from typing import Tuple, AsyncIterator, Optional
+import asyncio
+from collections import deque
+from typing import Mapping, Tuple, AsyncIterator, Optional
 import aiohttp
-from ..config import Timeouts, RetryPolicy
+from ..config import Timeouts, RetryPolicy, Limits
 from ..backoff import async_retry
+from ..budget import ByteBudget
+from ..politeness import HostScheduler, host_of
+from ..revalidation import ValidatorCache
 
-async def _head(session: aiohttp.ClientSession, url: str, timeouts: Timeouts):
-    async with session.head(url, allow_redirects=True, timeout=aiohttp.ClientTimeout(total=timeouts.total_s)) as r:
+async def _head(session: aiohttp.ClientSession, url: str, timeouts: Timeouts,
+                headers: dict[str, str] | None = None) -> aiohttp.ClientResponse:
+    async with session.head(url, headers=headers or {}, allow_redirects=True,
+                            timeout=aiohttp.ClientTimeout(total=timeouts.total_s)) as r:
         return r
 
 async def _get(session: aiohttp.ClientSession, url: str, headers: dict | None, timeouts: Timeouts):
@@ -17,35 +24,134 @@ async def _get(session: aiohttp.ClientSession, url: str, headers: dict | None, t
                 continue
             yield chunk
 
-async def fetch_binary(url: str, *, timeouts: Timeouts, retry: RetryPolicy
-                      ) -> Tuple[str, AsyncIterator[bytes], Optional[int]]:
-    async def _do():
-        async with aiohttp.ClientSession() as session:
-            hr = await _head(session, url, timeouts)
-            ct = (hr.headers.get("content-type") or "").split(";")[0].strip().lower() or "application/octet-stream"
+class ObjectChanged(Exception):
+    """The object changed between ranged parts: they cannot be stitched into one file."""
+    status = 412  # not retried: a retry would fetch the new version into the old one
+
+    def __init__(self, url: str, why: str) -> None:
+        super().__init__(f"{url} changed during a ranged download: {why}")
+        self.url = url
+
+def _validator(headers: Mapping[str, str]) -> Optional[str]:
+    """What If-Range can pin ranged parts to: a strong ETag, else Last-Modified."""
+    etag = headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return headers.get("Last-Modified")
+
+async def _get_range(session: aiohttp.ClientSession, url: str, start: int, end: int,
+                     timeouts: Timeouts, validator: str, clen: int) -> bytes:
+    headers = {"Range": f"bytes={start}-{end}", "If-Range": validator}
+    async with session.get(url, headers=headers, allow_redirects=True,
+                           timeout=aiohttp.ClientTimeout(total=timeouts.total_s)) as r:
+        r.raise_for_status()
+        if r.status == 200:  # If-Range failed: the server sends the new version whole
+            raise ObjectChanged(url, f"status 200 for bytes={start}-{end}")
+        if r.status != 206:
+            raise ValueError(f"server ignored Range bytes={start}-{end} (status {r.status})")
+        now = r.headers.get("ETag" if validator.startswith('"') else "Last-Modified")
+        if now is not None and now != validator:
+            raise ObjectChanged(url, f"validator {validator} became {now}")
+        total = r.headers.get("Content-Range", "").rpartition("/")[2]
+        if total.isdigit() and int(total) != clen:
+            raise ObjectChanged(url, f"length {clen} became {total}")
+        body = await r.read()
+        if len(body) != end - start + 1:
+            raise aiohttp.ClientPayloadError(f"short part bytes={start}-{end}: got {len(body)}")
+        return body
+
+async def _ranged(session: aiohttp.ClientSession, url: str, clen: int, validator: str, *,
+                  timeouts: Timeouts, retry: RetryPolicy, limits: Limits,
+                  scheduler: Optional[HostScheduler]) -> AsyncIterator[bytes]:
+    """
+    Download ``clen`` bytes as ``multipart_chunk_size`` ranges with at most
+    ``multipart_parallelism`` parts in flight, yielding them in order. Each part retries on
+    its own, so one bad range never restarts the file. Every part is pinned to the HEAD's
+    ``validator`` with If-Range; if the object changes meanwhile, ObjectChanged.
+    """
+    chunk = max(1, limits.multipart_chunk_size)
+    ranges = iter([(i, min(i + chunk - 1, clen - 1)) for i in range(0, clen, chunk)])
+    pending: deque[asyncio.Task[bytes]] = deque()
+
+    def spawn() -> None:
+        nxt = next(ranges, None)
+        if nxt is None:
+            return
+        start, end = nxt
+        part = async_retry(lambda: _get_range(session, url, start, end, timeouts, validator, clen),
+                           attempts=retry.max_attempts, base=retry.backoff_base_s,
+                           max_s=retry.backoff_max_s, jitter=retry.jitter_s,
+                           scheduler=scheduler, host=host_of(url))
+        pending.append(asyncio.ensure_future(part))
+
+    try:
+        for _ in range(max(1, limits.multipart_parallelism)):
+            spawn()
+        while pending:
+            data = await pending.popleft()
+            spawn()
+            yield data
+    finally:
+        for t in pending:
+            t.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+async def fetch_binary(url: str, *, timeouts: Timeouts, retry: RetryPolicy,
+                       limits: Limits = Limits(), session: aiohttp.ClientSession | None = None,
+                       scheduler: Optional[HostScheduler] = None,
+                       validators: Optional[ValidatorCache] = None,
+                       budget: ByteBudget | None = None
+                       ) -> Tuple[str, AsyncIterator[bytes], Optional[int]]:
+    # crawls pass their shared session; standalone calls get one that lives as long as the stream
+    own = session is None
+    sess = session if session is not None else aiohttp.ClientSession()
+
+    async def _do() -> Tuple[str, AsyncIterator[bytes], Optional[int]]:
+        cond = validators.conditional_headers(url) if validators is not None else None
+        hr = await _head(sess, url, timeouts, cond)
+        if hr.status == 304 and validators is not None:
+            raise validators.not_modified(url)
+        if validators is not None:
+            validators.observe(url, hr.headers)
+        ct = (hr.headers.get("content-type") or "").split(";")[0].strip().lower() or "application/octet-stream"
+        clen = None
+        try:
+            clen = int(hr.headers.get("content-length", "")) if hr.headers.get("content-length") else None
+        except Exception:
             clen = None
-            try:
-                clen = int(hr.headers.get("content-length", "")) if hr.headers.get("content-length") else None
-            except Exception:
-                clen = None
-            accept_ranges = (hr.headers.get("accept-ranges","").lower() == "bytes")
-
-            # multipart if large AND range supported
-            if accept_ranges and clen and clen > 0 and clen >= 8 * 1024 * 1024:
-                chunk = 4 * 1024 * 1024
-                ranges = [(i, min(i+chunk-1, clen-1)) for i in range(0, clen, chunk)]
-                # fetch parts sequentially to preserve order; could parallelize with merge
-                async def gen():
-                    for start, end in ranges:
-                        headers = {"Range": f"bytes={start}-{end}"}
-                        async for part in _get(session, url, headers, timeouts):
-                            yield part
-                return ct, gen(), clen
-            else:
-                async def gen():
-                    async for part in _get(session, url, None, timeouts):
-                        yield part
-                return ct, gen(), clen
-
-    return await async_retry(_do, attempts=retry.max_attempts, base=retry.backoff_base_s,
-                             max_s=retry.backoff_max_s, jitter=retry.jitter_s)
+        accept_ranges = (hr.headers.get("accept-ranges","").lower() == "bytes")
+        if budget is not None:
+            budget.admit(url, clen)  # refuse before a single body byte is requested
+
+        # multipart if large AND range supported AND the parts can be pinned to one version
+        validator = _validator(hr.headers)
+        if (accept_ranges and validator and clen and clen > 0
+                and clen >= limits.multipart_threshold):
+            return ct, _ranged(sess, url, clen, validator, timeouts=timeouts, retry=retry,
+                               limits=limits, scheduler=scheduler), clen
+        else:
+            async def gen() -> AsyncIterator[bytes]:
+                async for part in _get(sess, url, None, timeouts):
+                    yield part
+            return ct, gen(), clen
+
+    try:
+        ct, body, clen = await async_retry(_do, attempts=retry.max_attempts, base=retry.backoff_base_s,
+                                           max_s=retry.backoff_max_s, jitter=retry.jitter_s,
+                                           scheduler=scheduler, host=host_of(url))
+    except BaseException:
+        if own:
+            await sess.close()
+        raise
+    if budget is not None:
+        body = budget.meter(url, body)
+    if not own:
+        return ct, body, clen
+
+    async def closing() -> AsyncIterator[bytes]:
+        try:
+            async for part in body:
+                yield part
+        finally:
+            await sess.close()
+    return ct, closing(), clen
@@ -0,0 +1,135 @@
+from __future__ import annotations
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+from ..config import Limits, Timeouts
+
+# what a render needs for the DOM; everything else is bandwidth and CPU
+BLOCKED_RESOURCES = frozenset({"image", "font", "media"})
+
+
+async def _launch_chromium() -> tuple[Any, Callable[[], Awaitable[None]]]:
+    from playwright.async_api import async_playwright
+    pw = await async_playwright().start()
+    browser = await pw.chromium.launch(headless=True)
+
+    async def stop() -> None:
+        await browser.close()
+        await pw.stop()
+    return browser, stop
+
+
+@dataclass
+class _Slot:
+    ctx: int
+    page: Any = None
+    uses: int = 0
+
+
+class BrowserPool:
+    """
+    Crawl-scoped headless Chromium shared by every JS-rendering fetch.
+
+    The browser is launched on first use and kept for the whole crawl. ``contexts``
+    browser contexts each hold up to ``pages_per_context`` pages; a page is reused for
+    ``recycle_after`` navigations and then replaced, so leaks in long-running pages stay
+    bounded. Requests for ``blocked`` resource types never leave the browser. Hand the
+    same pool to the HTML fetcher and to ``run_crawl(browser_pool=...)`` so rendering and
+    the no-links fallback share one Chromium.
+    """
+
+    def __init__(self, *, contexts: int = 2, pages_per_context: int = 2,
+                 recycle_after: int = 50, blocked: frozenset[str] = BLOCKED_RESOURCES,
+                 launch: Callable[[], Awaitable[tuple[Any, Callable[[], Awaitable[None]]]]]
+                 = _launch_chromium) -> None:
+        self.recycle_after = max(1, recycle_after)
+        self.blocked = blocked
+        self._launch = launch
+        self._browser: Any = None
+        self._stop: Optional[Callable[[], Awaitable[None]]] = None
+        self._contexts: list[Any] = [None] * max(1, contexts)
+        self._start_lock = asyncio.Lock()
+        self._all = [_Slot(ctx) for ctx in range(len(self._contexts))
+                     for _ in range(max(1, pages_per_context))]
+        self._slots: asyncio.Queue[_Slot] = asyncio.Queue()
+        for slot in self._all:
+            self._slots.put_nowait(slot)
+        self.launches = 0
+        self.pages_opened = 0
+
+    @classmethod
+    def from_limits(cls, limits: Limits) -> "BrowserPool":
+        return cls(contexts=limits.browser_contexts,
+                   pages_per_context=limits.browser_pages_per_context,
+                   recycle_after=limits.browser_recycle_after)
+
+    async def __aenter__(self) -> "BrowserPool":
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.close()
+
+    async def _block(self, route: Any) -> None:
+        if route.request.resource_type in self.blocked:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _context(self, i: int) -> Any:
+        async with self._start_lock:
+            if self._browser is None:
+                self._browser, self._stop = await self._launch()
+                self.launches += 1
+            if self._contexts[i] is None:
+                ctx = await self._browser.new_context()
+                if self.blocked:
+                    await ctx.route("**/*", self._block)
+                self._contexts[i] = ctx
+            return self._contexts[i]
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Any]:
+        """Borrow a page; waits while every slot is busy."""
+        slot = await self._slots.get()
+        try:
+            if slot.page is not None and slot.uses >= self.recycle_after:
+                await _close_quietly(slot.page)
+                slot.page = None
+            if slot.page is None:
+                slot.page = await (await self._context(slot.ctx)).new_page()
+                slot.uses = 0
+                self.pages_opened += 1
+            slot.uses += 1
+            try:
+                yield slot.page
+            except BaseException:
+                # a page that failed mid-navigation is not worth trusting again
+                await _close_quietly(slot.page)
+                slot.page = None
+                raise
+        finally:
+            self._slots.put_nowait(slot)
+
+    async def render(self, url: str, timeouts: Timeouts = Timeouts()) -> str:
+        async with self.page() as page:
+            await page.goto(url, wait_until="networkidle", timeout=timeouts.total_s * 1000)
+            html: str = await page.content()
+        return html
+
+    async def close(self) -> None:
+        async with self._start_lock:
+            stop, self._stop, self._browser = self._stop, None, None
+            self._contexts = [None] * len(self._contexts)
+            for slot in self._all:
+                slot.page, slot.uses = None, 0
+            if stop is not None:
+                await stop()  # closes every context and page with it
+
+
+async def _close_quietly(page: Any) -> None:
+    try:
+        await page.close()
+    except Exception:
+        pass
@@ -1,16 +1,48 @@
 from __future__ import annotations
-from typing import Tuple
+from typing import Any, Tuple
 from crawl4ai import AsyncWebCrawler, CrawlerRunConfig
 from ..config import Timeouts, RetryPolicy
 from ..backoff import async_retry
+from ..budget import ByteBudget
+from ..politeness import HostScheduler, host_of
+from ..revalidation import ValidatorCache
+from .browser_pool import BrowserPool
 
-async def fetch_html(url: str, *, timeouts: Timeouts, retry: RetryPolicy) -> Tuple[str, bytes]:
-    async def _do():
+async def fetch_html(url: str, *, timeouts: Timeouts, retry: RetryPolicy,
+                     session: object = None, scheduler: HostScheduler | None = None,
+                     validators: ValidatorCache | None = None,
+                     budget: ByteBudget | None = None,
+                     browser_pool: BrowserPool | None = None) -> Tuple[str, bytes]:
+    # browser-rendered: the shared aiohttp session and HTTP validators are accepted for port
+    # parity only; pages are always rendered in full
+    async def _render() -> str:
+        if browser_pool is not None:
+            # only the rendered DOM is used, so a pooled page does the same job without
+            # starting a browser per URL
+            return await browser_pool.render(url, timeouts)
         async with AsyncWebCrawler() as crawler:
             cfg = CrawlerRunConfig()  # rely on library defaults
             r = await crawler.arun(url, config=cfg)
-            html = getattr(r, "html", "") or ""
-            ct = "text/html"
-            return ct, html.encode("utf-8", errors="ignore")
+            return getattr(r, "html", "") or ""
+
+    async def _do():
+        html = await _render()
+        ct = "text/html"
+        body = html.encode("utf-8", errors="ignore")
+        if budget is not None:
+            # the browser already holds the page; only the accounting can be enforced
+            budget.admit(url, len(body))
+            budget.charge(url, len(body))
+        return ct, body
     return await async_retry(_do, attempts=retry.max_attempts, base=retry.backoff_base_s,
-                             max_s=retry.backoff_max_s, jitter=retry.jitter_s)
+                             max_s=retry.backoff_max_s, jitter=retry.jitter_s,
+                             scheduler=scheduler, host=host_of(url))
+
+class PooledHtmlFetcher:
+    """``HtmlFetcher`` over ``fetch_html`` bound to a crawl's shared ``BrowserPool``."""
+
+    def __init__(self, pool: BrowserPool):
+        self.pool = pool
+
+    async def fetch_html(self, url: str, **kwargs: Any) -> Tuple[str, bytes]:
+        return await fetch_html(url, browser_pool=self.pool, **kwargs)
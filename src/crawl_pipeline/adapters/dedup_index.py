@@ -0,0 +1,97 @@
+from __future__ import annotations
+import json, sqlite3, threading
+from pathlib import Path
+from typing import Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256   TEXT PRIMARY KEY,
+    location TEXT NOT NULL,
+    size     INTEGER
+);
+"""
+
+MANIFEST_NAME = "_dedup/manifest.jsonl"
+
+
+class DedupIndex:
+    """
+    sha256 -> first stored location, shared by every storage backend.
+
+    Backends look a blob up before writing: a hit on a location they can reach becomes a
+    hardlink (fs) or server-side copy (S3/GCS) instead of a full write. The index lives in
+    a local SQLite file; ``to_manifest``/``merge_manifest`` round-trip it through a JSONL
+    object in the bucket so separate machines share what is already uploaded.
+
+    Safe to share between the storage writer threads.
+    """
+
+    def __init__(self, path: str) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def __enter__(self) -> "DedupIndex":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def lookup(self, sha256: str, scheme: Optional[str] = None) -> Optional[str]:
+        """Known location of ``sha256`` usable by one backend: local paths for ``scheme=None``,
+        ``scheme``:// URIs otherwise."""
+        with self._lock:
+            row = self._db.execute("SELECT location FROM blobs WHERE sha256=?",
+                                   (sha256,)).fetchone()
+        if row is None:
+            return None
+        loc: str = row[0]
+        if scheme is not None and not loc.startswith(f"{scheme}://"):
+            return None
+        if scheme is None and "://" in loc:
+            return None
+        return loc
+
+    def record(self, sha256: str, location: str, size: Optional[int] = None) -> None:
+        with self._lock:
+            self._db.execute("INSERT OR IGNORE INTO blobs VALUES (?, ?, ?)",
+                             (sha256, location, size))
+
+    def forget(self, sha256: str) -> None:
+        """Drop an entry whose location turned out to be gone."""
+        with self._lock:
+            self._db.execute("DELETE FROM blobs WHERE sha256=?", (sha256,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            (n,) = self._db.execute("SELECT COUNT(*) FROM blobs").fetchone()
+        return int(n)
+
+    def to_manifest(self) -> bytes:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT sha256, location, size FROM blobs ORDER BY sha256").fetchall()
+        return b"".join(json.dumps({"sha256": s, "location": loc, "size": n}).encode() + b"\n"
+                        for s, loc, n in rows)
+
+    def merge_manifest(self, data: bytes) -> int:
+        entries = []
+        for line in data.splitlines():
+            if not line.strip():
+                continue
+            try:
+                rec = json.loads(line)
+                entries.append((rec["sha256"], rec["location"], rec.get("size")))
+            except (ValueError, KeyError, TypeError):
+                continue
+        with self._lock, self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany("INSERT OR IGNORE INTO blobs VALUES (?, ?, ?)", entries)
+        return len(entries)
@@ -0,0 +1,173 @@
+from __future__ import annotations
+import html as _html, re
+from typing import List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+# Only the tags we follow, plus comments so commented-out markup is skipped.
+_TOKEN = re.compile(rb"<!--.*?-->|<(a|area|link|iframe|base)\b([^>]*)>", re.I | re.S)
+_ATTR = re.compile(rb"""(?<![\w-])(href|src)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""", re.I)
+_SOURCE_ATTR = {b"a": b"href", b"area": b"href", b"link": b"href", b"iframe": b"src"}
+_SKIP = ("#", "mailto:", "javascript:", "tel:", "data:")
+_MAX_TAIL = 64 * 1024  # an unterminated tag/comment longer than this is dropped
+_ANCHOR_BYTES = 512    # how far past <a ...> to look for its text
+_CLOSE_A = re.compile(rb"</a\s*>", re.I)
+_INNER_TAG = re.compile(rb"<[^>]*>")
+
+
+def _value(m: re.Match[bytes]) -> bytes:
+    return m.group(2) if m.group(2) is not None else (m.group(3) if m.group(3) is not None
+                                                        else m.group(4))
+
+
+class LinkScanner:
+    """
+    Link scanner over raw HTML bytes.
+
+    ``feed`` the page, whole (as the crawl does: large pages are scanned in its process
+    pool) or in chunks (a tag split across chunks is carried over), then
+    ``links()`` returns absolute http(s) URLs from ``<a|area|link href>`` and
+    ``<iframe src>``, resolved against the first ``<base href>`` if the page has one.
+    With ``anchors``, ``links_with_text()`` also pairs each link with the text of its
+    ``<a>`` (tags stripped; looked for within a short window, and in the same chunk).
+    """
+
+    def __init__(self, base_url: str, anchors: bool = False) -> None:
+        self.base_url = base_url
+        self.anchors = anchors
+        self._base: Optional[str] = None
+        self._raw: list[bytes] = []
+        self._texts: list[bytes] = []
+        self._tail = b""
+
+    def feed(self, chunk: bytes) -> None:
+        buf = self._tail + chunk if self._tail else chunk
+        # stop before a comment that isn't closed yet; it is rescanned with the next chunk
+        limit = len(buf)
+        closed = buf.rfind(b"-->")
+        open_comment = buf.find(b"<!--", closed + 3 if closed != -1 else 0)
+        if open_comment != -1:
+            limit = open_comment
+        end = 0
+        for m in _TOKEN.finditer(buf, 0, limit):
+            end = m.end()
+            tag = m.group(1)
+            if tag is None:
+                continue  # comment
+            tag = tag.lower()
+            want = _SOURCE_ATTR.get(tag, b"href")
+            for a in _ATTR.finditer(m.group(2)):
+                if a.group(1).lower() == want:
+                    if tag == b"base":
+                        if self._base is None:
+                            self._base = self._text(_value(a))
+                    else:
+                        self._raw.append(_value(a))
+                        if self.anchors:
+                            self._texts.append(self._anchor(buf, m.end()) if tag == b"a"
+                                               else b"")
+                    break
+        # carry over a trailing tag that isn't closed yet
+        cut = limit
+        lt = buf.rfind(b"<", end, limit)
+        if lt != -1 and buf.find(b">", lt, limit) == -1:
+            cut = lt
+        self._tail = buf[cut:] if len(buf) - cut <= _MAX_TAIL else b""
+
+    @staticmethod
+    def _anchor(buf: bytes, start: int) -> bytes:
+        close = _CLOSE_A.search(buf, start, start + _ANCHOR_BYTES)
+        return _INNER_TAG.sub(b" ", buf[start:close.start()]) if close else b""
+
+    @staticmethod
+    def _text(v: bytes) -> str:
+        s = v.decode("utf-8", errors="ignore").strip()
+        return _html.unescape(s) if "&" in s else s
+
+    def links(self) -> List[str]:
+        return [u for u, _ in self._resolved()]
+
+    def links_with_text(self) -> List[Tuple[str, str]]:
+        """``(url, anchor text)`` pairs; the text is empty unless built with ``anchors``."""
+        return [(u, " ".join(self._text(self._texts[i]).split()) if self._texts else "")
+                for u, i in self._resolved()]
+
+    def _resolved(self) -> List[Tuple[str, int]]:
+        base = self.base_url
+        if self._base:
+            base = urljoin(base, self._base)
+        resolve = _Resolver(base)
+        out: list[tuple[str, int]] = []
+        for i, raw in enumerate(self._raw):
+            href = self._text(raw)
+            if not href or href[:11].lower().startswith(_SKIP):
+                continue
+            u = resolve(href)
+            if u is not None:
+                out.append((u, i))
+        return out
+
+
+class _Resolver:
+    """
+    ``urljoin`` against one base, with string fast paths for the shapes most hrefs take
+    (absolute, scheme-relative, root-relative, plain relative); anything with dot
+    segments or an unusual form goes through ``urljoin``.
+    """
+
+    def __init__(self, base: str) -> None:
+        self.base = base
+        parts = urlsplit(base)
+        self.ok = parts.scheme in ("http", "https") and bool(parts.netloc)
+        self.scheme = parts.scheme
+        self.origin = f"{parts.scheme}://{parts.netloc}"
+        path = parts.path or "/"
+        self.dir = self.origin + path[: path.rfind("/") + 1]
+        self.doc = self.origin + path
+
+    def __call__(self, href: str) -> Optional[str]:
+        if self.ok and "/." not in "/" + href:
+            if href.startswith(("http://", "https://")):
+                return href
+            if href.startswith("//"):
+                return f"{self.scheme}:{href}"
+            if href.startswith("/"):
+                return self.origin + href
+            if href.startswith("?"):
+                return self.doc + href
+            if ":" not in href.split("/", 1)[0]:
+                return self.dir + href
+        return self._slow(href)
+
+    def _slow(self, href: str) -> Optional[str]:
+        try:
+            u = urljoin(self.base, href)
+            return u if urlsplit(u).scheme in ("http", "https") else None
+        except ValueError:
+            return None
+
+
+def extract(base_url: str, html: bytes) -> List[str]:
+    if isinstance(html, str):
+        html = html.encode("utf-8", errors="ignore")
+    s = LinkScanner(base_url)
+    s.feed(html)
+    return s.links()
+
+
+def extract_anchors(base_url: str, html: bytes) -> List[Tuple[str, str]]:
+    """``extract``, with each link's anchor text."""
+    if isinstance(html, str):
+        html = html.encode("utf-8", errors="ignore")
+    s = LinkScanner(base_url, anchors=True)
+    s.feed(html)
+    return s.links_with_text()
+
+
+class FastLinkExtractor:
+    """``LinkExtractor`` port over ``extract``."""
+
+    def extract(self, base_url: str, html: bytes) -> List[str]:
+        return extract(base_url, html)
+
+    def extract_anchors(self, base_url: str, html: bytes) -> List[Tuple[str, str]]:
+        return extract_anchors(base_url, html)
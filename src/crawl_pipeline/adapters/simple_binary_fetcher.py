@@ -1,27 +1,64 @@
+from typing import AsyncIterator
 import aiohttp
-import asyncio, random
-from crawl_pipeline.config import RetryPolicy, Timeouts
+from crawl_pipeline.backoff import async_retry
+from crawl_pipeline.budget import CHUNK_BYTES, ByteBudget
+from crawl_pipeline.config import Limits, RetryPolicy, Timeouts
+from crawl_pipeline.politeness import HostScheduler, host_of
+from crawl_pipeline.revalidation import ValidatorCache
 
 class SimpleBinaryFetcher:
-    async def fetch_binary(self, url: str, timeouts: Timeouts, retry: RetryPolicy) -> bytes:
+    """Single-GET ``BinaryFetcher``: the body is streamed in chunks, never read whole."""
+
+    async def fetch_binary(self, url: str, *, timeouts: Timeouts, retry: RetryPolicy,
+                           limits: Limits = Limits(),
+                           session: aiohttp.ClientSession | None = None,
+                           scheduler: HostScheduler | None = None,
+                           validators: ValidatorCache | None = None,
+                           budget: ByteBudget | None = None
+                           ) -> tuple[str, AsyncIterator[bytes], int | None]:
         aio_timeout = aiohttp.ClientTimeout(
             total=timeouts.read_s,
             connect=timeouts.connect_s,
         )
+        # standalone use: a throwaway session that lives as long as the stream
+        own = session is None
+        sess = session if session is not None else aiohttp.ClientSession(timeout=aio_timeout)
+
+        async def _do() -> aiohttp.ClientResponse:
+            headers = validators.conditional_headers(url) if validators is not None else {}
+            resp = await sess.get(url, headers=headers, timeout=aio_timeout)
+            try:
+                if resp.status == 304 and validators is not None:
+                    raise validators.not_modified(url)
+                resp.raise_for_status()
+                if budget is not None:
+                    budget.admit(url, resp.content_length)
+            except BaseException:
+                resp.release()
+                raise
+            if validators is not None:
+                validators.observe(url, resp.headers)
+            return resp
+
+        try:
+            resp = await async_retry(_do, attempts=retry.max_attempts, base=retry.backoff_base_s,
+                                     max_s=retry.backoff_max_s, jitter=retry.jitter_s,
+                                     scheduler=scheduler, host=host_of(url))
+        except BaseException:
+            if own:
+                await sess.close()
+            raise
 
-        async with aiohttp.ClientSession(timeout=aio_timeout) as session:
-            for attempt in range(retry.max_attempts):
-                try:
-                    async with session.get(url) as resp:
-                        return await resp.read()
-                except Exception as e:
-                    if attempt == retry.max_attempts - 1:
-                        raise
+        async def body() -> AsyncIterator[bytes]:
+            try:
+                async for chunk in resp.content.iter_chunked(CHUNK_BYTES):
+                    if chunk:
+                        yield chunk
+            finally:
+                resp.release()
+                if own:
+                    await sess.close()
 
-                    # exponential backoff with jitter
-                    sleep_time = min(
-                        retry.backoff_base_s * (2 ** attempt),
-                        retry.backoff_max_s
-                    )
-                    sleep_time += random.uniform(0, retry.jitter_s)
-                    await asyncio.sleep(sleep_time)
+        chunks = body() if budget is None else budget.meter(url, body())
+        ct = (resp.headers.get("content-type") or "").split(";")[0].strip().lower()
+        return ct or "application/octet-stream", chunks, resp.content_length
@@ -1,29 +1,41 @@
 import aiohttp
-import asyncio, random
+from crawl_pipeline.backoff import async_retry
+from crawl_pipeline.budget import ByteBudget
 from crawl_pipeline.config import RetryPolicy, Timeouts
+from crawl_pipeline.politeness import HostScheduler, host_of
+from crawl_pipeline.revalidation import ValidatorCache
 
 class SimpleHtmlFetcher:
-    async def fetch_html(self, url: str, timeouts: Timeouts, retry: RetryPolicy):
+    async def fetch_html(self, url: str, timeouts: Timeouts, retry: RetryPolicy,
+                         session: aiohttp.ClientSession | None = None,
+                         scheduler: HostScheduler | None = None,
+                         validators: ValidatorCache | None = None,
+                         budget: ByteBudget | None = None) -> tuple[str, bytes]:
         aio_timeout = aiohttp.ClientTimeout(
             total=timeouts.read_s,
             connect=timeouts.connect_s,
         )
 
-        async with aiohttp.ClientSession(timeout=aio_timeout) as session:
-            for attempt in range(retry.max_attempts):
-                try:
-                    async with session.get(url) as resp:
-                        ct = resp.headers.get("content-type", "")
-                        html = await resp.text()
-                        return ct, html
-                except Exception as e:
-                    if attempt == retry.max_attempts - 1:
-                        raise
+        if session is None:
+            # standalone use: a throwaway session; crawls pass their shared one
+            async with aiohttp.ClientSession(timeout=aio_timeout) as own:
+                return await self.fetch_html(url, timeouts, retry, session=own, scheduler=scheduler,
+                                             validators=validators, budget=budget)
 
-                    # exponential backoff with jitter
-                    sleep_time = min(
-                        retry.backoff_base_s * (2 ** attempt),
-                        retry.backoff_max_s
-                    )
-                    sleep_time += random.uniform(0, retry.jitter_s)
-                    await asyncio.sleep(sleep_time)
+        # recrawls: revalidate against the cached ETag/Last-Modified instead of refetching
+        headers = validators.conditional_headers(url) if validators is not None else {}
+
+        async def _do() -> tuple[str, bytes]:
+            async with session.get(url, headers=headers, timeout=aio_timeout) as resp:
+                if resp.status == 304 and validators is not None:
+                    raise validators.not_modified(url)
+                resp.raise_for_status()
+                if validators is not None:
+                    validators.observe(url, resp.headers)
+                ct = resp.headers.get("content-type", "")
+                html = await budget.read(url, resp) if budget is not None else await resp.read()
+                return ct, html
+
+        return await async_retry(_do, attempts=retry.max_attempts, base=retry.backoff_base_s,
+                                 max_s=retry.backoff_max_s, jitter=retry.jitter_s,
+                                 scheduler=scheduler, host=host_of(url))
@@ -0,0 +1,53 @@
+from __future__ import annotations
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, AsyncIterator, Callable
+
+from ..config import Limits
+from ..ports.storage import Storage
+
+
+class StorageWriter:
+    """
+    Async face of a blocking ``Storage`` backend.
+
+    ``save_bytes`` runs in a bounded thread pool, and ``save_stream`` hands the backend
+    the same pool through ``run``, so the event loop never waits on open/write/fsync or on
+    boto3/google-cloud-storage. At most ``max_pending`` saves are admitted at once. When
+    storage falls behind, callers wait here, which throttles the fetchers that feed them,
+    so writes never queue without bound.
+    """
+
+    def __init__(self, storage: Storage, *, workers: int = 8, max_pending: int = 32) -> None:
+        self.storage = storage
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers),
+                                        thread_name_prefix="storage")
+        self._slots = asyncio.Semaphore(max(1, max_pending))
+
+    @classmethod
+    def from_limits(cls, storage: Storage, limits: Limits) -> "StorageWriter":
+        return cls(storage, workers=limits.storage_workers,
+                   max_pending=limits.storage_max_pending)
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._pool, partial(fn, *args))
+
+    async def save_bytes(self, *, content: bytes, url: str, canonical_type: str,
+                         root: str) -> str:
+        async with self._slots:
+            location: str = await self.run(partial(self.storage.save_bytes, content=content,
+                                                   url=url, canonical_type=canonical_type,
+                                                   root=root))
+        return location
+
+    async def save_stream(self, *, chunks: AsyncIterator[bytes], url: str, canonical_type: str,
+                          root: str, size_hint: int | None = None) -> str:
+        async with self._slots:
+            return await self.storage.save_stream(chunks=chunks, url=url,
+                                                  canonical_type=canonical_type, root=root,
+                                                  size_hint=size_hint, run=self.run)
+
+    def close(self) -> None:
+        """Wait for writes already handed to the pool, then stop its threads."""
+        self._pool.shutdown(wait=True)
@@ -1,10 +1,11 @@
 from __future__ import annotations
-import os, hashlib, tempfile
+import asyncio, ctypes, os, hashlib, tempfile, threading, time
 from pathlib import Path
-from typing import AsyncIterator
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
 from yarl import URL
 
 from ..ports.storage import Storage
+from .dedup_index import DedupIndex
 
 _EXT = { "html": ".html", "pdf": ".pdf", "docx": ".docx", "pptx": ".pptx" }
 
@@ -24,38 +25,196 @@ def _layout(root: str, url: str, sha: str, canonical_type: str) -> Path:
     ext = _EXT.get(canonical_type, "")
     return base / f"{sha[:16]}{ext}"
 
-def save_bytes(*, content: bytes | str, url: str, canonical_type: str, root: str) -> str:
+def _reuse(dedup: DedupIndex | None, sha: str, path: Path) -> bool:
+    """Point ``path`` at an already stored copy of ``sha`` (hardlink) instead of writing it."""
+    if path.exists():
+        return True  # content-addressed name: same bytes are already there
+    if dedup is None:
+        return False
+    known = dedup.lookup(sha)
+    if known is None:
+        return False
+    tmp = str(path) + ".lnk"
+    try:
+        os.link(known, tmp)
+        os.replace(tmp, path)
+        return True
+    except OSError:
+        if not os.path.exists(known):
+            dedup.forget(sha)
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        return False
+
+def _syncfs() -> Optional[Callable[[int], int]]:
+    try:
+        return ctypes.CDLL(None, use_errno=True).syncfs  # Linux only
+    except (OSError, AttributeError):
+        return None
+
+class GroupCommit:
+    """
+    Group-commit fsync for one storage root.
+
+    Writers call ``sync(path)`` instead of fsyncing their own file and block until a batch
+    holding it is durable. Whoever finds no flush running leads the next batch: it waits
+    ``window_s`` for others to join, then makes the whole batch durable with one
+    ``syncfs`` of the root's filesystem (one fsync per file where that is unavailable).
+    """
+
+    def __init__(self, root: str, window_s: float = 0.005) -> None:
+        self.root = root
+        self.window_s = window_s
+        self._cond = threading.Condition()
+        self._pending: list[str] = []
+        self._collecting = 1  # number of the batch new paths join
+        self._durable = 0     # last batch flushed
+        self._failed: dict[int, OSError] = {}
+        self._flushing = False
+        self._syncfs = _syncfs()
+        self.batches = 0
+
+    def sync(self, path: str) -> None:
+        with self._cond:
+            self._pending.append(path)
+            ticket = self._collecting
+            while self._durable < ticket:
+                if self._flushing:
+                    self._cond.wait()
+                    continue
+                self._flushing = True
+                self._cond.release()
+                try:
+                    time.sleep(self.window_s)
+                finally:
+                    self._cond.acquire()
+                batch, self._pending = self._pending, []
+                number, self._collecting = self._collecting, self._collecting + 1
+                self._cond.release()
+                try:
+                    self._flush(batch)
+                except OSError as e:
+                    self._failed[number] = e
+                finally:
+                    self._cond.acquire()
+                    self._durable, self._flushing = number, False
+                    self.batches += 1
+                    self._cond.notify_all()
+            err = self._failed.get(ticket)
+        if err is not None:
+            raise err
+
+    def _flush(self, batch: list[str]) -> None:
+        if self._syncfs is not None and len(batch) > 1:
+            fd = os.open(self.root, os.O_RDONLY)
+            try:
+                if self._syncfs(fd) == 0:
+                    return
+            finally:
+                os.close(fd)
+        for p in batch:
+            _fsync_path(p)
+
+def _fsync_path(path: str) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _durable(f: Any, group: GroupCommit | None) -> None:
+    f.flush()
+    if group is None:
+        os.fsync(f.fileno())
+    else:
+        group.sync(f.name)
+
+async def _to_thread(fn: Callable[..., Any], *args: Any) -> Any:
+    return await asyncio.to_thread(fn, *args)
+
+def _open_temp(base_dir: Path) -> Any:
+    base_dir.mkdir(parents=True, exist_ok=True)
+    return tempfile.NamedTemporaryFile(delete=False, dir=base_dir)
+
+def save_bytes(*, content: bytes | str, url: str, canonical_type: str, root: str,
+               dedup: DedupIndex | None = None, group: GroupCommit | None = None) -> str:
     # ensure content is always bytes
     if isinstance(content, str):
         content = content.encode("utf-8")
 
     sha = hashlib.sha256(content).hexdigest()
     path = _layout(root, url, sha, canonical_type)
-    tmp = str(path) + ".tmp"
-    with open(tmp, "wb") as f:
+    if _reuse(dedup, sha, path):
+        return str(path.resolve())
+    # a unique temp name: concurrent saves of the same content must not share one
+    with _open_temp(path.parent) as f:
         f.write(content)
-        f.flush()
-        os.fsync(f.fileno())
-    os.replace(tmp, path)
+        _durable(f, group)
+    os.replace(f.name, path)
+    if dedup is not None:
+        dedup.record(sha, str(path.resolve()), len(content))
     return str(path.resolve())
 
 
+def _finish(f: Any, sha: str, total: int, url: str, canonical_type: str, root: str,
+            dedup: DedupIndex | None, group: GroupCommit | None) -> str:
+    tmp_path = Path(f.name)
+    with f:
+        _durable(f, group)
+    final = _layout(root, url, sha, canonical_type)
+    if _reuse(dedup, sha, final):
+        os.unlink(tmp_path)
+        return str(final.resolve())
+    os.replace(tmp_path, final)
+    if dedup is not None:
+        dedup.record(sha, str(final.resolve()), total)
+    return str(final.resolve())
+
+def _discard(f: Any) -> None:
+    f.close()
+    os.unlink(f.name)
+
 async def save_stream(*, chunks: AsyncIterator[bytes], url: str, canonical_type: str, root: str,
-                      size_hint: int | None = None) -> str:
+                      size_hint: int | None = None, dedup: DedupIndex | None = None,
+                      group: GroupCommit | None = None,
+                      run: Callable[..., Awaitable[Any]] = _to_thread) -> str:
+    """Hash on the event loop; every filesystem call goes through ``run`` (a thread)."""
     h = hashlib.sha256()
     # write to temp, then move to content-addressed name
-    base_dir = Path(root) / (URL(url).host or "unknown-host")
-    base_dir.mkdir(parents=True, exist_ok=True)
-    with tempfile.NamedTemporaryFile(delete=False, dir=base_dir) as f:
-        tmp_path = Path(f.name)
-        total = 0
+    f = await run(_open_temp, Path(root) / (URL(url).host or "unknown-host"))
+    total = 0
+    try:
         async for ch in chunks:
-            f.write(ch)
             h.update(ch)
+            await run(f.write, ch)
             total += len(ch)
-        f.flush()
-        os.fsync(f.fileno())
-    sha = h.hexdigest()
-    final = _layout(root, url, sha, canonical_type)
-    os.replace(tmp_path, final)
-    return str(final.resolve())
+    except BaseException:
+        # an aborted stream (e.g. over budget) leaves nothing behind
+        await asyncio.shield(run(_discard, f))
+        raise
+    location: str = await run(_finish, f, h.hexdigest(), total, url, canonical_type, root, dedup,
+                              group)
+    return location
+
+class FsStorage:
+    """``Storage`` for one local root; holds its dedup index and group-commit state."""
+
+    def __init__(self, root: str, *, dedup: DedupIndex | None = None,
+                 group: GroupCommit | None = None) -> None:
+        self.root = root
+        self.dedup = dedup
+        self.group = group
+
+    def save_bytes(self, *, content: bytes | str, url: str, canonical_type: str,
+                   root: str | None = None) -> str:
+        return save_bytes(content=content, url=url, canonical_type=canonical_type,
+                          root=root or self.root, dedup=self.dedup, group=self.group)
+
+    async def save_stream(self, *, chunks: AsyncIterator[bytes], url: str, canonical_type: str,
+                          root: str | None = None, size_hint: int | None = None,
+                          run: Callable[..., Awaitable[Any]] = _to_thread) -> str:
+        return await save_stream(chunks=chunks, url=url, canonical_type=canonical_type,
+                                 root=root or self.root, size_hint=size_hint, dedup=self.dedup,
+                                 group=self.group, run=run)
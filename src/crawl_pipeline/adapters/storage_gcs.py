@@ -1,9 +1,22 @@
 from __future__ import annotations
-import hashlib, tempfile
-from typing import AsyncIterator
+import asyncio, hashlib, uuid
+from functools import partial
+from typing import Any, AsyncIterator, Awaitable, Callable
 from yarl import URL
 
+from ..config import Limits
+from .dedup_index import DedupIndex, MANIFEST_NAME
+
 _EXT = { "html": ".html", "pdf": ".pdf", "docx": ".docx", "pptx": ".pptx" }
+_CHUNK_ALIGN = 256 * 1024  # resumable upload chunks must be multiples of 256 KiB
+
+def _mime(canonical_type: str) -> str:
+    return {
+        "html":"text/html; charset=utf-8",
+        "pdf":"application/pdf",
+        "docx":"application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        "pptx":"application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    }.get(canonical_type, "application/octet-stream")
 
 def _parse_root(root: str) -> tuple[str,str]:
     u = URL(root)
@@ -23,43 +36,229 @@ def _key(prefix: str, url: str, sha: str, canonical_type: str) -> str:
     key = "/".join([p for p in [prefix.rstrip('/'), host, sub] if p])
     return f"{key}/{sha[:16]}{ext}" if key else f"{sha[:16]}{ext}"
 
-def save_bytes(*, content: bytes, url: str, canonical_type: str, root: str) -> str:
+def _copy_known(client: Any, dedup: DedupIndex | None, sha: str, bucket: Any, key: str) -> bool:
+    """Server-side rewrite of an already uploaded blob with the same sha instead of an upload."""
+    if dedup is None:
+        return False
+    known = dedup.lookup(sha, "gs")
+    if known is None:
+        return False
+    if known == f"gs://{bucket.name}/{key}":
+        return True
+    src_bucket, src_key = _parse_root(known)
+    try:
+        src = client.bucket(src_bucket)
+        src.copy_blob(src.blob(src_key), bucket, key)
+    except Exception:
+        dedup.forget(sha)
+        return False
+    return True
+
+def make_http(limits: Limits = Limits()) -> Any:
+    """An authorized ``requests`` session with its pool sized for every worker saving at once."""
+    import google.auth  # lazy
+    from google.auth.transport.requests import AuthorizedSession
+    from google.cloud import storage
+    from requests.adapters import HTTPAdapter
+    credentials, _ = google.auth.default(scopes=storage.Client.SCOPE)
+    http = AuthorizedSession(credentials)  # type: ignore[no-untyped-call]
+    size = max(10, limits.max_concurrency_total)
+    http.mount("https://", HTTPAdapter(pool_connections=size, pool_maxsize=size))
+    return http
+
+def make_client(limits: Limits = Limits(), http: Any = None) -> Any:
+    """One client per crawl, over ``http`` (``make_http`` when None)."""
     from google.cloud import storage  # lazy
+    http = http if http is not None else make_http(limits)
+    return storage.Client(credentials=http.credentials, _http=http)
+
+def save_bytes(*, content: bytes, url: str, canonical_type: str, root: str,
+               dedup: DedupIndex | None = None, client: Any = None, bucket: Any = None
+               ) -> str:
     bucket_name, prefix = _parse_root(root)
     h = hashlib.sha256(content).hexdigest()
     key = _key(prefix, url, h, canonical_type)
-    client = storage.Client()
-    bucket = client.bucket(bucket_name)
+    client = client if client is not None else make_client()
+    bucket = bucket if bucket is not None else client.bucket(bucket_name)
+    if _copy_known(client, dedup, h, bucket, key):
+        return f"gs://{bucket_name}/{key}"
     blob = bucket.blob(key)
-    mime = {
-        "html":"text/html; charset=utf-8",
-        "pdf":"application/pdf",
-        "docx":"application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        "pptx":"application/vnd.openxmlformats-officedocument.presentationml.presentation",
-    }.get(canonical_type, "application/octet-stream")
+    mime = _mime(canonical_type)
     blob.upload_from_string(content, content_type=mime)
+    if dedup is not None:
+        dedup.record(h, f"gs://{bucket_name}/{key}", len(content))
     return f"gs://{bucket_name}/{key}"
 
-async def save_stream(*, chunks, url: str, canonical_type: str, root: str, size_hint: int | None = None) -> str:
-    from google.cloud import storage
+async def _to_thread(fn: Callable[..., Any], *args: Any) -> Any:
+    return await asyncio.to_thread(fn, *args)
+
+def _staging_key(prefix: str) -> str:
+    return "/".join(p for p in [prefix.rstrip("/"), "_staging", uuid.uuid4().hex] if p)
+
+def _put_chunk(http: Any, session: str, data: bytes, start: int, total: int | None = None) -> None:
+    """One chunk of a resumable upload; ``total`` (the object size) marks the last one."""
+    if data:
+        span = f"{start}-{start + len(data) - 1}/{'*' if total is None else total}"
+    else:
+        span = f"*/{total}"
+    r = http.put(session, data=data, headers={"Content-Range": f"bytes {span}"})
+    if r.status_code not in ((308,) if total is None else (200, 201)):
+        raise OSError(f"resumable upload: HTTP {r.status_code} for bytes {span}")
+
+def _cancel(http: Any, session: str) -> None:
+    # DELETE on the session URI discards the bytes already uploaded
+    try:
+        http.delete(session)
+    except Exception:
+        pass
+
+def _promote(bucket: Any, staging: str, key: str) -> None:
+    # rewrite rather than copy_blob: large objects take several server-side calls
+    src, dst = bucket.blob(staging), bucket.blob(key)
+    token, _, _ = dst.rewrite(src)
+    while token is not None:
+        token, _, _ = dst.rewrite(src, token=token)
+
+async def save_stream(*, chunks: AsyncIterator[bytes], url: str, canonical_type: str, root: str,
+                      size_hint: int | None = None, dedup: DedupIndex | None = None,
+                      run: Callable[..., Awaitable[Any]] = _to_thread,
+                      part_size: int = Limits.multipart_chunk_size,
+                      client: Any = None, bucket: Any = None, http: Any = None) -> str:
+    """
+    Resumable upload fed as the download arrives: every ``part_size`` bytes are sent while
+    the next part is being read, with the sha256 computed on the fly. A resumable session
+    takes bytes strictly in order, so at most one part is in flight; a failed stream
+    cancels the session. The upload targets a staging object that is rewritten to its
+    content-addressed name at the end. A body smaller than one part is a single upload
+    to its final name.
+    """
     bucket_name, prefix = _parse_root(root)
+    http = http if http is not None else await run(make_http)
+    client = client if client is not None else await run(make_client, Limits(), http)
+    bucket = bucket if bucket is not None else client.bucket(bucket_name)
+    mime = _mime(canonical_type)
+    part_size = max(_CHUNK_ALIGN, part_size // _CHUNK_ALIGN * _CHUNK_ALIGN)
     h = hashlib.sha256()
-    tmp = tempfile.SpooledTemporaryFile(max_size=64*1024*1024)
-    total = 0
-    async for ch in chunks:
-        tmp.write(ch); h.update(ch); total += len(ch)
-    tmp.seek(0)
-    sha = h.hexdigest()
-    key = _key(prefix, url, sha, canonical_type)
-    client = storage.Client()
-    bucket = client.bucket(bucket_name)
-    blob = bucket.blob(key)
-    mime = {
-        "html":"text/html; charset=utf-8",
-        "pdf":"application/pdf",
-        "docx":"application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        "pptx":"application/vnd.openxmlformats-officedocument.presentationml.presentation",
-    }.get(canonical_type, "application/octet-stream")
-    blob.upload_from_file(tmp, content_type=mime)
-    tmp.close()
+    buf = bytearray()
+    total = sent = 0
+    staging = _staging_key(prefix)
+    session: str | None = None
+    pending: asyncio.Future[Any] | None = None
+
+    async def send(data: bytes, size: int | None = None) -> None:
+        nonlocal session, pending, sent
+        if session is None:
+            session = await run(partial(bucket.blob(staging).create_resumable_upload_session,
+                                        content_type=mime, client=client, checksum=None))
+        if pending is not None:
+            await pending
+        pending = asyncio.ensure_future(run(_put_chunk, http, session, data, sent, size))
+        sent += len(data)
+
+    try:
+        async for ch in chunks:
+            h.update(ch)
+            total += len(ch)
+            buf += ch
+            while len(buf) >= part_size:
+                await send(bytes(buf[:part_size]))
+                del buf[:part_size]
+        sha = h.hexdigest()
+        key = _key(prefix, url, sha, canonical_type)
+        if session is None:
+            if not await run(_copy_known, client, dedup, sha, bucket, key):
+                await run(lambda: bucket.blob(key).upload_from_string(bytes(buf),
+                                                                      content_type=mime))
+                if dedup is not None:
+                    dedup.record(sha, f"gs://{bucket_name}/{key}", total)
+            return f"gs://{bucket_name}/{key}"
+        await send(bytes(buf), total)
+        if pending is not None:
+            await pending
+        session = None  # finalized
+    except BaseException:
+        # a chunk already running in its thread cannot be stopped: wait for it, then
+        # cancel the session so nothing it uploaded is kept
+        if pending is not None:
+            await asyncio.shield(asyncio.gather(pending, return_exceptions=True))
+        if session is not None:
+            await asyncio.shield(run(_cancel, http, session))
+        raise
+    try:
+        if not await run(_copy_known, client, dedup, sha, bucket, key):
+            await run(_promote, bucket, staging, key)
+            if dedup is not None:
+                dedup.record(sha, f"gs://{bucket_name}/{key}", total)
+    finally:
+        await asyncio.shield(run(lambda: bucket.blob(staging).delete()))
     return f"gs://{bucket_name}/{key}"
+
+def _manifest_key(prefix: str) -> str:
+    return "/".join(p for p in [prefix.rstrip("/"), MANIFEST_NAME] if p)
+
+def pull_manifest(root: str, dedup: DedupIndex, client: Any = None) -> int:
+    """Merge the bucket's shared dedup manifest (if any) into the local index."""
+    bucket_name, prefix = _parse_root(root)
+    client = client if client is not None else make_client()
+    try:
+        body = client.bucket(bucket_name).blob(_manifest_key(prefix)).download_as_bytes()
+    except Exception:
+        return 0
+    return dedup.merge_manifest(body)
+
+def push_manifest(root: str, dedup: DedupIndex, client: Any = None) -> str:
+    bucket_name, prefix = _parse_root(root)
+    key = _manifest_key(prefix)
+    client = client if client is not None else make_client()
+    client.bucket(bucket_name).blob(key).upload_from_string(
+        dedup.to_manifest(), content_type="application/x-ndjson")
+    return f"gs://{bucket_name}/{key}"
+
+class GCSStorage:
+    """
+    ``Storage`` for one ``gs://bucket/prefix`` root, owning a long-lived client, its
+    authorized HTTP session and bucket handles, so credentials, discovery and the HTTP
+    pool are set up only once.
+    """
+
+    def __init__(self, root: str, *, dedup: DedupIndex | None = None, limits: Limits = Limits(),
+                 client: Any = None, http: Any = None) -> None:
+        self.root = root
+        self.dedup = dedup
+        self.limits = limits
+        if client is None:
+            http = http if http is not None else make_http(limits)
+            client = make_client(limits, http)
+        self.client = client
+        self.http = http
+        self._buckets: dict[str, Any] = {}
+
+    def bucket(self, root: str) -> Any:
+        name = _parse_root(root)[0]
+        b = self._buckets.get(name)
+        if b is None:
+            b = self._buckets[name] = self.client.bucket(name)
+        return b
+
+    def save_bytes(self, *, content: bytes, url: str, canonical_type: str,
+                   root: str | None = None) -> str:
+        root = root or self.root
+        return save_bytes(content=content, url=url, canonical_type=canonical_type, root=root,
+                          dedup=self.dedup, client=self.client, bucket=self.bucket(root))
+
+    async def save_stream(self, *, chunks: AsyncIterator[bytes], url: str, canonical_type: str,
+                          root: str | None = None, size_hint: int | None = None,
+                          run: Callable[..., Awaitable[Any]] = _to_thread) -> str:
+        root = root or self.root
+        if self.http is None:  # a client was given without its session
+            self.http = await run(make_http, self.limits)
+        return await save_stream(chunks=chunks, url=url, canonical_type=canonical_type,
+                                 root=root, size_hint=size_hint, dedup=self.dedup, run=run,
+                                 part_size=self.limits.multipart_chunk_size,
+                                 client=self.client, bucket=self.bucket(root), http=self.http)
+
+    def pull_manifest(self, dedup: DedupIndex) -> int:
+        return pull_manifest(self.root, dedup, client=self.client)
+
+    def push_manifest(self, dedup: DedupIndex) -> str:
+        return push_manifest(self.root, dedup, client=self.client)
@@ -1,9 +1,23 @@
 from __future__ import annotations
-import io, hashlib, tempfile
-from typing import AsyncIterator
+import asyncio, hashlib, uuid
+from collections import deque
+from functools import partial
+from typing import Any, AsyncIterator, Awaitable, Callable
 from yarl import URL
 
+from ..config import Limits
+from .dedup_index import DedupIndex, MANIFEST_NAME
+
 _EXT = { "html": ".html", "pdf": ".pdf", "docx": ".docx", "pptx": ".pptx" }
+_MIN_PART = 5 * 1024 * 1024  # S3 rejects smaller multipart parts (except the last)
+
+def _mime(canonical_type: str) -> str:
+    return {
+        "html":"text/html; charset=utf-8",
+        "pdf":"application/pdf",
+        "docx":"application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        "pptx":"application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    }.get(canonical_type, "application/octet-stream")
 
 def _parse_root(root: str) -> tuple[str,str]:
     u = URL(root)
@@ -23,38 +37,188 @@ def _key(prefix: str, url: str, sha: str, canonical_type: str) -> str:
     key = "/".join([p for p in [prefix.rstrip('/'), host, sub] if p])
     return f"{key}/{sha[:16]}{ext}" if key else f"{sha[:16]}{ext}"
 
-def save_bytes(*, content: bytes, url: str, canonical_type: str, root: str) -> str:
+def _copy_known(client: Any, dedup: DedupIndex | None, sha: str, bucket: str, key: str) -> bool:
+    """Server-side copy of an already uploaded blob with the same sha instead of a PUT."""
+    if dedup is None:
+        return False
+    known = dedup.lookup(sha, "s3")
+    if known is None:
+        return False
+    if known == f"s3://{bucket}/{key}":
+        return True
+    src_bucket, src_key = _parse_root(known)
+    try:
+        client.copy_object(Bucket=bucket, Key=key,
+                           CopySource={"Bucket": src_bucket, "Key": src_key})
+    except Exception:
+        dedup.forget(sha)
+        return False
+    return True
+
+def make_client(limits: Limits = Limits()) -> Any:
+    """One boto3 client per crawl: its pool is sized for every worker saving at once."""
     import boto3  # lazy
+    from botocore.config import Config
+    size = max(10, limits.max_concurrency_total)
+    return boto3.client("s3", config=Config(max_pool_connections=size))
+
+def save_bytes(*, content: bytes, url: str, canonical_type: str, root: str,
+               dedup: DedupIndex | None = None, client: Any = None) -> str:
     bucket, prefix = _parse_root(root)
     sha = hashlib.sha256(content).hexdigest()
     key = _key(prefix, url, sha, canonical_type)
-    mime = {
-        "html":"text/html; charset=utf-8",
-        "pdf":"application/pdf",
-        "docx":"application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        "pptx":"application/vnd.openxmlformats-officedocument.presentationml.presentation",
-    }.get(canonical_type, "application/octet-stream")
-    boto3.client("s3").put_object(Bucket=bucket, Key=key, Body=content, ContentType=mime)
+    client = client if client is not None else make_client()
+    if _copy_known(client, dedup, sha, bucket, key):
+        return f"s3://{bucket}/{key}"
+    mime = _mime(canonical_type)
+    client.put_object(Bucket=bucket, Key=key, Body=content, ContentType=mime)
+    if dedup is not None:
+        dedup.record(sha, f"s3://{bucket}/{key}", len(content))
     return f"s3://{bucket}/{key}"
 
+async def _to_thread(fn: Callable[..., Any], *args: Any) -> Any:
+    return await asyncio.to_thread(fn, *args)
+
+def _staging_key(prefix: str) -> str:
+    return "/".join(p for p in [prefix.rstrip("/"), "_staging", uuid.uuid4().hex] if p)
+
+def _promote(client: Any, bucket: str, staging: str, key: str) -> None:
+    # managed copy: switches to UploadPartCopy for objects over the 5 GB CopyObject limit
+    client.copy({"Bucket": bucket, "Key": staging}, bucket, key)
+
 async def save_stream(*, chunks: AsyncIterator[bytes], url: str, canonical_type: str, root: str,
-                      size_hint: int | None = None) -> str:
-    import boto3
+                      size_hint: int | None = None, dedup: DedupIndex | None = None,
+                      run: Callable[..., Awaitable[Any]] = _to_thread,
+                      part_size: int = Limits.multipart_chunk_size,
+                      parallelism: int = Limits.multipart_parallelism, client: Any = None
+                      ) -> str:
+    """
+    Upload parts while the download is still arriving. Every ``part_size`` bytes (at
+    least S3's 5 MB minimum) become a multipart part, with up to ``parallelism`` in flight,
+    and the sha256 is computed on the fly. The content-addressed key is only known at the
+    end, so the upload goes to a staging key that is then server-side copied into place.
+    A body smaller than one part is a single PUT to its final key.
+    """
     bucket, prefix = _parse_root(root)
+    client = client if client is not None else make_client()
+    mime = _mime(canonical_type)
+    part_size = max(_MIN_PART, part_size)
     h = hashlib.sha256()
-    tmp = tempfile.SpooledTemporaryFile(max_size=64*1024*1024)  # spill to disk if big
+    buf = bytearray()
     total = 0
-    async for ch in chunks:
-        tmp.write(ch); h.update(ch); total += len(ch)
-    tmp.seek(0)
-    sha = h.hexdigest()
-    key = _key(prefix, url, sha, canonical_type)
-    mime = {
-        "html":"text/html; charset=utf-8",
-        "pdf":"application/pdf",
-        "docx":"application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        "pptx":"application/vnd.openxmlformats-officedocument.presentationml.presentation",
-    }.get(canonical_type, "application/octet-stream")
-    boto3.client("s3").upload_fileobj(tmp, bucket, key, ExtraArgs={"ContentType": mime})
-    tmp.close()
+    staging = _staging_key(prefix)
+    upload_id = None
+    parts: list[dict[str, Any]] = []
+    inflight: deque[asyncio.Future[dict[str, Any]]] = deque()
+
+    async def upload(number: int, data: bytes) -> dict[str, Any]:
+        r = await run(partial(client.upload_part, Bucket=bucket, Key=staging, UploadId=upload_id,
+                              PartNumber=number, Body=data))
+        return {"PartNumber": number, "ETag": r["ETag"]}
+
+    async def spawn(data: bytes) -> None:
+        nonlocal upload_id
+        if upload_id is None:
+            r = await run(partial(client.create_multipart_upload, Bucket=bucket, Key=staging,
+                                  ContentType=mime))
+            upload_id = r["UploadId"]
+        while len(inflight) >= max(1, parallelism):
+            parts.append(await inflight.popleft())
+        inflight.append(asyncio.ensure_future(upload(len(parts) + len(inflight) + 1, data)))
+
+    try:
+        async for ch in chunks:
+            h.update(ch)
+            total += len(ch)
+            buf += ch
+            while len(buf) >= part_size:
+                await spawn(bytes(buf[:part_size]))
+                del buf[:part_size]
+        sha = h.hexdigest()
+        key = _key(prefix, url, sha, canonical_type)
+        if upload_id is None:
+            if not await run(_copy_known, client, dedup, sha, bucket, key):
+                await run(partial(client.put_object, Bucket=bucket, Key=key, Body=bytes(buf),
+                                  ContentType=mime))
+                if dedup is not None:
+                    dedup.record(sha, f"s3://{bucket}/{key}", total)
+            return f"s3://{bucket}/{key}"
+        if buf:
+            await spawn(bytes(buf))
+        while inflight:
+            parts.append(await inflight.popleft())
+        await run(partial(client.complete_multipart_upload, Bucket=bucket, Key=staging,
+                          UploadId=upload_id, MultipartUpload={"Parts": parts}))
+        upload_id = None
+    except BaseException:
+        # parts already running in writer threads cannot be cancelled: let them land
+        # before the abort, or they would outlive it and keep their storage
+        await asyncio.shield(asyncio.gather(*inflight, return_exceptions=True))
+        if upload_id is not None:
+            await asyncio.shield(run(partial(client.abort_multipart_upload, Bucket=bucket,
+                                             Key=staging, UploadId=upload_id)))
+        raise
+    try:
+        if not await run(_copy_known, client, dedup, sha, bucket, key):
+            await run(_promote, client, bucket, staging, key)
+            if dedup is not None:
+                dedup.record(sha, f"s3://{bucket}/{key}", total)
+    finally:
+        await asyncio.shield(run(partial(client.delete_object, Bucket=bucket, Key=staging)))
+    return f"s3://{bucket}/{key}"
+
+def _manifest_key(prefix: str) -> str:
+    return "/".join(p for p in [prefix.rstrip("/"), MANIFEST_NAME] if p)
+
+def pull_manifest(root: str, dedup: DedupIndex, client: Any = None) -> int:
+    """Merge the bucket's shared dedup manifest (if any) into the local index."""
+    bucket, prefix = _parse_root(root)
+    client = client if client is not None else make_client()
+    try:
+        body = client.get_object(Bucket=bucket, Key=_manifest_key(prefix))["Body"].read()
+    except Exception:
+        return 0
+    return dedup.merge_manifest(body)
+
+def push_manifest(root: str, dedup: DedupIndex, client: Any = None) -> str:
+    bucket, prefix = _parse_root(root)
+    key = _manifest_key(prefix)
+    client = client if client is not None else make_client()
+    client.put_object(Bucket=bucket, Key=key, Body=dedup.to_manifest(),
+                      ContentType="application/x-ndjson")
     return f"s3://{bucket}/{key}"
+
+class S3Storage:
+    """
+    ``Storage`` for one ``s3://bucket/prefix`` root, owning a long-lived boto3 client.
+
+    boto3 clients are thread-safe, so every storage writer thread shares this one client
+    and its connection pool, and credentials and the endpoint are resolved only once.
+    """
+
+    def __init__(self, root: str, *, dedup: DedupIndex | None = None, limits: Limits = Limits(),
+                 client: Any = None) -> None:
+        self.root = root
+        self.dedup = dedup
+        self.limits = limits
+        self.client = client if client is not None else make_client(limits)
+
+    def save_bytes(self, *, content: bytes, url: str, canonical_type: str,
+                   root: str | None = None) -> str:
+        return save_bytes(content=content, url=url, canonical_type=canonical_type,
+                          root=root or self.root, dedup=self.dedup, client=self.client)
+
+    async def save_stream(self, *, chunks: AsyncIterator[bytes], url: str, canonical_type: str,
+                          root: str | None = None, size_hint: int | None = None,
+                          run: Callable[..., Awaitable[Any]] = _to_thread) -> str:
+        return await save_stream(chunks=chunks, url=url, canonical_type=canonical_type,
+                                 root=root or self.root, size_hint=size_hint, dedup=self.dedup,
+                                 run=run, part_size=self.limits.multipart_chunk_size,
+                                 parallelism=self.limits.multipart_parallelism,
+                                 client=self.client)
+
+    def pull_manifest(self, dedup: DedupIndex) -> int:
+        return pull_manifest(self.root, dedup, client=self.client)
+
+    def push_manifest(self, dedup: DedupIndex) -> str:
+        return push_manifest(self.root, dedup, client=self.client)
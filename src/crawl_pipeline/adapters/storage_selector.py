@@ -1,29 +1,39 @@
 from __future__ import annotations
 from yarl import URL
-from typing import Callable
+from ..config import Limits
 from ..ports.storage import Storage
-from . import storage_fs
+from .storage_fs import FsStorage, GroupCommit
+from .dedup_index import DedupIndex
 
-class _FsStorage:
-    save_bytes = staticmethod(storage_fs.save_bytes)
-    save_stream = staticmethod(storage_fs.save_stream)
-
-def get_storage(storage_root: str) -> Storage:
+def _scheme(storage_root: str) -> str:
     try:
-        u = URL(storage_root)
-        scheme = (u.scheme or "").lower()
+        return (URL(storage_root).scheme or "").lower()
     except Exception:
-        scheme = ""
+        return ""
+
+def get_storage(storage_root: str, dedup: DedupIndex | None = None,
+                group_commit: bool = False, limits: Limits = Limits()) -> Storage:
+    """
+    A stateful backend for ``storage_root``; keep it for the whole crawl. Cloud backends
+    own one client whose connection pool is sized from ``limits.max_concurrency_total``
+    and stream in ``limits.multipart_chunk_size`` parts; ``group_commit`` batches the
+    filesystem backend's fsyncs (storage_fs.GroupCommit).
+    """
+    scheme = _scheme(storage_root)
     if scheme in {"s3", "s3a", "s3n"}:
-        from . import storage_s3
-        class _S3:  # minimal adapter object matching Storage Protocol via staticmethods
-            save_bytes = staticmethod(lambda **kw: storage_s3.save_bytes(root=storage_root, **kw))
-            save_stream = staticmethod(lambda **kw: storage_s3.save_stream(root=storage_root, **kw))
-        return _S3()  # type: ignore[return-value]
+        from .storage_s3 import S3Storage
+        return S3Storage(storage_root, dedup=dedup, limits=limits)
     if scheme in {"gs", "gcs"}:
-        from . import storage_gcs
-        class _GCS:
-            save_bytes = staticmethod(lambda **kw: storage_gcs.save_bytes(root=storage_root, **kw))
-            save_stream = staticmethod(lambda **kw: storage_gcs.save_stream(root=storage_root, **kw))
-        return _GCS()  # type: ignore[return-value]
-    return _FsStorage()  # type: ignore[return-value]
+        from .storage_gcs import GCSStorage
+        return GCSStorage(storage_root, dedup=dedup, limits=limits)
+    group = GroupCommit(storage_root) if group_commit else None
+    return FsStorage(storage_root, dedup=dedup, group=group)
+
+def pull_dedup_manifest(storage: Storage, dedup: DedupIndex) -> int:
+    """Seed ``dedup`` from the manifest kept in the bucket; local roots have none."""
+    pull = getattr(storage, "pull_manifest", None)
+    return pull(dedup) if pull is not None else 0
+
+def push_dedup_manifest(storage: Storage, dedup: DedupIndex) -> str | None:
+    push = getattr(storage, "push_manifest", None)
+    return push(dedup) if push is not None else None
@@ -1,15 +1,57 @@
 import asyncio, random
+from typing import Awaitable, Callable, Optional, TypeVar
 
-async def async_retry(fn, *, attempts: int, base: float, max_s: float, jitter: float):
-    last_exc = None
+from .politeness import HostScheduler, parse_retry_after
+from .telemetry import note_retry
+
+# 4xx other than these mean the request itself is wrong; retrying won't help
+RETRYABLE_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+T = TypeVar("T")
+
+def _status_of(exc: BaseException) -> tuple[Optional[int], Optional[float]]:
+    status = getattr(exc, "status", None)
+    if status is None:
+        # connection errors wrap the OSError that caused them (e.g. ssrf.SsrfBlocked)
+        status = getattr(getattr(exc, "os_error", None), "status", None)
+    headers = getattr(exc, "headers", None)
+    retry_after = parse_retry_after(headers.get("Retry-After")) if headers else None
+    return (status if isinstance(status, int) else None), retry_after
+
+async def async_retry(fn: Callable[[], Awaitable[T]], *, attempts: int, base: float,
+                      max_s: float, jitter: float, scheduler: Optional[HostScheduler] = None,
+                      host: str = "") -> T:
+    """
+    Call ``fn`` up to ``attempts`` times with exponential backoff and jitter.
+
+    With a ``scheduler`` (politeness.HostScheduler) every attempt first takes a token from
+    ``host``'s budget, outcomes are fed back into its rate, and backoff/``Retry-After``
+    waits are charged to the host instead of slept here, so all requests to it slow down.
+    """
+    last_exc: Optional[Exception] = None
     for i in range(attempts):
+        if scheduler is not None:
+            await scheduler.acquire(host)
         try:
-            return await fn()
+            result = await fn()
         except Exception as e:
             last_exc = e
-            if i == attempts - 1:
+            status, retry_after = _status_of(e)
+            if scheduler is not None:
+                scheduler.feedback(host, status, retry_after)
+            if i == attempts - 1 or (status is not None and status not in RETRYABLE_STATUSES):
                 break
+            note_retry()
             # exponential backoff with jitter
             delay = min(max_s, base * (2 ** i)) + random.random() * jitter
-            await asyncio.sleep(delay)
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+            if scheduler is not None:
+                scheduler.penalize(host, delay)
+            else:
+                await asyncio.sleep(delay)
+        else:
+            if scheduler is not None:
+                scheduler.feedback(host, 200)
+            return result
     raise last_exc  # type: ignore[misc]
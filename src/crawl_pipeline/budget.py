@@ -0,0 +1,102 @@
+from __future__ import annotations
+import threading
+from typing import AsyncIterator, Optional
+
+import aiohttp
+
+from .config import Limits
+from .politeness import host_of
+from .telemetry import Metrics
+
+CHUNK_BYTES = 64 * 1024
+
+
+class BudgetExceeded(Exception):
+    """A response was refused or cut off because it would break a byte budget."""
+
+    status = 413  # a client-side refusal: async_retry gives up instead of retrying
+
+    def __init__(self, url: str, reason: str) -> None:
+        super().__init__(f"{reason}: {url}")
+        self.url = url
+        self.reason = reason
+
+
+class ByteBudget:
+    """
+    Byte accounting for one crawl: at most ``max_item`` bytes per response and
+    ``max_total`` bytes downloaded overall, shared by every worker.
+
+    ``admit`` refuses a response up front from its Content-Length; ``meter`` wraps a
+    chunk stream and aborts it as soon as either cap is crossed, so nothing larger than
+    a chunk is ever held on behalf of the budget. Bytes that were transferred stay
+    charged even when the item is aborted. With ``metrics`` (telemetry.Metrics) every
+    charge is also counted per host in ``crawl_bytes_total``.
+    """
+
+    def __init__(self, max_total: int, max_item: int, metrics: Optional[Metrics] = None
+                 ) -> None:
+        self.max_total = max_total
+        self.max_item = max_item
+        self.metrics = metrics
+        self._used = 0
+        self._lock = threading.Lock()  # storage writers may charge from threads
+
+    @classmethod
+    def from_limits(cls, limits: Limits, metrics: Optional[Metrics] = None) -> "ByteBudget":
+        return cls(limits.max_total_bytes, limits.max_item_bytes, metrics)
+
+    @property
+    def used(self) -> int:
+        return self._used
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.max_total - self._used)
+
+    @property
+    def exhausted(self) -> bool:
+        return self._used >= self.max_total
+
+    def admit(self, url: str, content_length: Optional[int]) -> None:
+        if content_length is None:
+            return
+        if content_length > self.max_item:
+            raise BudgetExceeded(url, f"{content_length} bytes exceeds the per-item cap "
+                                      f"of {self.max_item}")
+        if content_length > self.remaining:
+            raise BudgetExceeded(url, f"{content_length} bytes exceeds the remaining crawl "
+                                      f"budget of {self.remaining}")
+
+    def charge(self, url: str, n: int) -> None:
+        with self._lock:
+            if self.metrics is not None:
+                self.metrics.inc("crawl_bytes_total", n, host=host_of(url))
+            if self._used + n > self.max_total:
+                self._used = self.max_total
+                raise BudgetExceeded(url, f"crawl byte budget of {self.max_total} spent")
+            self._used += n
+
+    async def meter(self, url: str, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        seen = 0
+        try:
+            async for chunk in chunks:
+                seen += len(chunk)
+                if seen > self.max_item:
+                    raise BudgetExceeded(url,
+                                         f"response passed the per-item cap of {self.max_item}")
+                self.charge(url, len(chunk))
+                yield chunk
+        finally:
+            # release the response now rather than whenever the generator is collected
+            aclose = getattr(chunks, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    async def read(self, url: str, resp: aiohttp.ClientResponse) -> bytes:
+        """Whole body of ``resp`` (for pages, which are parsed in memory), within budget."""
+        self.admit(url, resp.content_length)
+        body = bytearray()
+        async for chunk in self.meter(url, resp.content.iter_chunked(CHUNK_BYTES)):
+            body += chunk
+        return bytes(body)
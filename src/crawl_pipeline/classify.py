@@ -3,6 +3,7 @@ from yarl import URL
 
 _CANON = {
     "text/html": "html",
+    "application/xhtml+xml": "html",
     "application/pdf": "pdf",
     "application/vnd.openxmlformats-officedocument.wordprocessingml.document": "docx",
     "application/msword": "docx",
@@ -16,6 +17,27 @@ _EXTS = {
     ".pptx": "pptx", ".ppt": "pptx",
 }
 
+# never crawl targets: skip them from the URL alone, before any request
+_ASSET_EXTS = (
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".svg", ".ico", ".bmp", ".tif", ".tiff",
+    ".css", ".js", ".mjs", ".json", ".xml", ".rss", ".atom",
+    ".woff", ".woff2", ".ttf", ".otf", ".eot",
+    ".mp3", ".mp4", ".m4a", ".webm", ".avi", ".mov", ".wav", ".ogg",
+    ".zip", ".gz", ".tgz", ".bz2", ".rar", ".7z", ".exe", ".dmg", ".iso",
+)
+
+def is_asset(url: str) -> bool:
+    try:
+        path = URL(url).path.lower()
+    except Exception:
+        path = url.lower()
+    return path.endswith(_ASSET_EXTS)
+
+def header_type(header_ct: Optional[str]) -> Optional[str]:
+    if not header_ct:
+        return None
+    return _CANON.get(header_ct.split(";")[0].strip().lower())
+
 def canonical_type(header_ct: Optional[str], url: str) -> Optional[str]:
     if header_ct and header_ct.split(";")[0].strip().lower() in _CANON:
         return _CANON[header_ct.split(";")[0].strip().lower()]
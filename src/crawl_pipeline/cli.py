@@ -1,10 +1,26 @@
 import argparse, asyncio
-from crawl_pipeline.models import CrawlRequest
+from contextlib import aclosing
+from typing import Any
+from crawl_pipeline.models import CrawlRequest, SavedItem
 from crawl_pipeline.adapters.simple_html_fetcher import SimpleHtmlFetcher
 from crawl_pipeline.adapters.links_basic import extract as extract_links
-from crawl_pipeline.adapters.storage_selector import get_storage
-from crawl_pipeline.pipeline.crawl import run_crawl
-from crawl_pipeline.config import Limits
+from crawl_pipeline.adapters.links_fast import FastLinkExtractor
+from crawl_pipeline.adapters import aiohttp_binary
+from crawl_pipeline.adapters.dedup_index import DedupIndex
+from crawl_pipeline.adapters.storage_exec import StorageWriter
+from crawl_pipeline.adapters.storage_selector import (
+    get_storage, pull_dedup_manifest, push_dedup_manifest,
+)
+from crawl_pipeline.pipeline.crawl import iter_crawl, run_crawl
+from crawl_pipeline.pipeline.journal import CrawlJournal
+from crawl_pipeline.pipeline.shard import run_sharded
+from crawl_pipeline.revalidation import ValidatorCache
+from crawl_pipeline.config import (
+    FrontierPolicy, Limits, NearDupPolicy, RobotsPolicy, ScopePolicy,
+)
+from crawl_pipeline import logging as crawl_log
+from crawl_pipeline.manifest import ManifestWriter
+from crawl_pipeline.telemetry import Metrics
 
 
 class BasicLinkExtractor:
@@ -17,16 +33,14 @@ async def fetch_and_save_html(url: str, html: bytes, storage, storage_root: str)
     if not html:
         return None
 
-    # Save using storage_fs.save_bytes API
-    saved_path = storage.save_bytes(
+    # Save through the StorageWriter so the write runs off the event loop
+    saved_path = await storage.save_bytes(
         content=html,
         url=url,
         canonical_type="html",
         root=storage_root
     )
 
-    print(f"✅ Saved {url} -> {saved_path}")
-
     return {
         "url": url,
         "status": 200,
@@ -34,11 +48,27 @@ async def fetch_and_save_html(url: str, html: bytes, storage, storage_root: str)
         "path": saved_path,
     }
 
-
-
-
-
-
+def print_item(r: SavedItem) -> None:
+    print(r.status, r.content_type, r.url, "->", r.path, flush=True)
+
+
+async def sharded_crawl(req: CrawlRequest, **extra: Any) -> list[SavedItem]:
+    """One shard of ``--shards``: the plain crawl, wired up again in a worker process."""
+    storage = StorageWriter.from_limits(get_storage(req.storage_root, limits=req.limits),
+                                        req.limits)
+    try:
+        return await run_crawl(
+            req,
+            html_fetcher=SimpleHtmlFetcher(),
+            fetch_and_save_html=lambda u, h: fetch_and_save_html(u, h, storage, req.storage_root),
+            link_extractor=FastLinkExtractor(),
+            limits=req.limits,
+            binary_fetcher=aiohttp_binary,
+            storage=storage,
+            **extra,
+        )
+    finally:
+        storage.close()
 
 
 def main():
@@ -47,32 +77,130 @@ def main():
     ap.add_argument("--depth", type=int, default=1)
     ap.add_argument("--max-files", type=int, default=100)
     ap.add_argument("--storage-root", default="./downloads", help="fs path or s3:// or gs://")
+    ap.add_argument("--journal", default=None,
+                    help="sqlite checkpoint file; an interrupted crawl resumes from it")
+    ap.add_argument("--validator-cache", default=None,
+                    help="sqlite ETag/Last-Modified cache; recrawls skip unchanged pages")
+    ap.add_argument("--dedup-index", default=None,
+                    help="sqlite sha256 index; known blobs are linked/copied instead of rewritten")
+    ap.add_argument("--dedup-manifest", action="store_true",
+                    help="also sync the dedup index with a manifest in the bucket")
+    ap.add_argument("--group-commit", action="store_true",
+                    help="batch fsyncs of local writes (faster, same durability on return)")
+    ap.add_argument("--include", action="append", default=[],
+                    help="only follow URLs matching this glob (or re:<regex>); repeatable")
+    ap.add_argument("--exclude", action="append", default=[],
+                    help="never follow URLs matching this glob (or re:<regex>); repeatable")
+    ap.add_argument("--allow-private-networks", action="store_true",
+                    help="let the crawl reach loopback/private/link-local addresses")
+    ap.add_argument("--ignore-robots", action="store_true", help="do not obey robots.txt")
+    ap.add_argument("--sitemaps", action="store_true",
+                    help="seed the crawl with every page in the site's sitemaps")
+    ap.add_argument("--log-file", default=None,
+                    help="append JSONL progress events here instead of stdout")
+    ap.add_argument("--metrics-file", default=None,
+                    help="write crawl metrics here in Prometheus text format at the end")
+    ap.add_argument("--manifest", default=None,
+                    help="append saved items to this manifest (.jsonl, .jsonl.gz or .jsonl.zst)")
+    ap.add_argument("--best-first", action="store_true",
+                    help="fetch the most promising URLs first (documents, --prefer) instead of BFS")
+    ap.add_argument("--prefer", action="append", default=[],
+                    help="best-first: rank URLs matching this glob (or re:<regex>) higher; "
+                         "repeatable")
+    ap.add_argument("--avoid", action="append", default=[],
+                    help="best-first: rank URLs matching this glob (or re:<regex>) lower; "
+                         "repeatable")
+    ap.add_argument("--max-per-host", type=int, default=0,
+                    help="queue at most this many URLs per host (0: no limit)")
+    ap.add_argument("--near-dups", action="store_true",
+                    help="skip pages nearly identical to one already crawled, and demote "
+                         "URL patterns that keep producing them")
+    ap.add_argument("--shards", type=int, default=1,
+                    help="crawl with this many processes, each owning a share of the hosts")
+    ap.add_argument("--shard-store", default=None,
+                    help="sqlite file the shards coordinate through (temporary by default)")
     args = ap.parse_args()
+    if args.shards > 1 and (args.journal or args.validator_cache or args.dedup_index
+                            or args.metrics_file):
+        ap.error("--shards does not combine with --journal, --validator-cache, "
+                 "--dedup-index or --metrics-file")
 # Creates a CrawlRequest with limits.
     req = CrawlRequest(
         url=args.url,
         depth=args.depth,
-        limits=Limits(max_files=args.max_files),
+        limits=Limits(max_files=args.max_files,
+                      block_private_networks=not args.allow_private_networks),
         storage_root=args.storage_root,
+        scope=ScopePolicy(include=tuple(args.include), exclude=tuple(args.exclude)),
+        robots=RobotsPolicy(obey=not args.ignore_robots, sitemaps=args.sitemaps),
+        frontier=FrontierPolicy(
+            order="best_first" if args.best_first else "bfs",
+            patterns=tuple([(p, 5.0) for p in args.prefer] + [(p, -5.0) for p in args.avoid]),
+            max_per_host=args.max_per_host),
+        near_dups=NearDupPolicy(enabled=args.near_dups),
     )
 
-    storage = get_storage(req.storage_root)
-    link_extractor = BasicLinkExtractor()
+    if args.log_file:
+        crawl_log.configure(path=args.log_file)
+    if args.shards > 1:
+        results = run_sharded(req, sharded_crawl, shards=args.shards,
+                              store_path=args.shard_store, log_path=args.log_file)
+        for r in results:
+            print_item(r)
+        if args.manifest:
+            with ManifestWriter(args.manifest) as writer:
+                writer.write_many(results)
+        return
+    metrics = Metrics()
+    dedup = DedupIndex(args.dedup_index) if args.dedup_index else None
+    backend = get_storage(req.storage_root, dedup=dedup, group_commit=args.group_commit,
+                          limits=req.limits)
+    if dedup is not None and args.dedup_manifest:
+        pull_dedup_manifest(backend, dedup)
+    storage = StorageWriter.from_limits(backend, req.limits)
+    link_extractor = FastLinkExtractor()
     html_fetcher = SimpleHtmlFetcher()
 
-    results = asyncio.run(
-    run_crawl(
-        req,
-        html_fetcher=html_fetcher,
-        fetch_and_save_html=lambda u, h: fetch_and_save_html(u, h, storage, req.storage_root),
-        link_extractor=link_extractor,
-        limits=req.limits,
-    )
-)
-
-
-    for r in results:
-        print(r["status"], r["content_type"], r["url"], "->", r["path"])
+    journal = CrawlJournal(args.journal) if args.journal else None
+    validators = ValidatorCache(args.validator_cache) if args.validator_cache else None
+    manifest = ManifestWriter(args.manifest) if args.manifest else None
+
+    # items are printed as they are stored, not when the crawl ends
+    async def crawl() -> None:
+        items = iter_crawl(
+            req,
+            html_fetcher=html_fetcher,
+            fetch_and_save_html=lambda u, h: fetch_and_save_html(u, h, storage, req.storage_root),
+            link_extractor=link_extractor,
+            limits=req.limits,
+            binary_fetcher=aiohttp_binary,
+            storage=storage,
+            journal=journal,
+            validators=validators,
+            metrics=metrics,
+        )
+        async with aclosing(items):
+            async for r in items:
+                print_item(r)
+                if manifest is not None:
+                    manifest.write(r)
+
+    try:
+        asyncio.run(crawl())
+    finally:
+        storage.close()
+        if manifest is not None:
+            manifest.close()
+        if args.metrics_file:
+            metrics.write_prometheus(args.metrics_file)
+        if journal is not None:
+            journal.close()
+        if validators is not None:
+            validators.close()
+        if dedup is not None:
+            if args.dedup_manifest:
+                push_dedup_manifest(backend, dedup)
+            dedup.close()
 
 
 if __name__ == "__main__":
@@ -1,5 +1,7 @@
 from dataclasses import dataclass
 
+from .url_utils import TRACKING_PARAMS
+
 @dataclass(frozen=True)
 class Timeouts:
     connect_s: float = 10.0
@@ -22,5 +24,75 @@ class Limits:
     max_concurrency_total: int = 16
     max_concurrency_html: int = 8
     max_concurrency_bin: int = 8
+    max_connections_per_host: int = 4
+    dns_cache_ttl_s: int = 300
+    keepalive_s: float = 30.0
     multipart_threshold: int = 8 * 1024 * 1024  # 8 MB
     multipart_chunk_size: int = 4 * 1024 * 1024 # 4 MB
+    multipart_parallelism: int = 4              # ranged parts in flight per file
+    extract_offload_bytes: int = 512 * 1024     # larger pages are parsed in a process pool
+    browser_contexts: int = 2                   # JS-rendering fallback: pooled Chromium
+    browser_pages_per_context: int = 2
+    browser_recycle_after: int = 50             # navigations before a page is replaced
+    storage_workers: int = 8                    # threads doing blocking storage I/O
+    storage_max_pending: int = 32               # saves admitted before fetchers wait
+    block_private_networks: bool = False        # SSRF guard: refuse hosts on url_utils.PRIVATE_NETS
+
+@dataclass(frozen=True)
+class Politeness:
+    host_rate_per_s: float = 4.0      # starting requests/s per host
+    host_burst: int = 8
+    min_rate_per_s: float = 0.05
+    max_rate_per_s: float = 16.0
+    slowdown_factor: float = 0.5      # multiplicative decrease on 429/503
+    ramp_after: int = 20              # consecutive successes before speeding up
+    ramp_step_per_s: float = 0.5      # additive increase
+
+@dataclass(frozen=True)
+class SeenPolicy:
+    mode: str = "exact"               # exact | fingerprint | bloom | disk
+    capacity: int = 1_000_000         # bloom: URLs per filter before the next is chained
+    fp_rate: float = 1e-6             # bloom: overall false-positive bound
+    spill_after: int = 1_000_000      # disk: fingerprints held in memory between spills
+    spill_path: str | None = None     # disk: sqlite file (a temp file when None)
+    strip_params: tuple[str, ...] = TRACKING_PARAMS  # query params dropped when canonicalizing
+
+@dataclass(frozen=True)
+class ScopePolicy:
+    hosts: tuple[str, ...] = ()            # extra hosts; "*.example.com" also allows subdomains
+    path_prefixes: tuple[str, ...] = ()    # extra path prefixes allowed besides the seed's
+    include: tuple[str, ...] = ()          # URL globs (or "re:<regex>"); when set, one must match
+    exclude: tuple[str, ...] = ()          # URL globs (or "re:<regex>") never crawled
+    max_depth: tuple[tuple[str, int], ...] = ()  # (path prefix, depth); longest prefix wins
+
+@dataclass(frozen=True)
+class RobotsPolicy:
+    obey: bool = False                # fetch robots.txt per host and skip disallowed URLs
+    user_agent: str = "crawl-pipeline"  # the group of robots.txt rules that applies to us
+    ttl_s: float = 24 * 3600.0        # robots.txt is refetched after this long
+    sitemaps: bool = False            # seed the frontier from the seed host's sitemaps
+    sitemap_urls: tuple[str, ...] = ()  # extra sitemaps (otherwise robots.txt, then /sitemap.xml)
+    max_sitemap_urls: int = 100_000   # URLs taken from sitemaps per crawl
+
+@dataclass(frozen=True)
+class FrontierPolicy:
+    order: str = "bfs"                # bfs | best_first (highest score first, pipeline.priority)
+    depth_weight: float = 1.0         # best_first: score lost per level below the seed
+    patterns: tuple[tuple[str, float], ...] = ()      # (URL glob or "re:<regex>", score), summed
+    anchor_terms: tuple[tuple[str, float], ...] = ()  # (word in the link text, score), summed
+    type_weights: tuple[tuple[str, float], ...] = (("pdf", 3.0), ("docx", 3.0), ("pptx", 3.0))
+    host_fairness: float = 0.0        # score lost per URL already queued from the same host
+    max_per_depth: tuple[tuple[int, int], ...] = ()   # (depth, URLs queued there at most)
+    max_per_host: int = 0             # URLs queued per host; 0 for no limit
+    spill_after: int = 0              # queued items held in memory before spilling; 0 for never
+    spill_path: str | None = None     # spill: sqlite file (a temp file when None)
+
+@dataclass(frozen=True)
+class NearDupPolicy:
+    enabled: bool = False             # fingerprint fetched pages (SimHash, pipeline.neardup)
+    max_distance: int = 3             # differing fingerprint bits (of 64) still a near-duplicate
+    shingle: int = 3                  # words per shingle
+    min_words: int = 50               # pages with fewer words are never called duplicates
+    demote_after: int = 3             # near-duplicates from one URL shape before it is learned
+    demote_ratio: float = 0.5         # ... and the share of that shape's pages they must be
+    demote_score: float = 10.0        # rank penalty for queued URLs of a learned shape
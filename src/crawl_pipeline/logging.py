@@ -1,8 +1,91 @@
-import json, sys, time
-from typing import Any, Mapping
+import atexit, json, sys, threading, time
+from collections import deque
+from typing import IO, Any, Optional
+
+
+class JsonlEmitter:
+    """
+    Non-blocking JSONL sink. ``emit`` only appends to an in-memory buffer; a daemon thread
+    serializes and writes the buffer in batches every ``flush_interval_s``, with one flush
+    per batch instead of one per record. If the writer falls ``max_buffer`` records behind,
+    the oldest are dropped and counted in ``dropped`` rather than stalling the crawl.
+    Records go to ``path`` (appended), else ``stream``, else whatever ``sys.stdout`` is.
+    """
+
+    def __init__(self, path: Optional[str] = None, stream: Optional[IO[str]] = None,
+                 flush_interval_s: float = 0.5, max_buffer: int = 100_000) -> None:
+        self._buf: deque[dict[str, Any]] = deque()
+        self.max_buffer = max_buffer
+        self.flush_interval_s = flush_interval_s
+        self.dropped = 0
+        self._file = open(path, "a", encoding="utf-8") if path else None
+        self._stream = stream
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="jsonl-emitter", daemon=True)
+        self._thread.start()
+
+    def emit(self, rec: dict[str, Any]) -> None:
+        if len(self._buf) >= self.max_buffer:
+            self._buf.popleft()
+            self.dropped += 1
+        self._buf.append(rec)
+
+    def flush(self) -> None:
+        with self._lock:
+            batch = []
+            while self._buf:
+                batch.append(self._buf.popleft())
+            if not batch:
+                return
+            out = self._file or self._stream or sys.stdout
+            try:
+                out.write("".join(json.dumps(r, default=str) + "\n" for r in batch))
+                out.flush()
+            except (OSError, ValueError):
+                pass  # a closed or broken sink must not take the crawl down
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_interval_s)
+            self.flush()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+
+
+_emitter: Optional[JsonlEmitter] = None
+
+
+def configure(path: Optional[str] = None, stream: Optional[IO[str]] = None,
+              **kwargs: Any) -> JsonlEmitter:
+    """Send ``log`` records to ``path`` or ``stream`` (stdout by default) from now on."""
+    global _emitter
+    if _emitter is not None:
+        _emitter.close()
+    _emitter = JsonlEmitter(path=path, stream=stream, **kwargs)
+    return _emitter
+
+
+def emitter() -> JsonlEmitter:
+    return _emitter if _emitter is not None else configure()
+
 
 def log(event: str, **fields: Any) -> None:
     rec: dict[str, Any] = {"event": event, "ts": time.time()}
     rec.update(fields)
-    sys.stdout.write(json.dumps(rec) + "\n")
-    sys.stdout.flush()
+    emitter().emit(rec)
+
+
+@atexit.register
+def _close() -> None:
+    if _emitter is not None:
+        _emitter.close()
@@ -0,0 +1,114 @@
+from __future__ import annotations
+import gzip, io, json
+from dataclasses import fields
+from typing import IO, Any, Iterable, Iterator, Optional
+from urllib.parse import urlsplit
+
+from .models import SavedItem
+
+FIELDS = tuple(f.name for f in fields(SavedItem))
+VERSION = 1
+
+
+def _codec(path: str) -> str:
+    if path.endswith(".zst"):
+        return "zstd"
+    if path.endswith(".gz"):
+        return "gzip"
+    return "plain"
+
+
+class ManifestWriter:
+    """
+    Append-only manifest of saved items: JSON lines, each row an array in the order of
+    the ``fields`` header line a writer starts with, so keys are not repeated per row.
+    Rows are buffered and written ``batch`` at a time as one compressed block (a zstd
+    frame for ``.zst``, a gzip member for ``.gz``, plain text otherwise); concatenated
+    blocks read back as one stream, so reopening a manifest appends to it. ``.zst``
+    needs the ``zstandard`` package.
+    """
+
+    def __init__(self, path: str, batch: int = 1000, level: int = 3) -> None:
+        self.path = path
+        self.batch = batch
+        self.codec = _codec(path)
+        if self.codec == "zstd":
+            import zstandard  # lazy: only .zst manifests need it
+            self._zstd = zstandard.ZstdCompressor(level=level)
+        self._level = level
+        self._rows: list[str] = [json.dumps({"manifest": VERSION, "fields": FIELDS})]
+        self._f = open(path, "ab")
+        self.written = 0
+
+    def __enter__(self) -> "ManifestWriter":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def write(self, item: SavedItem) -> None:
+        self._rows.append(json.dumps([getattr(item, f) for f in FIELDS],
+                                     separators=(",", ":"), ensure_ascii=False))
+        self.written += 1
+        if len(self._rows) >= self.batch:
+            self.flush()
+
+    def write_many(self, items: Iterable[SavedItem]) -> None:
+        for item in items:
+            self.write(item)
+
+    def flush(self) -> None:
+        if not self._rows:
+            return
+        data = ("\n".join(self._rows) + "\n").encode("utf-8")
+        self._rows = []
+        if self.codec == "zstd":
+            data = self._zstd.compress(data)
+        elif self.codec == "gzip":
+            data = gzip.compress(data, compresslevel=min(9, max(1, self._level)))
+        self._f.write(data)
+        self._f.flush()
+
+    def close(self) -> None:
+        if self._f.closed:
+            return
+        self.flush()
+        self._f.close()
+
+
+def _lines(path: str) -> IO[str]:
+    codec = _codec(path)
+    if codec == "gzip":
+        return gzip.open(path, "rt", encoding="utf-8")
+    if codec == "zstd":
+        import zstandard
+        raw = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"),
+                                                         read_across_frames=True,
+                                                         closefd=True)
+        return io.TextIOWrapper(raw, encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def read_manifest(path: str, *, host: Optional[str] = None,
+                  type: Optional[str] = None) -> Iterator[SavedItem]:
+    """
+    Stream the items of a manifest, optionally only those of ``host`` and/or canonical
+    ``type``. Rows are decoded one at a time, and rows that cannot match (a substring
+    test on the raw line) are skipped without being parsed.
+    """
+    host = host.lower() if host else None
+    needles = [n for n in (host, f'"{type}"' if type else None) if n]
+    with _lines(path) as lines:
+        names = FIELDS
+        for line in lines:
+            if line.startswith("{"):
+                names = tuple(json.loads(line)["fields"])
+                continue
+            if not line.strip() or any(n not in line for n in needles):
+                continue
+            item = SavedItem.from_record(dict(zip(names, json.loads(line))))
+            if type is not None and item.type != type:
+                continue
+            if host is not None and (urlsplit(item.url).hostname or "") != host:
+                continue
+            yield item
@@ -1,7 +1,8 @@
-from dataclasses import dataclass, field
-from typing import Sequence, Optional, Literal, Any
+from dataclasses import dataclass, field, fields
+from typing import Sequence, Optional, Any, Mapping
 
-from .config import Timeouts, RetryPolicy, Limits
+from .config import (Timeouts, RetryPolicy, Limits, Politeness, SeenPolicy, ScopePolicy,
+                     RobotsPolicy, FrontierPolicy, NearDupPolicy)
 
 DEFAULT_TYPES = ("html", "pdf", "docx", "pptx")
 
@@ -17,13 +18,33 @@ class CrawlRequest:
     timeouts: Timeouts = field(default_factory=Timeouts)
     retry: RetryPolicy = field(default_factory=RetryPolicy)
     limits: Limits = field(default_factory=Limits)
+    politeness: Politeness = field(default_factory=Politeness)
+    seen: SeenPolicy = field(default_factory=SeenPolicy)
+    scope: ScopePolicy = field(default_factory=ScopePolicy)
+    robots: RobotsPolicy = field(default_factory=RobotsPolicy)
+    frontier: FrontierPolicy = field(default_factory=FrontierPolicy)
+    near_dups: NearDupPolicy = field(default_factory=NearDupPolicy)
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SavedItem:
+    """One stored item as run_crawl reports it; a row of the manifest (manifest.py)."""
     url: str
-    path: str
-    content_type: str
-    size: int
-    sha256: str
-    status: Literal["success", "skipped", "failed"] = "success"
-    meta: dict[str, Any] = field(default_factory=dict)
+    path: Optional[str]
+    type: Optional[str] = None          # canonical type (classify), e.g. "html", "pdf"
+    content_type: Optional[str] = None
+    size: int = 0
+    sha256: Optional[str] = None
+    status: int = 200
+    parent: Optional[str] = None
+    depth: int = 0
+    fetched_at: float = 0.0             # epoch seconds when processing of the URL began
+    elapsed_ms: float = 0.0             # from then until the item was stored
+
+    @classmethod
+    def from_record(cls, record: Mapping[str, Any]) -> "SavedItem":
+        """From a dict: a journal or shard-store record, or a fetch_and_save_html result."""
+        known = {k: v for k, v in record.items() if k in _SAVED_FIELDS}
+        return cls(**{"path": None, **known})
+
+
+_SAVED_FIELDS = frozenset(f.name for f in fields(SavedItem))
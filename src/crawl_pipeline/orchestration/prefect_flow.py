@@ -1,35 +1,114 @@
 import asyncio
+from contextlib import aclosing
+from dataclasses import replace
+from typing import Any
 from prefect import flow, task
-from ..models import CrawlRequest
-from ..adapters.crawl4ai_html import fetch_html as html_fetcher
-from ..adapters.aiohttp_binary import fetch_binary as binary_fetcher
-from ..adapters.links_basic import extract as link_extractor
+from ..models import CrawlRequest, SavedItem
+from ..adapters import aiohttp_binary
+from ..adapters.browser_pool import BrowserPool
+from ..adapters.crawl4ai_html import PooledHtmlFetcher
+from ..adapters.links_fast import FastLinkExtractor
+from ..adapters.storage_exec import StorageWriter
 from ..adapters.storage_selector import get_storage
-from ..pipeline.crawl import run_crawl
+from ..manifest import ManifestWriter
+from ..pipeline.crawl import iter_crawl, run_crawl
+from ..pipeline.journal import CrawlJournal, default_journal_path
+from ..pipeline.shard import SqliteShardStore, crawl_shard
+from ..revalidation import ValidatorCache, default_cache_path
 
 @task
-async def _run(req: CrawlRequest, storage_root: str):
-    storage = get_storage(storage_root)
-    return await run_crawl(req, html_fetcher=html_fetcher, binary_fetcher=binary_fetcher,
-                           link_extractor=link_extractor, storage=storage, transformer=None)
+async def _run(req: CrawlRequest, storage_root: str, journal_path: str, validator_cache_path: str,
+               manifest_path: str | None = None) -> list[SavedItem]:
+    storage = StorageWriter.from_limits(get_storage(storage_root, limits=req.limits), req.limits)
+
+    async def fetch_and_save_html(url: str, html: bytes) -> dict[str, Any] | None:
+        if not html:
+            return None
+        path = await storage.save_bytes(content=html, url=url, canonical_type="html",
+                                        root=storage_root)
+        return {"url": url, "status": 200, "content_type": "text/html", "path": path}
+
+    # one Chromium for the whole flow run: rendering and the no-links fallback share it
+    try:
+        async with BrowserPool.from_limits(req.limits) as browser:
+            with (CrawlJournal(journal_path) as journal,
+                  ValidatorCache(validator_cache_path) as validators):
+                items = iter_crawl(req, html_fetcher=PooledHtmlFetcher(browser),
+                                   fetch_and_save_html=fetch_and_save_html,
+                                   link_extractor=FastLinkExtractor(), limits=req.limits,
+                                   binary_fetcher=aiohttp_binary, storage=storage,
+                                   journal=journal, validators=validators,
+                                   browser_pool=browser)
+                saved = []
+                manifest = ManifestWriter(manifest_path) if manifest_path else None
+                try:
+                    async with aclosing(items):
+                        async for item in items:  # consumed as stored
+                            saved.append(item)
+                            if manifest is not None:
+                                manifest.write(item)
+                finally:
+                    if manifest is not None:
+                        manifest.close()
+                return saved
+    finally:
+        storage.close()
 
 @flow(name="crawl-medium-flow")
-def crawl_medium(url: str, depth: int = 2, max_files: int = 500, storage_root: str = "./downloads"):
-    req = CrawlRequest(url=url, depth=depth)
+def crawl_medium(url: str, depth: int = 2, max_files: int = 500, storage_root: str = "./downloads",
+                 journal_path: str | None = None, validator_cache_path: str | None = None,
+                 manifest_path: str | None = None) -> list[SavedItem]:
+    req = CrawlRequest(url=url, depth=depth, storage_root=storage_root)
     # override limits in a pure way (new dataclass)
-    from ..config import Limits
-    req = CrawlRequest(url=req.url, depth=req.depth, file_types=req.file_types, storage_root=req.storage_root,
-                       same_domain_only=req.same_domain_only, under_path_only=req.under_path_only,
-                       transform=req.transform, timeouts=req.timeouts, retry=req.retry,
-                       limits=Limits(max_files=max_files, max_pages=req.limits.max_pages,
-                                     max_total_bytes=req.limits.max_total_bytes,
-                                     max_item_bytes=req.limits.max_item_bytes,
-                                     max_concurrency_total=req.limits.max_concurrency_total,
-                                     max_concurrency_html=req.limits.max_concurrency_html,
-                                     max_concurrency_bin=req.limits.max_concurrency_bin,
-                                     multipart_threshold=req.limits.multipart_threshold,
-                                     multipart_chunk_size=req.limits.multipart_chunk_size))
-    return asyncio.run(_run.fn(req, storage_root))
+    req = replace(req, limits=replace(req.limits, max_files=max_files))
+    # a flow retry lands on the same journal and resumes instead of refetching
+    journal_path = journal_path or default_journal_path(url, storage_root)
+    # scheduled recrawls revalidate against what the previous run stored
+    validator_cache_path = validator_cache_path or default_cache_path(storage_root)
+    return asyncio.run(_run.fn(req, storage_root, journal_path, validator_cache_path,
+                               manifest_path))
+
+async def _shard_crawl(req: CrawlRequest, **extra: Any) -> list[SavedItem]:
+    storage = StorageWriter.from_limits(get_storage(req.storage_root, limits=req.limits),
+                                        req.limits)
+
+    async def fetch_and_save_html(url: str, html: bytes) -> dict[str, Any] | None:
+        if not html:
+            return None
+        path = await storage.save_bytes(content=html, url=url, canonical_type="html",
+                                        root=req.storage_root)
+        return {"url": url, "status": 200, "content_type": "text/html", "path": path}
+
+    try:
+        async with BrowserPool.from_limits(req.limits) as browser:
+            return await run_crawl(req, html_fetcher=PooledHtmlFetcher(browser),
+                                   fetch_and_save_html=fetch_and_save_html,
+                                   link_extractor=FastLinkExtractor(), limits=req.limits,
+                                   binary_fetcher=aiohttp_binary, storage=storage,
+                                   browser_pool=browser, **extra)
+    finally:
+        storage.close()
+
+@task
+def _shard(req: CrawlRequest, store_path: str, shard: int, shards: int) -> int:
+    return crawl_shard(_shard_crawl, req, store_path, shard, shards)
+
+@flow(name="crawl-sharded-flow")
+def crawl_sharded(url: str, shards: int, store_path: str, depth: int = 2, max_files: int = 500,
+                  storage_root: str = "./downloads") -> list[SavedItem]:
+    """
+    One crawl split by host hash over ``shards`` Prefect tasks (pipeline.shard). Run it on a
+    process- or cluster-backed task runner (prefect-dask, prefect-ray) to use more than one
+    core; ``store_path`` must be a path every worker node sees. Limits apply per shard.
+    """
+    req = CrawlRequest(url=url, depth=depth, storage_root=storage_root)
+    req = replace(req, limits=replace(req.limits, max_files=max_files))
+    SqliteShardStore.create(store_path, shards).close()
+    futures = [_shard.submit(req, store_path, k, shards) for k in range(shards)]
+    for f in futures:
+        f.result()
+    with SqliteShardStore(store_path) as store:
+        return store.manifest()
 
 if __name__ == "__main__":
     import argparse
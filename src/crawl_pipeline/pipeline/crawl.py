@@ -1,98 +1,575 @@
-import asyncio
+import asyncio, hashlib, multiprocessing as mp, os, time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import aclosing
+from functools import partial
+from dataclasses import dataclass, field
+from typing import (
+    Any, AsyncGenerator, AsyncIterator, Awaitable, Callable, Optional, TypeVar,
+)
 from urllib.parse import urljoin
 
-async def crawl(
-    url: str,
-    depth: int,
-    max_depth: int,
-    saved: list,
-    limits,
-    html_fetcher,
-    fetch_and_save_html,
-    link_extractor,
-    req,
-    visited: set
-):
+import aiohttp
+
+from ..adapters.browser_pool import BrowserPool
+from ..adapters.storage_exec import StorageWriter
+from ..budget import BudgetExceeded, ByteBudget
+from ..config import Limits
+from ..classify import canonical_type
+from ..logging import log
+from ..models import CrawlRequest, SavedItem
+from ..politeness import HostScheduler, host_of
+from ..ports.link_extractor import LinkExtractor
+from ..revalidation import NotModified, ValidatorCache
+from ..robots import RobotsCache
+from ..session import open_session
+from ..sitemaps import iter_sitemap
+from ..ssrf import SsrfGuard
+from ..telemetry import Metrics, current, tracing
+from ..url_utils import canonicalize
+from .frontier import Frontier, FrontierItem
+from .journal import CrawlJournal
+from .neardup import NearDuplicates
+from .priority import Priority, SpillHeap
+from .scope import Scope
+from .seen import make_seen
+from .shard import ShardLink
+from .routing import BINARY, DROP, HTML, response_type, route_for, route_url, sniff
+
+T = TypeVar("T")
+
+
+class _ExtractPool:
+    """Process pool for CPU-bound work on large pages (links, fingerprints), started on use."""
+
+    def __init__(self, offload_bytes: int, pool: Optional[Executor] = None) -> None:
+        self.offload_bytes = offload_bytes
+        self._pool = pool
+        self._owned = pool is None
+
+    async def run(self, fn: Callable[..., T], size: int, *args: Any) -> T:
+        """``fn(*args)`` for a ``size``-byte page, in the pool when large; ``fn`` must pickle."""
+        if size < self.offload_bytes:
+            return fn(*args)
+        if self._pool is None:
+            # not fork: this process already runs the log emitter and storage threads
+            self._pool = ProcessPoolExecutor(max_workers=min(4, os.cpu_count() or 1),
+                                             mp_context=mp.get_context("spawn"))
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, fn, *args)
+
+    def shutdown(self) -> None:
+        if self._owned and self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+@dataclass
+class _Crawl:
+    """Everything the workers of one crawl share."""
+    request: Any
+    limits: Any
+    html_fetcher: Any
+    fetch_and_save_html: Any
+    link_extractor: Any
+    frontier: Frontier
+    scheduler: HostScheduler
+    extractor: _ExtractPool
+    html_slots: asyncio.Semaphore
+    bin_slots: asyncio.Semaphore
+    budget: ByteBudget
+    browser: BrowserPool
+    binary_fetcher: Any = None
+    storage: Any = None
+    journal: Any = None
+    validators: Any = None
+    session: Any = None
+    guard: Optional[SsrfGuard] = None
+    robots: Optional[RobotsCache] = None
+    shard: Optional[ShardLink] = None
+    near_dups: Optional[NearDuplicates] = None
+    metrics: Metrics = field(default_factory=Metrics)
+    on_saved: Any = None
+    saved: list[SavedItem] = field(default_factory=list)
+    saved_count: int = 0
+
+    async def store(self, item: SavedItem) -> None:
+        url = item.url
+        self.saved_count += 1
+        if self.saved_count <= self.limits.max_files:
+            if self.on_saved is not None:
+                await self.on_saved(item)
+            else:
+                self.saved.append(item)
+        if self.journal is not None:
+            self.journal.saved(url, item)
+        if self.shard is not None:
+            self.shard.saved(url, item)
+        self.record(url, "saved", path=item.path)
+
+    def record(self, url: str, outcome: str, **fields: Any) -> None:
+        """Count an item's outcome per host and log it."""
+        self.metrics.inc("crawl_items_total", host=host_of(url), outcome=outcome)
+        log(outcome, url=url, **fields)
+
+    def body_done(self) -> None:
+        trace = current()
+        if trace is not None and trace.headers_at is not None:
+            self.metrics.stage("body", time.perf_counter() - trace.headers_at)
+
+
+def _saved(item: FrontierItem, path: Optional[str], typ: Optional[str],
+           content_type: Optional[str], size: int, sha256: Optional[str], status: int = 200
+           ) -> SavedItem:
+    trace = current()
+    elapsed = time.perf_counter() - trace.started if trace is not None else 0.0
+    return SavedItem(url=item.url, path=path, type=typ, content_type=content_type, size=size,
+                     sha256=sha256, status=status, parent=item.parent, depth=item.depth,
+                     fetched_at=round(time.time() - elapsed, 3),
+                     elapsed_ms=round(elapsed * 1e3, 1))
+
+
+class _Digest:
+    """sha256 and size of a stream, taken as it passes through ``over``."""
+    __slots__ = ("_h", "size")
+
+    def __init__(self) -> None:
+        self._h = hashlib.sha256()
+        self.size = 0
+
+    async def over(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        async for chunk in chunks:
+            self._h.update(chunk)
+            self.size += len(chunk)
+            yield chunk
+
+    def hexdigest(self) -> str:
+        return self._h.hexdigest()
+
+
+async def _extract_links(url: str, html: bytes, c: _Crawl
+                         ) -> tuple[list[str], Optional[list[Optional[str]]]]:
+    """The page's links, and their anchor texts when the frontier's priority scores them."""
+    anchored = (c.frontier.priority.uses_anchors
+                and hasattr(c.link_extractor, "extract_anchors"))
+    extract = c.link_extractor.extract_anchors if anchored else c.link_extractor.extract
+    try:
+        links = await c.extractor.run(extract, len(html), url, html)
+        if not links:
+            log("links_fallback", url=url, fetcher=c.html_fetcher.__class__.__name__)
+            from crawl_pipeline.ports.playwright_fetcher import PlaywrightHtmlFetcher
+            await c.scheduler.acquire(host_of(url))
+            alt_fetcher = PlaywrightHtmlFetcher(c.browser)
+            _, html = await alt_fetcher.fetch_html(url, timeouts=c.request.timeouts)
+            links = await c.extractor.run(extract, len(html), url, html)
+    except Exception as e:
+        log("extract_failed", url=url, error=str(e))
+        links = []
+    if anchored:
+        return [u for u, _ in links], [text for _, text in links]
+    return links, None
+
+
+async def process(item: FrontierItem, c: _Crawl) -> None:
     """
-    Crawl a URL up to a given depth, saving HTML and following links.
+    Route one frontier item before any body is downloaded: by extension first, then by
+    a HEAD/first-bytes sniff when the URL alone is ambiguous.
     """
+    if c.guard is not None:
+        await c.guard.check(item.url)
+    if c.robots is not None and c.request.robots.obey:
+        rules = await c.robots.get(item.url, session=c.session, scheduler=c.scheduler)
+        if not rules.allowed(item.url):
+            c.record(item.url, "skipped", reason="robots")
+            return
+    file_types = c.request.file_types
+    route = route_url(item.url, file_types)
+    typ: Optional[str] = canonical_type(None, item.url)
+    if route is None:
+        typ = await sniff(item.url, session=c.session, timeouts=c.request.timeouts,
+                          scheduler=c.scheduler)
+        route = route_for(typ, file_types)
+    if route == HTML:
+        await crawl(item, c)
+    elif route == BINARY and typ is not None:
+        await crawl_binary(item, typ, c)
+    else:
+        c.record(item.url, "skipped", reason="type", type=typ)
 
-    # avoid revisiting same URL
-    if url in visited:
-        return
-    visited.add(url)
 
-    # stop if we've hit max file limit
-    if len(saved) >= limits.max_files:
+async def crawl_binary(item: FrontierItem, typ: str, c: _Crawl) -> None:
+    """Stream one document from the binary fetcher straight into storage."""
+    url = item.url
+    if c.binary_fetcher is None or c.storage is None:
+        c.record(url, "skipped", reason="no binary fetcher/storage")
+        return
+    log("download", url=url, type=typ, depth=item.depth)
+    req = c.request
+    try:
+        async with c.bin_slots:
+            ct, chunks, clen = await c.binary_fetcher.fetch_binary(
+                url, timeouts=req.timeouts, retry=req.retry, limits=c.limits, session=c.session,
+                scheduler=c.scheduler, validators=c.validators, budget=c.budget)
+            digest = _Digest()
+            path = await c.storage.save_stream(chunks=digest.over(chunks), url=url,
+                                               canonical_type=typ, root=req.storage_root,
+                                               size_hint=clen)
+            c.body_done()  # streamed: the body stage includes the overlapping writes
+    except NotModified:
+        c.record(url, "not_modified")
         return
+    except BudgetExceeded as e:
+        if c.validators is not None:
+            c.validators.forget(url)
+        c.record(url, "over_budget", reason=e.reason)
+        return
+    except Exception as e:
+        if c.validators is not None:
+            c.validators.forget(url)
+        c.record(url, "failed", error=str(e))
+        return
+    sha256 = digest.hexdigest()
+    await c.store(_saved(item, path, typ, ct, digest.size, sha256))
+    if c.validators is not None:
+        c.validators.commit(url, sha256=sha256, path=path)
+
 
-    print(f"📌 Crawling: {url} (depth={depth})")
+async def crawl(item: FrontierItem, c: _Crawl) -> None:
+    """
+    Fetch and save one HTML frontier item, then queue its links one level deeper.
+    """
+    url = item.url
+    req = c.request
+    log("crawl", url=url, depth=item.depth)
 
     # 1) fetch HTML (content + save)
     try:
-        ct, html = await html_fetcher.fetch_html(url, timeouts=req.timeouts, retry=req.retry)
+        async with c.html_slots:
+            ct, html = await c.html_fetcher.fetch_html(url, timeouts=req.timeouts, retry=req.retry,
+                                                       session=c.session, scheduler=c.scheduler,
+                                                       validators=c.validators, budget=c.budget)
+        c.body_done()
+    except NotModified as nm:
+        # unchanged since the last crawl: nothing to store, but its links still count
+        c.record(url, "not_modified")
+        if item.depth < req.depth:
+            _enqueue(item, list(nm.cached.outlinks), c)
+        return
+    except BudgetExceeded as e:
+        if c.validators is not None:
+            c.validators.forget(url)
+        c.record(url, "over_budget", reason=e.reason)
+        return
     except Exception as e:
-        print(f"❌ Failed to fetch {url}: {e}")
+        if c.validators is not None:
+            c.validators.forget(url)
+        c.record(url, "failed", error=str(e))
         return
 
-    root_item = await fetch_and_save_html(url, html)
-    if root_item:
-        saved.append(root_item)
+    body = html.encode("utf-8") if isinstance(html, str) else html
+    sha256 = hashlib.sha256(body).hexdigest()
 
-    if depth >= max_depth:
+    # the URL looked like a page but the server says otherwise
+    typ = response_type(ct, url)
+    if typ != "html":
+        if c.validators is not None:
+            c.validators.forget(url)
+        if typ is not None and typ in req.file_types and c.storage is not None:
+            with c.metrics.time("store"):
+                path = await c.storage.save_bytes(content=html, url=url, canonical_type=typ,
+                                                  root=req.storage_root)
+            await c.store(_saved(item, path, typ, ct, len(body), sha256))
+        else:
+            c.record(url, "skipped", reason="type", content_type=ct)
         return
 
+    # a near-duplicate of a page already crawled: neither stored nor followed
+    if c.near_dups is not None:
+        with c.metrics.time("fingerprint"):
+            fp = await c.extractor.run(c.near_dups.fingerprint, len(body), body)
+        original = c.near_dups.check(url, fp)
+        if original is not None:
+            if c.validators is not None:
+                c.validators.forget(url)
+            c.record(url, "near_duplicate", of=original)
+            return
 
-    try:
-        links = link_extractor.extract(url, html)
-        if not links:
-            print(f"⚠️ No links found with {html_fetcher.__class__.__name__}, retrying with Playwright...")
-            from crawl_pipeline.ports.playwright_fetcher import PlaywrightHtmlFetcher
-            alt_fetcher = PlaywrightHtmlFetcher()
-            _, html = await alt_fetcher.fetch_html(url)
-            links = link_extractor.extract(url, html)
-    except Exception as e:
-        print(f"⚠️ Failed to extract links from {url}: {e}")
-        links = []
+    path = None
+    if "html" in req.file_types:
+        with c.metrics.time("store"):
+            root_item = await c.fetch_and_save_html(url, html)
+        if root_item:
+            meta = root_item if isinstance(root_item, dict) else {}
+            path = meta.get("path")
+            await c.store(_saved(item, path, "html", meta.get("content_type", ct), len(body),
+                                 sha256, meta.get("status", 200)))
+
+    outlinks: list[str] = []
+    # the validator cache keeps a page's links even at the depth limit: a later, deeper
+    # crawl that finds it unchanged follows them from the cache
+    if item.depth < req.depth or c.validators is not None:
+        # 2) extract links
+        with c.metrics.time("extract"):
+            links, anchors = await _extract_links(url, html, c)
+
+        # 3) normalize & enqueue
+        outlinks = [urljoin(url, link) for link in links]
+        if item.depth < req.depth:
+            _enqueue(item, outlinks, c, anchors)
+
+    if c.validators is not None:
+        c.validators.commit(url, sha256=sha256, path=path, outlinks=outlinks)
 
-    print(f"🔗 Extracted {len(links)} links from {url}")
 
+def _enqueue(item: FrontierItem, urls: list[str], c: _Crawl,
+             anchors: Optional[list[Optional[str]]] = None) -> None:
+    _enqueue_urls(urls, item.depth + 1, item.url, c, anchors)
 
-    # 3) normalize & recurse
-    for link in links:
-        full_url = urljoin(url, link)  # resolve relative links
-        await crawl(
-            full_url,
-            depth + 1,
-            max_depth,
-            saved,
-            limits,
-            html_fetcher,
-            fetch_and_save_html,
-            link_extractor,
-            req,
-            visited,
-        )
 
+def _enqueue_urls(urls: list[str], depth: int, parent: Optional[str], c: _Crawl,
+                  anchors: Optional[list[Optional[str]]] = None) -> int:
+    file_types = c.request.file_types
+    if anchors is None:
+        wanted, texts = [u for u in urls if route_url(u, file_types) != DROP], None
+    else:
+        kept = [(u, t) for u, t in zip(urls, anchors) if route_url(u, file_types) != DROP]
+        wanted, texts = [u for u, _ in kept], [t for _, t in kept]
+    queued = c.frontier.push_many(wanted, depth, parent=parent, anchors=texts)
+    if c.journal is not None and queued:
+        c.journal.enqueued([(u, depth, parent) for u in queued])
+    return len(queued)
 
-async def run_crawl(request, html_fetcher, fetch_and_save_html, link_extractor, limits):
+
+async def seed_from_sitemaps(c: _Crawl, seed: str, batch: int = 1_000) -> int:
+    """
+    Queue the pages listed in the seed host's sitemaps at depth 1, in batches through the
+    scope filter: the whole site without crawling navigation pages to find it. Sitemaps
+    come from ``request.robots.sitemap_urls``, else robots.txt, else ``/sitemap.xml``.
+    """
+    policy = c.request.robots
+    sources = list(policy.sitemap_urls)
+    if not sources and c.robots is not None:
+        rules = await c.robots.get(seed, session=c.session, scheduler=c.scheduler)
+        sources = rules.sitemaps
+    sources = sources or [urljoin(seed, "/sitemap.xml")]
+    taken = queued = 0
+    for source in sources:
+        if taken >= policy.max_sitemap_urls:
+            break
+        urls = iter_sitemap(source, session=c.session, timeouts=c.request.timeouts,
+                            budget=c.budget, scheduler=c.scheduler,
+                            max_urls=policy.max_sitemap_urls - taken)
+        pending: list[str] = []
+        async with aclosing(urls):
+            async for url in urls:
+                pending.append(url)
+                if len(pending) >= batch:
+                    queued += _enqueue_urls(pending, 1, source, c)
+                    taken += len(pending)
+                    pending = []
+        queued += _enqueue_urls(pending, 1, source, c)
+        taken += len(pending)
+    log("sitemaps_seeded", queued=queued, listed=taken)
+    c.metrics.inc("crawl_sitemap_urls_total", queued)
+    return queued
+
+
+async def run_crawl(request: CrawlRequest, html_fetcher: Any,
+                    fetch_and_save_html: Callable[[str, bytes], Awaitable[Any]],
+                    link_extractor: LinkExtractor, limits: Limits,
+                    session: Optional[aiohttp.ClientSession] = None,
+                    scheduler: Optional[HostScheduler] = None,
+                    journal: Optional[CrawlJournal] = None,
+                    validators: Optional[ValidatorCache] = None,
+                    extract_pool: Optional[Executor] = None, binary_fetcher: Any = None,
+                    storage: Any = None, budget: Optional[ByteBudget] = None,
+                    browser_pool: Optional[BrowserPool] = None,
+                    ssrf_guard: Optional[SsrfGuard] = None, robots: Optional[RobotsCache] = None,
+                    metrics: Optional[Metrics] = None, shard: Optional[ShardLink] = None,
+                    on_saved: Optional[Callable[[SavedItem], Awaitable[Any]]] = None
+                    ) -> list[SavedItem]:
     """
-    Entry point for crawl pipeline.
+    Entry point for crawl pipeline: crawls ``request`` from its seed and returns the saved
+    items (models.SavedItem). Use ``iter_crawl``, or pass ``on_saved`` (an async callable
+    given each item as it is stored; the list then comes back empty), to stream them.
+
+    The crawl ends when the frontier is exhausted or a limit of ``limits`` is reached;
+    in-flight work is cancelled on the way out. Collaborators not passed in (session,
+    scheduler, budget, extract and browser pools, SSRF guard, robots cache, metrics) are
+    created for the crawl and closed with it. ``journal``, ``validators`` and ``shard``
+    turn on resuming, conditional recrawls and sharding.
     """
-    saved = []
-    visited = set()
-
-    
-    await crawl(
-        request.url,
-        depth=0,
-        max_depth=request.depth,
-        saved=saved,
-        limits=limits,
-        html_fetcher=html_fetcher,
-        fetch_and_save_html=fetch_and_save_html,
-        link_extractor=link_extractor,
-        req=request,
-        visited=visited,
+    if shard is not None and journal is not None:
+        raise ValueError("a sharded crawl keeps its state in the shard store, not a journal")
+    metrics = metrics if metrics is not None else Metrics()
+    near_dups = NearDuplicates(request.near_dups) if request.near_dups.enabled else None
+    c = _Crawl(
+        request=request, limits=limits, html_fetcher=html_fetcher,
+        fetch_and_save_html=fetch_and_save_html, link_extractor=link_extractor,
+        frontier=Frontier(make_seen(request.seen),
+                          partial(canonicalize, strip_params=request.seen.strip_params),
+                          priority=Priority.from_policy(
+                              request.frontier, [near_dups] if near_dups is not None else ()),
+                          queue=SpillHeap(request.frontier.spill_after,
+                                          request.frontier.spill_path)),
+        scheduler=scheduler if scheduler is not None else HostScheduler(request.politeness),
+        extractor=_ExtractPool(limits.extract_offload_bytes, extract_pool),
+        html_slots=asyncio.Semaphore(max(1, limits.max_concurrency_html)),
+        bin_slots=asyncio.Semaphore(max(1, limits.max_concurrency_bin)),
+        budget=budget if budget is not None else ByteBudget.from_limits(limits, metrics),
+        browser=browser_pool if browser_pool is not None else BrowserPool.from_limits(limits),
+        binary_fetcher=binary_fetcher, journal=journal, validators=validators,
+        metrics=metrics, shard=shard, on_saved=on_saved, near_dups=near_dups,
+        guard=ssrf_guard if ssrf_guard is not None else (
+            SsrfGuard(ttl_s=limits.dns_cache_ttl_s) if limits.block_private_networks else None),
     )
-    return saved
+    if robots is None and (request.robots.obey or request.robots.sitemaps):
+        robots = RobotsCache(request.robots, request.timeouts)
+    c.robots = robots
+    c.frontier.scope = Scope.from_request(request, robots if request.robots.obey else None)
+    if shard is not None:
+        c.frontier.exchange = shard.exchange
+    own_writer = storage is not None and not isinstance(storage, StorageWriter)
+    c.storage = StorageWriter.from_limits(storage, limits) if own_writer else storage
+    frontier = c.frontier
+    pages = 0
+    if journal is not None and journal.is_complete():
+        journal.reset()
+    seeding = False
+    pending = journal.pending() if journal is not None else []
+    if journal is not None and (pending or journal.processed_count()):
+        resumed = [SavedItem.from_record(r) for r in journal.saved_items()]
+        pages = journal.processed_count()
+        frontier.restore(journal.seen(), pending)
+        log("resume", queued=len(pending), done=pages, saved=len(resumed))
+        for item in resumed[: limits.max_files]:
+            if on_saved is not None:
+                await on_saved(item)
+            else:
+                c.saved.append(item)
+        c.saved_count = len(resumed)
+    elif shard is None or shard.owns(request.url):
+        seed = frontier.push(request.url, 0)
+        if journal is not None and seed is not None:
+            journal.enqueued([(seed, 0, None)])
+        if request.robots.sitemaps:
+            seeding = True
+            frontier.hold()  # the crawl is not drained while sitemap URLs may still arrive
+    if shard is not None:
+        frontier.hold()  # released once no shard has work left
+    done = asyncio.Event()
+    if c.saved_count >= limits.max_files:
+        done.set()
+
+    async def worker() -> None:
+        nonlocal pages
+        while True:
+            item = await frontier.get()
+            c.metrics.set("crawl_frontier_queued", frontier.qsize())
+            if not done.is_set() and pages < limits.max_pages:
+                wait = c.scheduler.delay(host_of(item.url))
+                if wait > 0:
+                    frontier.defer(item, wait)
+                    continue
+            try:
+                if done.is_set() or pages >= limits.max_pages:
+                    continue
+                pages += 1
+                with tracing(item.url) as trace:
+                    try:
+                        await process(item, c)
+                    except Exception as e:
+                        c.record(item.url, "failed", error=str(e))
+                if trace.retries:
+                    c.metrics.inc("crawl_retries_total", trace.retries, host=host_of(item.url))
+                if journal is not None:
+                    journal.finished(item.url)
+                if c.saved_count >= limits.max_files or c.budget.exhausted:
+                    done.set()
+            finally:
+                frontier.task_done()
+
+    async def sitemaps() -> None:
+        try:
+            await seed_from_sitemaps(c, request.url)
+        except Exception as e:
+            log("sitemaps_failed", error=str(e))
+        finally:
+            frontier.task_done()
+
+    async def exchange(link: ShardLink) -> None:
+        try:
+            await link.pump(frontier)
+        except Exception as e:
+            log("shard_exchange_failed", shard=link.shard, error=str(e))
+        finally:
+            frontier.task_done()
+
+    async with open_session(limits, request.timeouts, session, c.guard, c.metrics) as shared:
+        c.session = shared
+        workers = [asyncio.create_task(worker())
+                   for _ in range(max(1, limits.max_concurrency_total))]
+        if seeding:
+            workers.append(asyncio.create_task(sitemaps()))
+        if shard is not None:
+            workers.append(asyncio.create_task(exchange(shard)))
+        drained = asyncio.create_task(frontier.join())
+        stopped = asyncio.create_task(done.wait())
+        try:
+            await asyncio.wait({drained, stopped}, return_when=asyncio.FIRST_COMPLETED)
+            if journal is not None:
+                journal.mark_complete()
+        finally:
+            frontier.close()
+            for t in (*workers, drained, stopped):
+                t.cancel()
+            await asyncio.gather(*workers, drained, stopped, return_exceptions=True)
+            c.extractor.shutdown()
+            if shard is not None:
+                shard.stop()
+            if browser_pool is None:
+                await c.browser.close()
+            c.metrics.set("crawl_pages", pages)
+            c.metrics.set("crawl_seen_urls", len(frontier.seen))
+            c.metrics.set("crawl_out_of_scope_links", frontier.out_of_scope)
+            c.metrics.set("crawl_over_quota_links", frontier.priority.over_quota)
+            c.metrics.set("crawl_frontier_spills", frontier.queue.spills)
+            if near_dups is not None:
+                c.metrics.set("crawl_near_dup_shapes", len(near_dups.learned))
+            c.metrics.set("crawl_budget_used_bytes", c.budget.used)
+            log("crawl_metrics", **c.metrics.snapshot())
+            frontier.seen.close()
+            frontier.queue.close()
+            if own_writer:
+                await asyncio.get_running_loop().run_in_executor(None, c.storage.close)
+    return c.saved
+
+
+async def iter_crawl(request: CrawlRequest, *, buffer: int = 64, **kwargs: Any
+                     ) -> AsyncGenerator[SavedItem, None]:
+    """
+    ``run_crawl`` as an async generator: yields every saved item as soon as it is stored.
+    At most ``buffer`` items wait for the consumer; past that, workers finishing an item
+    wait too, so a slow consumer slows the crawl instead of growing memory. Leaving the
+    loop early cancels the crawl; its exceptions are raised from the loop.
+    """
+    queue: asyncio.Queue[SavedItem] = asyncio.Queue(maxsize=max(1, buffer))
+    crawl_task = asyncio.create_task(run_crawl(request, on_saved=queue.put, **kwargs))
+    get: Optional[asyncio.Future[SavedItem]] = None
+    try:
+        while True:
+            get = asyncio.ensure_future(queue.get())
+            await asyncio.wait({get, crawl_task}, return_when=asyncio.FIRST_COMPLETED)
+            if get.done():
+                yield get.result()
+                continue
+            get.cancel()
+            while not queue.empty():
+                yield queue.get_nowait()
+            crawl_task.result()
+            return
+    finally:
+        # the consumer may be cancelled inside ``wait``, with ``get`` still pending
+        if get is not None:
+            get.cancel()
+        crawl_task.cancel()
+        await asyncio.gather(*(t for t in (get, crawl_task) if t is not None),
+                             return_exceptions=True)
@@ -0,0 +1,156 @@
+from __future__ import annotations
+import asyncio, itertools
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Optional
+
+from .priority import Priority, SpillHeap
+from .scope import Scope
+from .seen import ExactSeen, SeenSet
+
+
+@dataclass(frozen=True, order=True, slots=True)
+class FrontierItem:
+    depth: int
+    seq: int
+    url: str = field(compare=False)
+    parent: Optional[str] = field(default=None, compare=False)
+    rank: float = field(default=0.0, compare=False)
+
+
+class Frontier:
+    """
+    Crawl frontier: items come out best ``priority`` first (pipeline.priority.Priority;
+    by default breadth-first, ordered by (depth, discovery order)) and every URL is
+    queued at most once, as its ``canonical`` form, judged by a ``seen`` set
+    (pipeline.seen; exact strings by default). Links discovered on a page are queued
+    together with ``push_many``, which drops those outside ``scope``
+    (pipeline.scope.Scope) before they reach the seen set. With an ``exchange``
+    (pipeline.shard.ShardLink.exchange) the new ones are offered to it first, and only
+    those it hands back are queued here; the others belong to another shard. The
+    priority's quotas get the last word. Queued items live in ``queue``
+    (pipeline.priority.SpillHeap), which can keep most of a large frontier on disk.
+
+    An item taken with ``get`` is outstanding until ``task_done``; ``defer`` parks it
+    (still outstanding) and puts it back after a delay, so a host without politeness
+    budget steps aside instead of blocking a worker. ``join`` returns once nothing is
+    queued, deferred or in progress.
+    """
+
+    def __init__(self, seen: Optional[SeenSet] = None,
+                 canonical: Optional[Callable[[str], str]] = None,
+                 scope: Optional[Scope] = None,
+                 exchange: Optional[Callable[[list[str], int, Optional[str]], list[str]]] = None,
+                 priority: Optional[Priority] = None, queue: Optional[SpillHeap] = None
+                 ) -> None:
+        self.queue = queue if queue is not None else SpillHeap()
+        self._ready = asyncio.Event()
+        self._seq = itertools.count()
+        self._unfinished = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._timers: set[asyncio.TimerHandle] = set()
+        self.seen: SeenSet = seen if seen is not None else ExactSeen()
+        self._canonical = canonical
+        self.scope = scope if scope is not None else Scope()
+        self.out_of_scope = 0
+        self.exchange = exchange
+        self.priority = priority if priority is not None else Priority()
+
+    def _canon(self, url: str) -> Optional[str]:
+        if self._canonical is None:
+            return url
+        try:
+            return self._canonical(url)
+        except ValueError:
+            return None
+
+    def _put(self, url: str, depth: int, parent: Optional[str], anchor: Optional[str] = None
+             ) -> None:
+        self._unfinished += 1
+        self._idle.clear()
+        self.queue.push((self.priority.rank(url, depth, anchor), next(self._seq), url, depth,
+                         parent))
+        self._ready.set()
+
+    def push(self, url: str, depth: int, parent: Optional[str] = None) -> Optional[str]:
+        """Queue ``url`` (in scope or not: the seed); returns it as queued, or None."""
+        canonical = self._canon(url)
+        if (canonical is None or not self.seen.add(canonical)
+                or not self.priority.admit(canonical, depth)):
+            return None
+        self._put(canonical, depth, parent)
+        return canonical
+
+    def push_many(self, urls: Iterable[str], depth: int, parent: Optional[str] = None,
+                  anchors: Optional[Iterable[Optional[str]]] = None) -> list[str]:
+        """
+        Queue the in-scope, unseen ``urls`` found at ``depth``; returns those queued.
+        ``anchors`` (the links' texts, in the order of ``urls``) feed the priority.
+        """
+        texts: dict[str, str] = {}
+        canonical = []
+        for raw, text in zip(urls, anchors) if anchors is not None else ((u, None) for u in urls):
+            url = self._canon(raw)
+            if url is not None:
+                canonical.append(url)
+                if text:
+                    texts[url] = text
+        in_scope = self.scope.filter(canonical, depth)
+        self.out_of_scope += len(canonical) - len(in_scope)
+        queued = [url for url in in_scope if self.seen.add(url)]
+        if self.exchange is not None and queued:
+            queued = self.exchange(queued, depth, parent)
+        queued = [url for url in queued if self.priority.admit(url, depth)]
+        for url in queued:
+            self._put(url, depth, parent, texts.get(url))
+        return queued
+
+    def hold(self) -> None:
+        """Keep ``join`` waiting, e.g. while URLs are still being seeded; ``task_done`` releases."""
+        self._unfinished += 1
+        self._idle.clear()
+
+    def restore(self, seen: Iterable[str], pending: Iterable[tuple[str, int, Optional[str]]]
+                ) -> None:
+        """Rebuild from a journal: ``seen`` URLs are never queued again, ``pending`` are."""
+        self.seen.update(seen)
+        for url, depth, parent in pending:
+            self._put(url, depth, parent)
+
+    async def get(self) -> FrontierItem:
+        while not self.queue:
+            self._ready.clear()
+            await self._ready.wait()
+        rank, seq, url, depth, parent = self.queue.pop()
+        return FrontierItem(depth, seq, url, parent, rank)
+
+    def defer(self, item: FrontierItem, delay: float) -> None:
+        loop = asyncio.get_running_loop()
+
+        def _back() -> None:
+            self._timers.discard(handle)
+            self.queue.push((item.rank, item.seq, item.url, item.depth, item.parent))
+            self._ready.set()
+
+        handle = loop.call_later(delay, _back)
+        self._timers.add(handle)
+
+    def task_done(self) -> None:
+        self._unfinished -= 1
+        if self._unfinished <= 0:
+            self._idle.set()
+
+    async def join(self) -> None:
+        await self._idle.wait()
+
+    def close(self) -> None:
+        for h in self._timers:
+            h.cancel()
+        self._timers.clear()
+
+    def unfinished(self) -> int:
+        """Items queued, deferred or in progress, plus outstanding ``hold``s."""
+        return self._unfinished
+
+    def qsize(self) -> int:
+        return len(self.queue)
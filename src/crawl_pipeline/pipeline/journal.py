@@ -0,0 +1,99 @@
+from __future__ import annotations
+import hashlib, json, sqlite3
+from dataclasses import asdict, is_dataclass
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier (
+    url    TEXT PRIMARY KEY,
+    depth  INTEGER NOT NULL,
+    parent TEXT,
+    done   INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS frontier_pending ON frontier(done, depth);
+CREATE TABLE IF NOT EXISTS saved (
+    seq    INTEGER PRIMARY KEY AUTOINCREMENT,
+    url    TEXT NOT NULL,
+    record TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def default_journal_path(url: str, storage_root: str, base: str = ".crawl-journals") -> str:
+    """Stable per-(seed, destination) location so a retried run finds its own journal."""
+    key = hashlib.sha1(f"{url}\n{storage_root}".encode()).hexdigest()[:16]
+    return str(Path(base) / f"{key}.sqlite")
+
+
+class CrawlJournal:
+    """
+    SQLite-backed record of a crawl: every queued URL (with depth/parent), which ones
+    were processed, and every saved item. ``run_crawl`` replays it on start so an
+    interrupted crawl resumes where it stopped; a journal of a finished crawl is reset
+    and the crawl starts fresh.
+    """
+
+    def __init__(self, path: str) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._db = sqlite3.connect(path, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def __enter__(self) -> "CrawlJournal":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._db.close()
+
+    # --- lifecycle -------------------------------------------------------------------
+    def is_complete(self) -> bool:
+        row = self._db.execute("SELECT value FROM meta WHERE key='complete'").fetchone()
+        return bool(row and row[0] == "1")
+
+    def mark_complete(self) -> None:
+        self._db.execute("INSERT OR REPLACE INTO meta VALUES ('complete', '1')")
+
+    def reset(self) -> None:
+        with self._db:
+            self._db.execute("BEGIN")
+            for table in ("frontier", "saved", "meta"):
+                self._db.execute(f"DELETE FROM {table}")
+
+    # --- writes ----------------------------------------------------------------------
+    def enqueued(self, items: Iterable[tuple[str, int, Optional[str]]]) -> None:
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "INSERT OR IGNORE INTO frontier(url, depth, parent) VALUES (?, ?, ?)", items)
+
+    def finished(self, url: str) -> None:
+        self._db.execute("UPDATE frontier SET done=1 WHERE url=?", (url,))
+
+    def saved(self, url: str, item: Any) -> None:
+        record = asdict(item) if is_dataclass(item) and not isinstance(item, type) else item
+        self._db.execute("INSERT INTO saved(url, record) VALUES (?, ?)",
+                         (url, json.dumps(record, default=str)))
+
+    # --- replay ----------------------------------------------------------------------
+    def seen(self) -> Iterator[str]:
+        for (url,) in self._db.execute("SELECT url FROM frontier"):
+            yield url
+
+    def pending(self) -> list[tuple[str, int, Optional[str]]]:
+        return self._db.execute(
+            "SELECT url, depth, parent FROM frontier WHERE done=0 ORDER BY depth, rowid"
+        ).fetchall()
+
+    def processed_count(self) -> int:
+        (n,) = self._db.execute("SELECT COUNT(*) FROM frontier WHERE done=1").fetchone()
+        return int(n)
+
+    def saved_items(self) -> list[Any]:
+        return [json.loads(r) for (r,) in self._db.execute("SELECT record FROM saved ORDER BY seq")]
@@ -0,0 +1,148 @@
+from __future__ import annotations
+import html as _html, re
+from collections import Counter
+from functools import partial
+from hashlib import blake2b
+from typing import Optional
+from urllib.parse import parse_qsl, urlsplit
+
+from ..config import NearDupPolicy
+from ..logging import log
+
+# markup whose text is not part of what the page says
+_INVISIBLE = re.compile(rb"<(script|style|noscript|template)\b.*?</\1\s*>|<!--.*?-->",
+                        re.I | re.S)
+_TAG = re.compile(rb"<[^>]*>")
+_WORD = re.compile(r"\w+")
+_VARIABLE = re.compile(r"\d")  # path segments with digits: ids, dates, page numbers
+# per bit of a byte, the byte values having it set (deleted to count them)
+_WITH_BIT = [bytes(v for v in range(256) if v >> b & 1) for b in range(8)]
+
+
+def words(html: bytes | str) -> list[str]:
+    """The page's visible words, lowercased: scripts, styles, comments and tags dropped."""
+    if isinstance(html, str):
+        html = html.encode("utf-8", errors="ignore")
+    text = _TAG.sub(b" ", _INVISIBLE.sub(b" ", html)).decode("utf-8", errors="ignore")
+    if "&" in text:
+        text = _html.unescape(text)
+    return _WORD.findall(text.lower())
+
+
+def simhash(tokens: list[str], shingle: int = 3) -> int:
+    """64-bit SimHash of the ``shingle``-word shingles of ``tokens``; near texts differ little."""
+    grams = {" ".join(tokens[i:i + shingle]) for i in range(max(1, len(tokens) - shingle + 1))}
+    digests = b"".join([blake2b(g.encode(), digest_size=8).digest() for g in grams])
+    half = len(grams) / 2
+    fp = 0
+    for j in range(8):
+        column = digests[j::8]  # byte j of every digest
+        for b, with_bit in enumerate(_WITH_BIT):
+            if len(column) - len(column.translate(None, with_bit)) > half:
+                fp |= 1 << (8 * j + b)
+    return fp
+
+
+def fingerprint(html: bytes | str, shingle: int = 3, min_words: int = 50) -> Optional[int]:
+    """``simhash`` of the page's ``words``; None when it has too few to judge."""
+    tokens = words(html)
+    return simhash(tokens, shingle) if len(tokens) >= min_words else None
+
+
+def url_shape(url: str) -> str:
+    """
+    The pattern near-duplicates are learned under: host and path with id-like segments
+    as ``*``, and the names (not values) of the query parameters.
+    """
+    parts = urlsplit(url)
+    path = "/".join("*" if _VARIABLE.search(s) else s for s in parts.path.split("/"))
+    keys = sorted({k for k, _ in parse_qsl(parts.query, keep_blank_values=True)})
+    return (parts.hostname or "") + path + ("?" + "&".join(keys) if keys else "")
+
+
+class SimHashIndex:
+    """
+    Fingerprints within ``max_distance`` bits of each other, found without a scan: the
+    64 bits are cut into ``max_distance + 1`` bands, and two fingerprints that close
+    agree on at least one band, so only fingerprints sharing a band are compared.
+    """
+
+    def __init__(self, max_distance: int = 3) -> None:
+        self.max_distance = max_distance
+        bands = max_distance + 1
+        width = 64 // bands
+        self._bands = [(i * width, (1 << (64 - i * width if i == bands - 1 else width)) - 1)
+                       for i in range(bands)]
+        self._tables: list[dict[int, list[int]]] = [{} for _ in range(bands)]
+        self._fps: list[int] = []
+        self._urls: list[str] = []
+
+    def __len__(self) -> int:
+        return len(self._fps)
+
+    def find(self, fp: int) -> Optional[str]:
+        """The URL of an indexed fingerprint near ``fp``, if any."""
+        for (shift, mask), table in zip(self._bands, self._tables):
+            for i in table.get((fp >> shift) & mask, ()):
+                if (fp ^ self._fps[i]).bit_count() <= self.max_distance:
+                    return self._urls[i]
+        return None
+
+    def add(self, fp: int, url: str) -> None:
+        i = len(self._fps)
+        self._fps.append(fp)
+        self._urls.append(url)
+        for (shift, mask), table in zip(self._bands, self._tables):
+            table.setdefault((fp >> shift) & mask, []).append(i)
+
+
+class NearDuplicates:
+    """
+    The near-duplicate stage of one crawl. ``check`` looks each fetched page's
+    ``fingerprint`` up among those of the pages seen so far, and counts duplicates per
+    URL shape (``url_shape``). Once a shape has produced ``demote_after`` duplicates, at
+    least ``demote_ratio`` of its pages, it is learned. As a frontier scorer
+    (pipeline.priority.Scorer), ``score`` then demotes the shape's newly queued URLs.
+    """
+
+    def __init__(self, policy: NearDupPolicy) -> None:
+        self.policy = policy
+        self.index = SimHashIndex(policy.max_distance)
+        self._pages: Counter[str] = Counter()
+        self._dups: Counter[str] = Counter()
+        self.learned: set[str] = set()
+        self.duplicates = 0
+        # picklable, so large pages can be fingerprinted in a process pool
+        self.fingerprint = partial(fingerprint, shingle=policy.shingle,
+                                   min_words=policy.min_words)
+
+    def check(self, url: str, fp: Optional[int]) -> Optional[str]:
+        """
+        The URL of an earlier page that ``url``'s fingerprint (``fingerprint``; None for
+        a page too short to judge) nearly duplicates, or None: the page is indexed.
+        """
+        if fp is None:
+            return None
+        shape = url_shape(url)
+        self._pages[shape] += 1
+        original = self.index.find(fp)
+        if original is None:
+            self.index.add(fp, url)
+            return None
+        self.duplicates += 1
+        self._dups[shape] += 1
+        if shape not in self.learned and self._noisy(shape):
+            self.learned.add(shape)
+            log("near_dup_shape", shape=shape, duplicates=self._dups[shape],
+                pages=self._pages[shape])
+        return original
+
+    def _noisy(self, shape: str) -> bool:
+        dups = self._dups[shape]
+        return (dups >= self.policy.demote_after
+                and dups >= self.policy.demote_ratio * self._pages[shape])
+
+    def score(self, url: str, depth: int, anchor: Optional[str]) -> float:
+        if not self._dups:
+            return 0.0
+        return -self.policy.demote_score if self._noisy(url_shape(url)) else 0.0
@@ -0,0 +1,239 @@
+from __future__ import annotations
+import heapq, os, re, sqlite3, tempfile
+from collections import Counter
+from typing import Any, Iterable, Optional, Protocol
+
+from ..classify import canonical_type
+from ..config import FrontierPolicy
+from ..politeness import host_of
+from .scope import url_pattern
+
+# (rank, seq, url, depth, parent): lower rank first, then discovery order
+Row = tuple[float, int, str, int, Optional[str]]
+# breadth-first with extra scorers: one depth level outweighs any score they add
+_LEVEL = 1e6
+
+
+class Scorer(Protocol):
+    def score(self, url: str, depth: int, anchor: Optional[str]) -> float:
+        """How much ``url`` is worth fetching; higher comes out of the frontier first."""
+        ...
+
+
+class DepthScorer:
+    def __init__(self, weight: float = 1.0) -> None:
+        self.weight = weight
+
+    def score(self, url: str, depth: int, anchor: Optional[str]) -> float:
+        return -self.weight * depth
+
+
+class PatternScorer:
+    """Adds the score of every (URL glob or ``re:`` regex, score) rule the URL matches."""
+
+    def __init__(self, rules: Iterable[tuple[str, float]]) -> None:
+        self.rules = [(re.compile(url_pattern(p)), w) for p, w in rules]
+
+    def score(self, url: str, depth: int, anchor: Optional[str]) -> float:
+        return sum(w for rx, w in self.rules if rx.search(url))
+
+
+class AnchorScorer:
+    """Adds the score of every term found (as a word, any case) in the link's text."""
+    uses_anchors = True
+
+    def __init__(self, terms: Iterable[tuple[str, float]]) -> None:
+        self.terms = {t.lower(): w for t, w in terms}
+        self._word = re.compile(r"\w+")
+
+    def score(self, url: str, depth: int, anchor: Optional[str]) -> float:
+        if not anchor:
+            return 0.0
+        words = set(self._word.findall(anchor.lower()))
+        return sum(w for t, w in self.terms.items() if t in words)
+
+
+class TypeScorer:
+    """Scores the document type the URL suggests (classify.canonical_type, before any fetch)."""
+
+    def __init__(self, weights: Iterable[tuple[str, float]]) -> None:
+        self.weights = dict(weights)
+
+    def score(self, url: str, depth: int, anchor: Optional[str]) -> float:
+        return self.weights.get(canonical_type(None, url) or "", 0.0)
+
+
+class HostFairness:
+    """Each URL queued from a host makes the next one from it worth ``weight`` less."""
+
+    def __init__(self, weight: float) -> None:
+        self.weight = weight
+        self._queued: Counter[str] = Counter()
+
+    def score(self, url: str, depth: int, anchor: Optional[str]) -> float:
+        host = host_of(url)
+        n = self._queued[host]
+        self._queued[host] = n + 1
+        return -self.weight * n
+
+
+class Priority:
+    """
+    What the frontier consults as URLs are queued: ``rank`` orders them (the sum of
+    ``scorers``, negated, so the best comes out first) and ``admit`` enforces the
+    per-depth and per-host quotas. Without scorers the rank is the depth: breadth-first.
+    """
+
+    def __init__(self, scorers: Iterable[Scorer] = (),
+                 max_per_depth: Iterable[tuple[int, int]] = (), max_per_host: int = 0) -> None:
+        self.scorers = list(scorers)
+        self.uses_anchors = any(getattr(s, "uses_anchors", False) for s in self.scorers)
+        self._depth_quota = dict(max_per_depth)
+        self._host_quota = max_per_host
+        self._per_depth: Counter[int] = Counter()
+        self._per_host: Counter[str] = Counter()
+        self.over_quota = 0
+
+    @classmethod
+    def from_policy(cls, policy: FrontierPolicy, extra: Iterable[Scorer] = ()) -> "Priority":
+        """``extra`` scorers apply in either order; breadth-first then ranks by depth first."""
+        scorers: list[Scorer] = []
+        extra = list(extra)
+        if policy.order == "bfs" and extra:
+            scorers.append(DepthScorer(_LEVEL))
+        elif policy.order == "best_first":
+            scorers.append(DepthScorer(policy.depth_weight))
+            if policy.patterns:
+                scorers.append(PatternScorer(policy.patterns))
+            if policy.anchor_terms:
+                scorers.append(AnchorScorer(policy.anchor_terms))
+            if policy.type_weights:
+                scorers.append(TypeScorer(policy.type_weights))
+            if policy.host_fairness:
+                scorers.append(HostFairness(policy.host_fairness))
+        elif policy.order != "bfs":
+            raise ValueError(f"unknown frontier order {policy.order!r}")
+        return cls(scorers + extra, policy.max_per_depth, policy.max_per_host)
+
+    def rank(self, url: str, depth: int, anchor: Optional[str] = None) -> float:
+        if not self.scorers:
+            return float(depth)
+        return -sum(s.score(url, depth, anchor) for s in self.scorers)
+
+    def admit(self, url: str, depth: int) -> bool:
+        """Count ``url`` against its quotas; False (and not counted) once one is full."""
+        limit = self._depth_quota.get(depth)
+        if limit is not None and self._per_depth[depth] >= limit:
+            self.over_quota += 1
+            return False
+        if self._host_quota:
+            host = host_of(url)
+            if self._per_host[host] >= self._host_quota:
+                self.over_quota += 1
+                return False
+            self._per_host[host] += 1
+        self._per_depth[depth] += 1
+        return True
+
+
+class SpillHeap:
+    """
+    Min-heap of frontier rows holding at most ``spill_after`` of them in memory (no limit
+    when 0). When full, the worse half moves to a SQLite table (``path``, a temp file when
+    None) and comes back in sorted runs as memory drains. Every row in memory ranks before
+    every row on disk, so ``pop`` is always the overall minimum.
+    """
+
+    def __init__(self, spill_after: int = 0, path: Optional[str] = None) -> None:
+        self.spill_after = spill_after
+        self._mem: list[Row] = []
+        self._out: list[Row] = []          # bound for disk, not written yet
+        self._on_disk = 0
+        self._disk_min: Optional[Row] = None
+        self._db: Optional[sqlite3.Connection] = None
+        self._path = path
+        self._owned = False
+        self.spills = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            if self._path is None:
+                fd, self._path = tempfile.mkstemp(prefix="crawl-frontier-", suffix=".sqlite")
+                os.close(fd)
+                self._owned = True
+            self._db = sqlite3.connect(self._path, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=OFF")
+            self._db.execute("DROP TABLE IF EXISTS q")
+            self._db.execute("CREATE TABLE q (rank REAL, seq INTEGER, url TEXT, depth INTEGER, "
+                             "parent TEXT, PRIMARY KEY (rank, seq)) WITHOUT ROWID")
+        return self._db
+
+    def __len__(self) -> int:
+        return len(self._mem) + len(self._out) + self._on_disk
+
+    def push(self, row: Row) -> None:
+        if self._disk_min is not None and row > self._disk_min:
+            self._to_disk([row])
+            return
+        heapq.heappush(self._mem, row)
+        if self.spill_after and len(self._mem) > self.spill_after:
+            self._mem.sort()
+            keep = max(1, self.spill_after // 2)
+            self._mem, spilled = self._mem[:keep], self._mem[keep:]  # a sorted list is a heap
+            self._to_disk(spilled)
+            self.spills += 1
+
+    def _to_disk(self, rows: list[Row]) -> None:
+        self._out.extend(rows)
+        low = min(rows)
+        if self._disk_min is None or low < self._disk_min:
+            self._disk_min = low
+        if len(self._out) >= 1024:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._out:
+            return
+        db = self._conn()
+        with db:
+            db.execute("BEGIN")
+            db.executemany("INSERT INTO q VALUES (?, ?, ?, ?, ?)", self._out)
+        self._on_disk += len(self._out)
+        self._out.clear()
+
+    def _refill(self) -> None:
+        self._flush()
+        db = self._conn()
+        n = max(1, self.spill_after // 2)
+        rows = db.execute("SELECT rank, seq, url, depth, parent FROM q ORDER BY rank, seq "
+                          "LIMIT ?", (n,)).fetchall()
+        last = rows[-1]
+        with db:
+            db.execute("BEGIN")
+            db.execute("DELETE FROM q WHERE (rank, seq) <= (?, ?)", last[:2])
+        self._on_disk -= len(rows)
+        self._mem = [_row(r) for r in rows]
+        nxt = db.execute("SELECT rank, seq, url, depth, parent FROM q ORDER BY rank, seq "
+                         "LIMIT 1").fetchone()
+        self._disk_min = _row(nxt) if nxt else None
+
+    def pop(self) -> Row:
+        if not self._mem and (self._out or self._on_disk):
+            self._refill()
+        return heapq.heappop(self._mem)
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+        if self._owned and self._path:
+            for suffix in ("", "-wal", "-shm"):
+                try:
+                    os.unlink(self._path + suffix)
+                except OSError:
+                    pass
+
+
+def _row(r: tuple[Any, ...]) -> Row:
+    return float(r[0]), int(r[1]), str(r[2]), int(r[3]), r[4]
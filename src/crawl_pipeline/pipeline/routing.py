@@ -0,0 +1,79 @@
+from __future__ import annotations
+from typing import Optional, Sequence
+import aiohttp
+
+from ..classify import canonical_type, header_type, is_asset
+from ..config import Timeouts
+from ..politeness import HostScheduler, host_of
+
+HTML, BINARY, DROP = "html", "binary", "drop"
+
+_SNIFF_BYTES = 2048
+_MAGIC = ((b"%PDF-", "pdf"), (b"<!doctype html", "html"), (b"<html", "html"))
+_GENERIC = ("", "application/octet-stream", "binary/octet-stream")
+
+
+def route_for(typ: Optional[str], file_types: Sequence[str]) -> str:
+    """HTML is always fetched (it carries the links); documents only if requested."""
+    if typ == "html":
+        return HTML
+    if typ is not None and typ in file_types:
+        return BINARY
+    return DROP
+
+
+def route_url(url: str, file_types: Sequence[str]) -> Optional[str]:
+    """Route from the URL alone; None when only the server can tell (e.g. ``.php``)."""
+    if is_asset(url):
+        return DROP
+    typ = canonical_type(None, url)
+    return None if typ is None else route_for(typ, file_types)
+
+
+def response_type(header_ct: Optional[str], url: str) -> Optional[str]:
+    """
+    Canonical type of a response. A specific content type is trusted (an image served
+    from an extensionless URL is not HTML); a missing/generic one defers to the URL.
+    """
+    mime = (header_ct or "").split(";")[0].strip().lower()
+    if mime not in _GENERIC:
+        return header_type(mime)
+    return canonical_type(None, url)
+
+
+def _magic(head: bytes) -> Optional[str]:
+    probe = head.lstrip()[:32].lower()
+    for sig, typ in _MAGIC:
+        if probe.startswith(sig.lower()):
+            return typ
+    return None
+
+
+async def sniff(url: str, *, session: aiohttp.ClientSession, timeouts: Timeouts,
+                scheduler: Optional[HostScheduler] = None) -> Optional[str]:
+    """
+    Canonical type of ``url`` without downloading it: the HEAD content type, else the
+    content type or magic bytes of the first ``_SNIFF_BYTES`` of a ranged GET.
+    """
+    timeout = aiohttp.ClientTimeout(total=timeouts.connect_s + timeouts.read_s)
+    host = host_of(url)
+    try:
+        if scheduler is not None:
+            await scheduler.acquire(host)
+        async with session.head(url, allow_redirects=True, timeout=timeout) as r:
+            mime = (r.headers.get("content-type") or "").split(";")[0].strip().lower()
+            if r.status < 400 and mime not in _GENERIC:
+                return header_type(mime)
+    except Exception:
+        pass
+    try:
+        if scheduler is not None:
+            await scheduler.acquire(host)
+        async with session.get(url, headers={"Range": f"bytes=0-{_SNIFF_BYTES - 1}"},
+                               allow_redirects=True, timeout=timeout) as r:
+            if r.status >= 400:
+                return None
+            ct = r.headers.get("content-type")
+            return response_type(ct, url) or _magic(await r.content.read(_SNIFF_BYTES))
+    except Exception:
+        return None
@@ -0,0 +1,90 @@
+from __future__ import annotations
+import fnmatch, re
+from typing import Iterable, Optional, Pattern
+from urllib.parse import urlsplit
+
+from ..models import CrawlRequest
+from ..robots import RobotsCache
+from ..url_utils import canonicalize
+
+
+def url_pattern(pattern: str) -> str:
+    """Regex source for a URL glob, or for a ``re:``-prefixed regex (searched, unanchored)."""
+    return pattern[3:] if pattern.startswith("re:") else "^" + fnmatch.translate(pattern)
+
+
+def _pattern(patterns: Iterable[str]) -> Optional[Pattern[str]]:
+    """One regex for a list of URL globs and ``re:``-prefixed regexes."""
+    parts = [url_pattern(p) for p in patterns]
+    return re.compile("|".join(f"(?:{p})" for p in parts)) if parts else None
+
+
+class Scope:
+    """
+    Which discovered URLs a crawl may follow, compiled once per crawl.
+
+    A URL is in scope when its host is one of ``hosts`` (``*.example.com`` matches the
+    domain and its subdomains), its path starts with one of ``path_prefixes``, it matches
+    an ``include`` pattern and no ``exclude`` pattern, and its depth is within the limit of
+    the longest ``max_depth`` prefix covering its path. An empty rule allows everything.
+    With ``robots`` (robots.RobotsCache) URLs disallowed by a cached robots.txt are out too.
+    URLs are expected in canonical form (url_utils.canonicalize), so hosts are lowercase.
+    """
+
+    def __init__(self, *, hosts: Iterable[str] = (), path_prefixes: Iterable[str] = (),
+                 include: Iterable[str] = (), exclude: Iterable[str] = (),
+                 max_depth: Iterable[tuple[str, int]] = (),
+                 robots: Optional[RobotsCache] = None) -> None:
+        hosts = [h.lower() for h in hosts]
+        self._any_host = not hosts
+        self._hosts = frozenset(h[2:] if h.startswith("*.") else h for h in hosts)
+        self._suffixes = tuple(h[1:] for h in hosts if h.startswith("*."))
+        self._prefixes = tuple(path_prefixes)
+        self._include = _pattern(include)
+        self._exclude = _pattern(exclude)
+        self._depths = sorted(max_depth, key=lambda rule: len(rule[0]), reverse=True)
+        self._robots = robots
+        self.unbounded = (self._any_host and not self._prefixes and self._include is None
+                          and self._exclude is None and not self._depths and robots is None)
+
+    @classmethod
+    def from_request(cls, request: CrawlRequest, robots: Optional[RobotsCache] = None
+                     ) -> "Scope":
+        """
+        ``request.scope`` plus the seed's host (``same_domain_only``) and path
+        (``under_path_only``).
+        """
+        policy = request.scope
+        seed = urlsplit(canonicalize(request.url, strip_params=()))
+        hosts = policy.hosts + ((seed.hostname or "",) if request.same_domain_only else ())
+        prefixes = policy.path_prefixes + ((seed.path,) if request.under_path_only else ())
+        return cls(hosts=hosts, path_prefixes=prefixes, include=policy.include,
+                   exclude=policy.exclude, max_depth=policy.max_depth, robots=robots)
+
+    def allows(self, url: str, depth: int = 0) -> bool:
+        if self.unbounded:
+            return True
+        parts = urlsplit(url)
+        if not self._any_host:
+            host = parts.hostname or ""
+            if host not in self._hosts and not host.endswith(self._suffixes):
+                return False
+        path = parts.path or "/"
+        if self._prefixes and not path.startswith(self._prefixes):
+            return False
+        if self._exclude is not None and self._exclude.search(url):
+            return False
+        if self._include is not None and not self._include.search(url):
+            return False
+        for prefix, limit in self._depths:
+            if path.startswith(prefix):
+                if depth > limit:
+                    return False
+                break
+        return self._robots is None or self._robots.allows(url)
+
+    def filter(self, urls: Iterable[str], depth: int = 0) -> list[str]:
+        """The in-scope subset of ``urls``, all found at ``depth``."""
+        if self.unbounded:
+            return list(urls)
+        return [u for u in urls if self.allows(u, depth)]
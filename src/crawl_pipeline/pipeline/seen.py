@@ -0,0 +1,252 @@
+from __future__ import annotations
+import hashlib, math, os, sqlite3, tempfile
+from pathlib import Path
+from typing import Iterable, Optional, Protocol
+
+from ..config import SeenPolicy
+
+
+class SeenSet(Protocol):
+    def add(self, key: str) -> bool:
+        """Record ``key``; False if it was (or, for probabilistic sets, may have been) seen."""
+        ...
+
+    def update(self, keys: Iterable[str]) -> None: ...
+    def __contains__(self, key: object) -> bool: ...
+    def __len__(self) -> int: ...
+    def close(self) -> None: ...
+
+
+def _hashes(key: str) -> tuple[int, int]:
+    d = hashlib.blake2b(key.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+    return int.from_bytes(d[:8], "little"), int.from_bytes(d[8:], "little")
+
+
+def fingerprint(key: str) -> int:
+    """64-bit fingerprint; collisions stay below 1e-6 up to ~6M URLs."""
+    return _hashes(key)[0]
+
+
+class ExactSeen:
+    """Every canonical URL as a string: exact, and the most memory per entry."""
+
+    def __init__(self) -> None:
+        self._keys: set[str] = set()
+
+    def add(self, key: str) -> bool:
+        if key in self._keys:
+            return False
+        self._keys.add(key)
+        return True
+
+    def update(self, keys: Iterable[str]) -> None:
+        self._keys.update(keys)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def close(self) -> None:
+        pass
+
+
+class FingerprintSeen:
+    """64-bit fingerprints instead of strings: no false negatives, rare false positives."""
+
+    def __init__(self) -> None:
+        self._fps: set[int] = set()
+
+    def add(self, key: str) -> bool:
+        fp = fingerprint(key)
+        if fp in self._fps:
+            return False
+        self._fps.add(fp)
+        return True
+
+    def update(self, keys: Iterable[str]) -> None:
+        self._fps.update(fingerprint(k) for k in keys)
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and fingerprint(key) in self._fps
+
+    def __len__(self) -> int:
+        return len(self._fps)
+
+    def close(self) -> None:
+        pass
+
+
+class _Bloom:
+    def __init__(self, capacity: int, fp_rate: float) -> None:
+        self.capacity = max(1, capacity)
+        self.bits = max(8, math.ceil(-self.capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.k = max(1, round(self.bits / self.capacity * math.log(2)))
+        self._array = bytearray((self.bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, h1: int, h2: int) -> list[int]:
+        # Kirsch-Mitzenmacher double hashing: k probes from two hashes
+        return [(h1 + i * h2) % self.bits for i in range(self.k)]
+
+    def test(self, h1: int, h2: int) -> bool:
+        a = self._array
+        return all(a[p >> 3] & (1 << (p & 7)) for p in self._positions(h1, h2))
+
+    def set(self, h1: int, h2: int) -> None:
+        a = self._array
+        for p in self._positions(h1, h2):
+            a[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+
+class BloomSeen:
+    """
+    Scalable Bloom filter: a few bytes per URL at ``fp_rate``. When a filter reaches its
+    capacity a twice-as-large one with half the error rate is chained on, so the overall
+    false-positive rate stays under ``fp_rate`` however far past ``capacity`` the crawl
+    goes. A false positive means a never-seen URL is skipped; nothing is fetched twice.
+    """
+
+    def __init__(self, capacity: int = 1_000_000, fp_rate: float = 1e-6) -> None:
+        self.fp_rate = fp_rate
+        self._filters = [_Bloom(capacity, fp_rate / 2)]
+        self._len = 0
+
+    def _has(self, h1: int, h2: int) -> bool:
+        return any(f.test(h1, h2) for f in self._filters)
+
+    def _set(self, h1: int, h2: int) -> None:
+        last = self._filters[-1]
+        if last.count >= last.capacity:
+            last = _Bloom(last.capacity * 2, self.fp_rate / 2 ** (len(self._filters) + 1))
+            self._filters.append(last)
+        last.set(h1, h2)
+        self._len += 1
+
+    def add(self, key: str) -> bool:
+        h1, h2 = _hashes(key)
+        if self._has(h1, h2):
+            return False
+        self._set(h1, h2)
+        return True
+
+    def update(self, keys: Iterable[str]) -> None:
+        for k in keys:
+            self.add(k)
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._has(*_hashes(key))
+
+    def __len__(self) -> int:
+        return self._len
+
+    @property
+    def nbytes(self) -> int:
+        return sum(len(f._array) for f in self._filters)
+
+    def close(self) -> None:
+        pass
+
+
+_MASK = (1 << 64) - 1
+
+
+def _signed(fp: int) -> int:
+    return fp - (1 << 64) if fp >= 1 << 63 else fp  # SQLite integers are signed
+
+
+def _rehash(fp: int) -> tuple[int, int]:
+    # the filter in front of the disk is keyed by fingerprints, already uniform 64-bit values
+    return fp, ((fp * 0x9E3779B97F4A7C15) & _MASK) | 1
+
+
+class DiskSeen:
+    """
+    Exact fingerprints spilled to SQLite. Fingerprints are kept in memory up to
+    ``spill_after`` and then flushed to disk in one transaction. A Bloom filter over
+    everything spilled keeps lookups of new URLs, the common case, off the disk.
+    """
+
+    def __init__(self, path: Optional[str] = None, *, spill_after: int = 1_000_000,
+                 fp_rate: float = 1e-3) -> None:
+        self._owned = path is None
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="seen-", suffix=".sqlite")
+            os.close(fd)
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._db = sqlite3.connect(path, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=OFF")  # a crash loses a cache, not data
+        self._db.execute("CREATE TABLE IF NOT EXISTS seen (fp INTEGER PRIMARY KEY)")
+        self.spill_after = max(1, spill_after)
+        self._recent: set[int] = set()
+        self._spilled = BloomSeen(capacity=self.spill_after, fp_rate=fp_rate)
+        self._len = 0
+        self.disk_lookups = 0
+        for (fp,) in self._db.execute("SELECT fp FROM seen"):
+            self._spilled._set(*_rehash(fp & _MASK))
+            self._len += 1
+
+    def _on_disk(self, fp: int) -> bool:
+        if not self._spilled._has(*_rehash(fp)):
+            return False
+        self.disk_lookups += 1
+        row = self._db.execute("SELECT 1 FROM seen WHERE fp=?", (_signed(fp),)).fetchone()
+        return row is not None
+
+    def _spill(self) -> None:
+        rows = [(_signed(fp),) for fp in self._recent]
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany("INSERT OR IGNORE INTO seen VALUES (?)", rows)
+        for fp in self._recent:
+            self._spilled._set(*_rehash(fp))
+        self._recent.clear()
+
+    def add(self, key: str) -> bool:
+        fp = fingerprint(key)
+        if fp in self._recent or self._on_disk(fp):
+            return False
+        self._recent.add(fp)
+        self._len += 1
+        if len(self._recent) >= self.spill_after:
+            self._spill()
+        return True
+
+    def update(self, keys: Iterable[str]) -> None:
+        for k in keys:
+            self.add(k)
+
+    def __contains__(self, key: object) -> bool:
+        if not isinstance(key, str):
+            return False
+        fp = fingerprint(key)
+        return fp in self._recent or self._on_disk(fp)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def close(self) -> None:
+        self._db.close()
+        if self._owned:
+            for suffix in ("", "-wal", "-shm"):
+                try:
+                    os.unlink(self.path + suffix)
+                except OSError:
+                    pass
+
+
+def make_seen(policy: SeenPolicy) -> SeenSet:
+    if policy.mode == "exact":
+        return ExactSeen()
+    if policy.mode == "fingerprint":
+        return FingerprintSeen()
+    if policy.mode == "bloom":
+        return BloomSeen(capacity=policy.capacity, fp_rate=policy.fp_rate)
+    if policy.mode == "disk":
+        return DiskSeen(policy.spill_path, spill_after=policy.spill_after,
+                        fp_rate=policy.fp_rate)
+    raise ValueError(f"unknown seen mode {policy.mode!r}")
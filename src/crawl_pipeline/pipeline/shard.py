@@ -0,0 +1,285 @@
+from __future__ import annotations
+import asyncio, hashlib, json, multiprocessing as mp, os, sqlite3, tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, is_dataclass
+from pathlib import Path
+from typing import Any, Callable, Coroutine, Optional, Protocol, Sequence
+
+from ..logging import configure, log
+from ..models import CrawlRequest, SavedItem
+from ..politeness import host_of
+from .frontier import Frontier
+
+BUSY, IDLE, STOPPED = "busy", "idle", "stopped"
+
+# (url, shard, depth, parent) on the way out; (url, depth, parent) on the way in
+Link = tuple[str, int, int, Optional[str]]
+Incoming = tuple[str, int, Optional[str]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS inbox (
+    url    TEXT PRIMARY KEY,
+    shard  INTEGER NOT NULL,
+    depth  INTEGER NOT NULL,
+    parent TEXT,
+    taken  INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS inbox_open ON inbox(shard, taken);
+CREATE TABLE IF NOT EXISTS shards (shard INTEGER PRIMARY KEY, state TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS saved (
+    seq    INTEGER PRIMARY KEY AUTOINCREMENT,
+    shard  INTEGER NOT NULL,
+    url    TEXT NOT NULL,
+    record TEXT NOT NULL
+);
+"""
+
+
+def shard_of(url: str, shards: int) -> int:
+    """The shard owning ``url``'s host; stable across processes and machines."""
+    digest = hashlib.blake2b(host_of(url).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little") % shards
+
+
+class ShardStore(Protocol):
+    """What the shards of one crawl share: cross-shard links, shard states, saved items."""
+
+    def send(self, links: Sequence[Link]) -> None: ...
+
+    def receive(self, shard: int, limit: int) -> list[Incoming]:
+        """
+        Take up to ``limit`` links sent to ``shard``; each is handed out once. Taking any
+        marks the shard busy in the same step, so the crawl never looks quiet in between.
+        """
+        ...
+
+    def set_state(self, shard: int, state: str) -> None: ...
+
+    def quiescent(self) -> bool:
+        """True when no running shard is busy or has links waiting for it."""
+        ...
+
+    def save(self, shard: int, items: Sequence[tuple[str, Any]]) -> None: ...
+    def manifest(self) -> list[SavedItem]: ...
+    def close(self) -> None: ...
+
+
+class SqliteShardStore:
+    """
+    ShardStore in one SQLite file (WAL), for shards on one machine or on nodes sharing a
+    filesystem with working locks. A URL is sent to its shard at most once per crawl.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._db = sqlite3.connect(path, isolation_level=None, timeout=60.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    @classmethod
+    def create(cls, path: str, shards: int) -> "SqliteShardStore":
+        """A fresh store with every shard ``busy`` until it first reports itself idle."""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        store = cls(path)
+        with store._db:
+            store._db.execute("BEGIN")
+            for table in ("inbox", "shards", "saved"):
+                store._db.execute(f"DELETE FROM {table}")
+            store._db.executemany("INSERT INTO shards VALUES (?, ?)",
+                                  [(k, BUSY) for k in range(shards)])
+        return store
+
+    def __enter__(self) -> "SqliteShardStore":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def send(self, links: Sequence[Link]) -> None:
+        if not links:
+            return
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "INSERT OR IGNORE INTO inbox(url, shard, depth, parent) VALUES (?, ?, ?, ?)",
+                links)
+
+    def receive(self, shard: int, limit: int) -> list[Incoming]:
+        with self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            rows = self._db.execute(
+                "SELECT rowid, url, depth, parent FROM inbox WHERE shard=? AND taken=0 "
+                "ORDER BY depth LIMIT ?", (shard, limit)).fetchall()
+            self._db.executemany("UPDATE inbox SET taken=1 WHERE rowid=?",
+                                 [(r[0],) for r in rows])
+            if rows:
+                self._db.execute("INSERT OR REPLACE INTO shards VALUES (?, ?)", (shard, BUSY))
+        return [(url, depth, parent) for _, url, depth, parent in rows]
+
+    def set_state(self, shard: int, state: str) -> None:
+        self._db.execute("INSERT OR REPLACE INTO shards VALUES (?, ?)", (shard, state))
+
+    def quiescent(self) -> bool:
+        with self._db:  # one snapshot for both reads
+            self._db.execute("BEGIN")
+            busy = self._db.execute(
+                "SELECT 1 FROM shards WHERE state=? LIMIT 1", (BUSY,)).fetchone()
+            waiting = self._db.execute(
+                "SELECT 1 FROM inbox JOIN shards USING (shard) "
+                "WHERE inbox.taken=0 AND shards.state!=? LIMIT 1", (STOPPED,)).fetchone()
+        return busy is None and waiting is None
+
+    def save(self, shard: int, items: Sequence[tuple[str, Any]]) -> None:
+        if not items:
+            return
+        rows = [(shard, url, json.dumps(
+            asdict(item) if is_dataclass(item) and not isinstance(item, type) else item,
+            default=str)) for url, item in items]
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany("INSERT INTO saved(shard, url, record) VALUES (?, ?, ?)", rows)
+
+    def manifest(self) -> list[SavedItem]:
+        return [SavedItem.from_record(json.loads(r))
+                for (r,) in self._db.execute("SELECT record FROM saved ORDER BY seq")]
+
+
+class ShardLink:
+    """
+    One shard's side of a sharded crawl, handed to ``run_crawl(shard=...)``.
+
+    Hosts are split between ``shards`` by hash (``shard_of``), so each host's politeness,
+    robots.txt and connections live in exactly one process. Links to this shard's hosts
+    are queued locally; the rest are batched into the ``store`` for their shard, which
+    picks them up in ``pump``. Saved items are copied to the store for the merged manifest.
+    """
+
+    def __init__(self, store: ShardStore, shard: int, shards: int, poll_s: float = 0.05,
+                 batch: int = 1000) -> None:
+        self.store = store
+        self.shard = shard
+        self.shards = shards
+        self.poll_s = poll_s
+        self.batch = batch
+        self._outbox: list[Link] = []
+        self._saved: list[tuple[str, Any]] = []
+        self._state: Optional[str] = None
+
+    def owns(self, url: str) -> bool:
+        return shard_of(url, self.shards) == self.shard
+
+    def exchange(self, urls: list[str], depth: int, parent: Optional[str]) -> list[str]:
+        """Keep this shard's ``urls``; the others go out with the next flush."""
+        mine = []
+        for url in urls:
+            k = shard_of(url, self.shards)
+            if k == self.shard:
+                mine.append(url)
+            else:
+                self._outbox.append((url, k, depth, parent))
+        return mine
+
+    def saved(self, url: str, item: Any) -> None:
+        self._saved.append((url, item))
+
+    def flush(self) -> None:
+        outbox, self._outbox = self._outbox, []
+        saved, self._saved = self._saved, []
+        self.store.send(outbox)
+        self.store.save(self.shard, saved)
+
+    def _report(self, state: str) -> None:
+        if state != self._state:
+            self.store.set_state(self.shard, state)
+            self._state = state
+
+    async def pump(self, frontier: Frontier) -> None:
+        """
+        Move links between the store and ``frontier`` until the whole crawl is quiet:
+        this shard has nothing outstanding but the caller's ``hold``, and no shard is
+        busy or has links waiting. Outgoing links are flushed before this shard reports
+        itself idle, so a quiet store means no shard can produce more work.
+        """
+        self._report(BUSY)
+        while True:
+            self.flush()
+            incoming = self.store.receive(self.shard, self.batch)
+            if incoming:
+                self._state = BUSY  # receive marked it
+            for url, depth, parent in incoming:
+                frontier.push(url, depth, parent)
+            idle = frontier.unfinished() <= 1
+            self._report(IDLE if idle else BUSY)
+            if idle and self.store.quiescent():
+                return
+            await asyncio.sleep(0 if incoming else self.poll_s)
+
+    def stop(self) -> None:
+        """Flush, and leave the crawl: links still sent here are no longer waited for."""
+        self.flush()
+        self._report(STOPPED)
+
+
+# what each shard runs: ``crawl(request, shard=link)``, resolving to its saved items
+CrawlFn = Callable[..., Coroutine[Any, Any, list[SavedItem]]]
+
+
+def crawl_shard(crawl: CrawlFn, request: CrawlRequest, store_path: str, shard: int,
+                shards: int, log_path: Optional[str] = None) -> int:
+    """
+    Run shard ``shard`` of ``shards`` to completion in this process: ``crawl(request,
+    shard=link)`` must wire its adapters and pass ``shard`` on to ``run_crawl``. Returns
+    the number of items this shard saved. Safe to call from a Prefect task or a pool.
+    """
+    if log_path:
+        configure(path=f"{log_path}.{shard}")
+    store = SqliteShardStore(store_path)
+    link = ShardLink(store, shard, shards)
+    try:
+        return len(asyncio.run(crawl(request, shard=link)))
+    finally:
+        store.set_state(shard, STOPPED)
+        store.close()
+
+
+def run_sharded(request: CrawlRequest, crawl: CrawlFn, shards: Optional[int] = None,
+                store_path: Optional[str] = None, log_path: Optional[str] = None
+                ) -> list[SavedItem]:
+    """
+    Crawl ``request`` with ``shards`` processes (one per core by default), each owning a
+    hash partition of the hosts, and return the merged manifest of saved items.
+
+    ``crawl`` runs in every child, so it must be picklable (a module-level coroutine
+    function); see ``crawl_shard``. Limits apply per shard. The shards coordinate through
+    a SqliteShardStore at ``store_path`` (a temporary file when None); with ``log_path``
+    each shard logs to ``<log_path>.<shard>``.
+    """
+    shards = shards or os.cpu_count() or 1
+    owned = store_path is None
+    if store_path is None:
+        fd, path = tempfile.mkstemp(prefix="crawl-shards-", suffix=".sqlite")
+        os.close(fd)
+    else:
+        path = store_path
+    try:
+        SqliteShardStore.create(path, shards).close()
+        log("sharded_crawl", url=request.url, shards=shards, store=path)
+        with ProcessPoolExecutor(shards, mp_context=mp.get_context("spawn")) as pool:
+            futures = [pool.submit(crawl_shard, crawl, request, path, k, shards, log_path)
+                       for k in range(shards)]
+            counts = [f.result() for f in futures]
+        with SqliteShardStore(path) as store:
+            items = store.manifest()
+        log("sharded_crawl_done", saved=len(items), per_shard=counts)
+        return items
+    finally:
+        if owned:
+            for suffix in ("", "-wal", "-shm"):
+                try:
+                    os.unlink(path + suffix)
+                except OSError:
+                    pass
@@ -0,0 +1,118 @@
+from __future__ import annotations
+import asyncio, math, time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+from yarl import URL
+
+from .config import Politeness
+
+SLOWDOWN_STATUSES = frozenset({429, 503})
+
+
+def host_of(url: str) -> str:
+    try:
+        return (URL(url).host or "").lower()
+    except Exception:
+        return ""
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Seconds to wait from a ``Retry-After`` header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when - (time.time() if now is None else now))
+
+
+@dataclass
+class _Bucket:
+    rate: float
+    tokens: float
+    updated: float
+    burst: float
+    not_before: float = 0.0
+    streak: int = 0
+    ceiling: float = math.inf         # set_rate: ramping never goes above a pinned rate
+
+
+class HostScheduler:
+    """
+    Per-host token buckets with AIMD rate adaptation.
+
+    ``delay`` lets the frontier skip hosts that have no budget yet (so one slow origin never
+    parks every worker), ``acquire`` spends a token before each request attempt, and
+    ``feedback`` slows a host down on 429/503 (honouring ``Retry-After``) and ramps it back
+    up after a run of successes.
+    """
+
+    def __init__(self, policy: Politeness = Politeness(),
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.policy = policy
+        self._clock = clock
+        self._buckets: dict[str, _Bucket] = {}
+
+    def _bucket(self, host: str) -> _Bucket:
+        b = self._buckets.get(host)
+        now = self._clock()
+        if b is None:
+            burst = float(self.policy.host_burst)
+            b = self._buckets[host] = _Bucket(self.policy.host_rate_per_s, burst, now, burst)
+        else:
+            b.tokens = min(b.burst, b.tokens + (now - b.updated) * b.rate)
+            b.updated = now
+        return b
+
+    def rate(self, host: str) -> float:
+        return self._bucket(host).rate
+
+    def set_rate(self, host: str, rate: float, burst: Optional[int] = None) -> None:
+        """Pin a host's rate (and optionally its burst), e.g. from a robots.txt crawl-delay."""
+        b = self._bucket(host)
+        b.rate = b.ceiling = max(self.policy.min_rate_per_s, rate)
+        if burst is not None:
+            b.burst = float(max(1, burst))
+            b.tokens = min(b.tokens, b.burst)
+
+    def delay(self, host: str) -> float:
+        """Seconds until ``host`` has a token available; 0 means go now."""
+        b = self._bucket(host)
+        wait = max(0.0, b.not_before - b.updated)
+        if b.tokens < 1.0:
+            wait = max(wait, (1.0 - b.tokens) / b.rate)
+        return wait
+
+    async def acquire(self, host: str) -> None:
+        while True:
+            wait = self.delay(host)
+            if wait <= 0:
+                self._bucket(host).tokens -= 1.0
+                return
+            await asyncio.sleep(wait)
+
+    def penalize(self, host: str, seconds: float) -> None:
+        """Hold every request to ``host`` back for at least ``seconds``."""
+        b = self._bucket(host)
+        b.not_before = max(b.not_before, b.updated + seconds)
+
+    def feedback(self, host: str, status: Optional[int], retry_after: Optional[float] = None
+                 ) -> None:
+        b = self._bucket(host)
+        if status in SLOWDOWN_STATUSES:
+            b.rate = max(self.policy.min_rate_per_s, b.rate * self.policy.slowdown_factor)
+            b.streak = 0
+            self.penalize(host, retry_after if retry_after is not None else 1.0 / b.rate)
+        elif status is not None and status < 400:
+            b.streak += 1
+            if b.streak >= self.policy.ramp_after:
+                b.rate = min(self.policy.max_rate_per_s, b.ceiling,
+                             b.rate + self.policy.ramp_step_per_s)
+                b.streak = 0
+        else:
+            b.streak = 0
@@ -1,10 +1,21 @@
 from typing import Protocol, AsyncIterator, Tuple, Optional
-from ..config import Timeouts, RetryPolicy
+import aiohttp
+from ..config import Timeouts, RetryPolicy, Limits
+from ..budget import ByteBudget
+from ..politeness import HostScheduler
+from ..revalidation import ValidatorCache
 
 class BinaryFetcher(Protocol):
-    #async def fetch_binary(self, url: str, *, timeouts: Timeouts, retry: RetryPolicy
-                          # ) -> Tuple[str, AsyncIterator[bytes], Optional[int]]:
-        
-    async def fetch_binary(self, url: str, timeouts: int = 30, retry: int = 3) -> bytes:
-        """Return (content_type, async_chunk_iter, content_length_or_None)."""
+    async def fetch_binary(self, url: str, *, timeouts: Timeouts, retry: RetryPolicy,
+                           limits: Limits = Limits(),
+                           session: Optional[aiohttp.ClientSession] = None,
+                           scheduler: Optional[HostScheduler] = None,
+                           validators: Optional[ValidatorCache] = None,
+                           budget: Optional[ByteBudget] = None
+                           ) -> Tuple[str, AsyncIterator[bytes], Optional[int]]:
+        """
+        Return (content_type, async_chunk_iter, content_length_or_None); raises
+        ``NotModified`` when ``validators`` revalidate the cached copy. With a ``budget``
+        the stream is metered and ``BudgetExceeded`` aborts it once a cap is crossed.
+        """
         ...
@@ -1,8 +1,19 @@
-from typing import Protocol, Tuple
+from typing import Protocol, Tuple, Optional
+import aiohttp
 from ..config import Timeouts, RetryPolicy
+from ..budget import ByteBudget
+from ..politeness import HostScheduler
+from ..revalidation import ValidatorCache
 
 class HtmlFetcher(Protocol):
-    #async def fetch_html(self, url: str, *, timeouts: Timeouts, retry: RetryPolicy) -> Tuple[str, bytes]:
-    async def fetch_html(self, url: str, timeouts: int = 30, retry: int = 3) -> Tuple[str, str]:
-        """Return (content_type, html_bytes)."""
+    async def fetch_html(self, url: str, timeouts: Timeouts, retry: RetryPolicy,
+                         session: Optional[aiohttp.ClientSession] = None,
+                         scheduler: Optional[HostScheduler] = None,
+                         validators: Optional[ValidatorCache] = None,
+                         budget: Optional[ByteBudget] = None) -> Tuple[str, bytes]:
+        """
+        Return (content_type, html_bytes). ``session``/``scheduler`` are crawl-scoped, if any;
+        with ``validators`` the request is conditional and a 304 raises ``NotModified``;
+        a page over a ``budget`` cap raises ``BudgetExceeded`` instead of being read whole.
+        """
         ...
@@ -1,11 +1,16 @@
-from playwright.async_api import async_playwright
+from crawl_pipeline.adapters.browser_pool import BrowserPool
+from crawl_pipeline.config import Timeouts
 
 class PlaywrightHtmlFetcher:
-    async def fetch_html(self, url: str, **kwargs):
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
-            await page.goto(url, wait_until="networkidle")
-            html = await page.content()
-            await browser.close()
+    """Renders through ``pool``; without one, a single-page pool is started per call."""
+
+    def __init__(self, pool: BrowserPool | None = None):
+        self.pool = pool
+
+    async def fetch_html(self, url: str, timeouts: Timeouts = Timeouts(), **kwargs):
+        if self.pool is None:
+            async with BrowserPool(contexts=1, pages_per_context=1) as pool:
+                html = await pool.render(url, timeouts)
+        else:
+            html = await self.pool.render(url, timeouts)
         return "text/html", html.encode("utf-8")
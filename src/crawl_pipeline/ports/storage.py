@@ -1,7 +1,17 @@
-from typing import Protocol, AsyncIterator
+from typing import Any, AsyncIterator, Awaitable, Callable, Protocol
 
 class Storage(Protocol):
     def save_bytes(self, *, content: bytes, url: str, canonical_type: str, root: str
                   ) -> str: ...
+    async def save_stream(self, *, chunks: AsyncIterator[bytes], url: str, canonical_type: str,
+                          root: str, size_hint: int | None = None,
+                          run: Callable[..., Awaitable[Any]] = ...) -> str:
+        """``run(fn, *args)`` executes the blocking parts; backends default to a thread."""
+        ...
+
+class AsyncStorage(Protocol):
+    """What the crawl writes through (adapters.storage_exec.StorageWriter)."""
+    async def save_bytes(self, *, content: bytes, url: str, canonical_type: str, root: str
+                        ) -> str: ...
     async def save_stream(self, *, chunks: AsyncIterator[bytes], url: str, canonical_type: str,
                           root: str, size_hint: int | None = None) -> str: ...
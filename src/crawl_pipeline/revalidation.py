@@ -0,0 +1,120 @@
+from __future__ import annotations
+import hashlib, json, sqlite3
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Mapping, Optional
+
+from .url_utils import normalize
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS validators (
+    url           TEXT PRIMARY KEY,
+    etag          TEXT,
+    last_modified TEXT,
+    sha256        TEXT,
+    path          TEXT,
+    outlinks      TEXT NOT NULL DEFAULT '[]'
+);
+"""
+
+
+@dataclass(frozen=True)
+class CachedPage:
+    url: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    sha256: Optional[str] = None
+    path: Optional[str] = None
+    outlinks: tuple[str, ...] = field(default_factory=tuple)
+
+
+class NotModified(Exception):
+    """Raised by a fetcher when the server answers a conditional request with 304."""
+
+    status = 304
+
+    def __init__(self, url: str, cached: CachedPage) -> None:
+        super().__init__(f"304 Not Modified: {url}")
+        self.url = url
+        self.cached = cached
+
+
+def default_cache_path(storage_root: str, base: str = ".crawl-cache") -> str:
+    """Validators are only meaningful against the store that holds the cached copies."""
+    key = hashlib.sha1(storage_root.encode()).hexdigest()[:16]
+    return str(Path(base) / f"validators-{key}.sqlite")
+
+
+def _key(url: str) -> str:
+    try:
+        return normalize(url)
+    except ValueError:
+        return url
+
+
+class ValidatorCache:
+    """
+    HTTP validator store for recrawls, keyed by normalized URL.
+
+    Fetchers call ``conditional_headers`` before a request, ``not_modified`` on a 304
+    and ``observe`` with the headers of a 200; the pipeline calls ``commit`` once the
+    page is stored, which persists its ETag/Last-Modified together with the content sha,
+    storage path and outlinks (so an unchanged page can still feed the frontier).
+    """
+
+    def __init__(self, path: str) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._observed: dict[str, tuple[Optional[str], Optional[str]]] = {}
+
+    def __enter__(self) -> "ValidatorCache":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        row = self._db.execute(
+            "SELECT url, etag, last_modified, sha256, path, outlinks FROM validators WHERE url=?",
+            (_key(url),)).fetchone()
+        if row is None:
+            return None
+        return CachedPage(row[0], row[1], row[2], row[3], row[4], tuple(json.loads(row[5])))
+
+    def conditional_headers(self, url: str) -> dict[str, str]:
+        cached = self.get(url)
+        headers: dict[str, str] = {}
+        if cached is not None and cached.path:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+        return headers
+
+    def not_modified(self, url: str) -> NotModified:
+        cached = self.get(url)
+        return NotModified(url, cached if cached is not None else CachedPage(_key(url)))
+
+    def observe(self, url: str, headers: Mapping[str, str]) -> None:
+        etag, lm = headers.get("ETag"), headers.get("Last-Modified")
+        if etag or lm:
+            self._observed[_key(url)] = (etag, lm)
+
+    def forget(self, url: str) -> None:
+        self._observed.pop(_key(url), None)
+
+    def commit(self, url: str, *, sha256: Optional[str], path: Optional[str],
+               outlinks: list[str] | tuple[str, ...] = ()) -> None:
+        key = _key(url)
+        etag, lm = self._observed.pop(key, (None, None))
+        if not (etag or lm):
+            return
+        self._db.execute(
+            "INSERT OR REPLACE INTO validators VALUES (?, ?, ?, ?, ?, ?)",
+            (key, etag, lm, sha256, path, json.dumps(list(outlinks))))
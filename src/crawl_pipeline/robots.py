@@ -0,0 +1,143 @@
+from __future__ import annotations
+import asyncio, time
+from typing import Callable, Optional
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import aiohttp
+
+from .config import RobotsPolicy, Timeouts
+from .logging import log
+from .politeness import HostScheduler, host_of
+
+MAX_ROBOTS_BYTES = 512 * 1024  # RFC 9309: at least the first 500 KiB must be parsed
+_UNREACHABLE_TTL_S = 600.0      # 5xx/unreachable means "disallow all", but only for a while
+
+
+class Robots:
+    """One origin's robots.txt, as it applies to ``user_agent``."""
+
+    def __init__(self, parser: RobotFileParser, user_agent: str) -> None:
+        self._parser = parser
+        self.user_agent = user_agent
+        self._all: Optional[bool] = None  # every URL allowed (True) or not (False)
+
+    @classmethod
+    def parse(cls, text: str, user_agent: str) -> "Robots":
+        parser = RobotFileParser()
+        parser.parse(text.splitlines())
+        return cls(parser, user_agent)
+
+    @classmethod
+    def allow_all(cls, user_agent: str) -> "Robots":
+        robots = cls(RobotFileParser(), user_agent)
+        robots._all = True
+        return robots
+
+    @classmethod
+    def disallow_all(cls, user_agent: str) -> "Robots":
+        robots = cls(RobotFileParser(), user_agent)
+        robots._all = False
+        return robots
+
+    def allowed(self, url: str) -> bool:
+        if self._all is not None:
+            return self._all
+        return self._parser.can_fetch(self.user_agent, url)
+
+    @property
+    def crawl_delay(self) -> Optional[float]:
+        """Seconds between requests asked for by Crawl-delay or Request-rate, if any."""
+        delay = self._parser.crawl_delay(self.user_agent)
+        rate = self._parser.request_rate(self.user_agent)
+        spacing = rate.seconds / rate.requests if rate and rate.requests else None
+        delays = [float(d) for d in (delay, spacing) if d]
+        return max(delays) if delays else None
+
+    @property
+    def sitemaps(self) -> list[str]:
+        return list(self._parser.site_maps() or [])
+
+
+class RobotsCache:
+    """
+    robots.txt per origin, fetched once per ``policy.ttl_s`` and shared by the crawl.
+
+    ``get`` fetches (concurrent callers share one request) and hands a Crawl-delay to the
+    politeness ``scheduler`` as a pinned rate with a burst of one. ``allows`` is the
+    synchronous check used by the scope filter: it answers from what is cached and lets
+    URLs of origins not fetched yet through, for ``get`` to settle before they are fetched.
+    Per RFC 9309 a 4xx robots.txt allows everything, and a 5xx or unreachable one
+    disallows everything until it is retried.
+    """
+
+    def __init__(self, policy: RobotsPolicy = RobotsPolicy(), timeouts: Timeouts = Timeouts(),
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.policy = policy
+        self.timeouts = timeouts
+        self._clock = clock
+        self._cache: dict[str, tuple[float, Robots]] = {}
+        self._pending: dict[str, asyncio.Future[Robots]] = {}
+        self.fetches = 0
+
+    @staticmethod
+    def _origin(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}".lower()
+
+    def allows(self, url: str) -> bool:
+        entry = self._cache.get(self._origin(url))
+        return entry is None or entry[1].allowed(url)
+
+    async def get(self, url: str, *, session: aiohttp.ClientSession,
+                  scheduler: Optional[HostScheduler] = None) -> Robots:
+        origin = self._origin(url)
+        entry = self._cache.get(origin)
+        if entry is not None and entry[0] > self._clock():
+            return entry[1]
+        fut = self._pending.get(origin)
+        if fut is None:
+            # detached from its first caller: one waiter's cancellation (a worker stopping,
+            # a request timeout) must not cancel the fetch the others wait on
+            fut = asyncio.ensure_future(self._settle(origin, session, scheduler))
+            fut.add_done_callback(_retrieve)
+            self._pending[origin] = fut
+        return await asyncio.shield(fut)
+
+    async def _settle(self, origin: str, session: aiohttp.ClientSession,
+                      scheduler: Optional[HostScheduler]) -> Robots:
+        try:
+            robots, ttl = await self._fetch(origin, session, scheduler)
+        finally:
+            del self._pending[origin]
+        self._cache[origin] = (self._clock() + ttl, robots)
+        delay = robots.crawl_delay
+        if delay and scheduler is not None:
+            scheduler.set_rate(host_of(origin), 1.0 / delay, burst=1)
+        return robots
+
+    async def _fetch(self, origin: str, session: aiohttp.ClientSession,
+                     scheduler: Optional[HostScheduler]) -> tuple[Robots, float]:
+        ua = self.policy.user_agent
+        self.fetches += 1
+        if scheduler is not None:
+            await scheduler.acquire(host_of(origin))
+        timeout = aiohttp.ClientTimeout(total=self.timeouts.total_s,
+                                        connect=self.timeouts.connect_s)
+        try:
+            async with session.get(f"{origin}/robots.txt", timeout=timeout) as resp:
+                if resp.status >= 500:
+                    return Robots.disallow_all(ua), min(self.policy.ttl_s, _UNREACHABLE_TTL_S)
+                if resp.status >= 400:
+                    return Robots.allow_all(ua), self.policy.ttl_s
+                body = await resp.content.read(MAX_ROBOTS_BYTES)
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+            log("robots_unreachable", origin=origin, error=str(e))
+            return Robots.disallow_all(ua), min(self.policy.ttl_s, _UNREACHABLE_TTL_S)
+        return Robots.parse(body.decode("utf-8", "replace"), ua), self.policy.ttl_s
+
+
+def _retrieve(fut: asyncio.Future[Robots]) -> None:
+    """Mark a fetch's error as seen: every caller may have given up on it."""
+    if not fut.cancelled():
+        fut.exception()
@@ -0,0 +1,52 @@
+from __future__ import annotations
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
+import aiohttp
+
+from .config import Limits, Timeouts
+from .ssrf import GuardedConnector, SsrfGuard
+from .telemetry import Metrics
+
+
+def make_connector(limits: Limits, guard: Optional[SsrfGuard] = None) -> aiohttp.TCPConnector:
+    """Pooled connector; with a ``guard`` it only dials addresses the guard has vetted."""
+    pool: dict[str, Any] = dict(limit=max(1, limits.max_concurrency_total),
+                                limit_per_host=max(1, limits.max_connections_per_host),
+                                keepalive_timeout=limits.keepalive_s)
+    if guard is not None:
+        return GuardedConnector(guard, **pool)
+    return aiohttp.TCPConnector(use_dns_cache=True, ttl_dns_cache=limits.dns_cache_ttl_s, **pool)
+
+
+def make_session(limits: Limits, timeouts: Timeouts, guard: Optional[SsrfGuard] = None,
+                 metrics: Optional[Metrics] = None) -> aiohttp.ClientSession:
+    """
+    One pooled, keep-alive session meant to be shared by every fetcher of a crawl; with
+    ``metrics`` its requests report DNS/connect/TTFB timings and per-host traffic.
+    """
+    return aiohttp.ClientSession(
+        connector=make_connector(limits, guard),
+        trace_configs=[metrics.trace_config()] if metrics is not None else None,
+        timeout=aiohttp.ClientTimeout(total=timeouts.total_s, connect=timeouts.connect_s,
+                                      sock_read=timeouts.read_s),
+    )
+
+
+@asynccontextmanager
+async def open_session(limits: Limits, timeouts: Timeouts,
+                       session: aiohttp.ClientSession | None = None,
+                       guard: Optional[SsrfGuard] = None,
+                       metrics: Optional[Metrics] = None
+                       ) -> AsyncIterator[aiohttp.ClientSession]:
+    """
+    Yield ``session`` if the caller already owns one, otherwise a crawl-scoped session
+    that is closed (connector included) when the block exits.
+    """
+    if session is not None:
+        yield session
+        return
+    owned = make_session(limits, timeouts, guard, metrics)
+    try:
+        yield owned
+    finally:
+        await owned.close()
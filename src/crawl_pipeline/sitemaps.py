@@ -0,0 +1,104 @@
+from __future__ import annotations
+import asyncio, zlib
+import xml.etree.ElementTree as ET
+from collections import deque
+from contextlib import aclosing
+from typing import Any, AsyncGenerator, AsyncIterator, Optional
+
+import aiohttp
+
+from .budget import CHUNK_BYTES, BudgetExceeded, ByteBudget
+from .config import Timeouts
+from .logging import log
+from .politeness import HostScheduler, host_of
+
+MAX_SITEMAP_BYTES = 50 * 1024 * 1024  # the protocol's cap on an uncompressed sitemap
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+def _entries(parser: ET.XMLPullParser[ET.Element], state: dict[str, Any]
+             ) -> list[tuple[str, str]]:
+    out = []
+    for event in parser.read_events():
+        elem = event[-1]
+        if not isinstance(elem, ET.Element):
+            continue  # namespace events, which the parser is not asked for
+        if event[0] == "start":
+            state.setdefault("root", elem)
+            continue
+        tag = elem.tag.rpartition("}")[2]
+        if tag == "loc":
+            state["loc"] = (elem.text or "").strip()
+        elif tag in ("url", "sitemap"):
+            loc = state.pop("loc", "")
+            if loc:
+                out.append((tag, loc))
+            state["root"].clear()  # finished entries are dropped: memory stays flat
+    return out
+
+
+async def _read_sitemap(url: str, *, session: aiohttp.ClientSession, timeouts: Timeouts,
+                        budget: Optional[ByteBudget]
+                        ) -> AsyncGenerator[tuple[str, str], None]:
+    """("url" | "sitemap", loc) pairs of one sitemap, parsed as its bytes arrive."""
+    timeout = aiohttp.ClientTimeout(total=timeouts.total_s, connect=timeouts.connect_s,
+                                    sock_read=timeouts.read_s)
+    async with session.get(url, timeout=timeout) as resp:
+        resp.raise_for_status()
+        chunks: AsyncIterator[bytes] = resp.content.iter_chunked(CHUNK_BYTES)
+        if budget is not None:
+            budget.admit(url, resp.content_length)
+            chunks = budget.meter(url, chunks)
+        parser: ET.XMLPullParser[ET.Element] = ET.XMLPullParser(events=("start", "end"))
+        state: dict[str, Any] = {}
+        inflate = None
+        size = 0
+        async for chunk in chunks:
+            if size == 0 and inflate is None and chunk.startswith(_GZIP_MAGIC):
+                inflate = zlib.decompressobj(wbits=31)  # .xml.gz served as-is, not as an encoding
+            if inflate is not None:
+                chunk = inflate.decompress(chunk, MAX_SITEMAP_BYTES - size + 1)
+            size += len(chunk)
+            if size > MAX_SITEMAP_BYTES:
+                raise ValueError(f"sitemap exceeds {MAX_SITEMAP_BYTES} bytes uncompressed")
+            parser.feed(chunk)
+            for entry in _entries(parser, state):
+                yield entry
+        parser.close()
+        for entry in _entries(parser, state):
+            yield entry
+
+
+async def iter_sitemap(url: str, *, session: aiohttp.ClientSession,
+                       timeouts: Timeouts = Timeouts(), budget: Optional[ByteBudget] = None,
+                       scheduler: Optional[HostScheduler] = None, max_urls: int = 100_000,
+                       max_sitemaps: int = 1_000) -> AsyncGenerator[str, None]:
+    """
+    Page URLs listed in the sitemap at ``url``, streamed: sitemap indexes are followed
+    (each sitemap fetched once, ``max_sitemaps`` at most), gzip is inflated on the fly and
+    nothing but the current entry is held in memory. A sitemap that fails to download or
+    parse is skipped with what it yielded so far.
+    """
+    queue = deque([url])
+    known = {url}
+    taken = 0
+    while queue and taken < max_urls:
+        current = queue.popleft()
+        if scheduler is not None:
+            await scheduler.acquire(host_of(current))
+        try:
+            async with aclosing(_read_sitemap(current, session=session, timeouts=timeouts,
+                                              budget=budget)) as entries:
+                async for kind, loc in entries:
+                    if kind == "sitemap":
+                        if loc not in known and len(known) < max_sitemaps:
+                            known.add(loc)
+                            queue.append(loc)
+                        continue
+                    yield loc
+                    taken += 1
+                    if taken >= max_urls:
+                        return
+        except (aiohttp.ClientError, asyncio.TimeoutError, ET.ParseError, zlib.error,
+                ValueError, BudgetExceeded) as e:
+            log("sitemap_failed", url=current, error=str(e))
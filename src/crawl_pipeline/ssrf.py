@@ -0,0 +1,142 @@
+from __future__ import annotations
+import asyncio, ipaddress, socket, time
+from typing import Any, Callable, Iterable, Optional, Sequence
+from urllib.parse import urlsplit
+
+import aiohttp
+from aiohttp.abc import AbstractResolver, ResolveResult
+from aiohttp.tracing import Trace
+
+from .url_utils import PRIVATE_NETS
+
+_Net = ipaddress.IPv4Network | ipaddress.IPv6Network
+
+
+class SsrfBlocked(PermissionError):
+    """A host resolves to, or is, an address on a blocked network."""
+
+    status = 403  # a refusal, not a transient failure: async_retry gives up at once
+
+    def __init__(self, host: str, ip: str) -> None:
+        super().__init__(f"Blocked private/link-local address {ip} for {host}")
+        self.host = host
+        self.ip = ip
+
+
+def _literal(host: str) -> Optional[ipaddress.IPv4Address | ipaddress.IPv6Address]:
+    try:
+        return ipaddress.ip_address(host.strip("[]"))
+    except ValueError:
+        return None
+
+
+class SsrfGuard(AbstractResolver):
+    """
+    DNS resolver that refuses hosts on blocked networks, with a per-host TTL cache.
+
+    Plugged into the crawl's connector (``make_connector(limits, guard=...)``), it is the
+    only source of addresses the connector dials: a host is resolved and checked against
+    ``blocked`` once per ``ttl_s``, and connections go to exactly the addresses that were
+    checked, so a second, rebinding DNS answer is never consulted. Concurrent lookups of
+    one host share a single query; refusals are cached like answers.
+
+    ``check(url)`` runs the same test ahead of a request, costing a dict lookup once the
+    host is cached, and raises SsrfBlocked directly instead of a connection error. It is
+    all a caller-owned session not built with the guard (``make_session``) gets.
+    """
+
+    def __init__(self, *, ttl_s: float = 300.0, blocked: Iterable[_Net] = PRIVATE_NETS,
+                 resolver: Optional[AbstractResolver] = None,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.ttl_s = ttl_s
+        self.blocked = tuple(blocked)
+        self._resolver = resolver
+        self._clock = clock
+        self._cache: dict[tuple[str, int], tuple[float, list[ResolveResult] | SsrfBlocked]] = {}
+        self._pending: dict[tuple[str, int],
+                            asyncio.Future[list[ResolveResult] | SsrfBlocked]] = {}
+        self.lookups = 0
+
+    def is_blocked(self, ip: ipaddress.IPv4Address | ipaddress.IPv6Address) -> bool:
+        if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+            ip = ip.ipv4_mapped
+        return any(ip in net for net in self.blocked)
+
+    def check_ip(self, host: str) -> None:
+        ip = _literal(host)
+        if ip is not None and self.is_blocked(ip):
+            raise SsrfBlocked(host, str(ip))
+
+    async def check(self, url: str) -> None:
+        host = urlsplit(url).hostname
+        if not host:
+            return
+        if _literal(host) is not None:
+            self.check_ip(host)
+        else:
+            await self.resolve(host, 0, socket.AF_UNSPEC)
+
+    async def _lookup(self, host: str, family: socket.AddressFamily
+                      ) -> list[ResolveResult] | SsrfBlocked:
+        if self._resolver is None:
+            self._resolver = aiohttp.DefaultResolver()
+        self.lookups += 1
+        addrs = await self._resolver.resolve(host, 0, family)
+        for a in addrs:
+            ip = _literal(a["host"])
+            if ip is not None and self.is_blocked(ip):
+                return SsrfBlocked(host, a["host"])
+        return addrs
+
+    async def _settle(self, key: tuple[str, int], family: socket.AddressFamily
+                      ) -> list[ResolveResult] | SsrfBlocked:
+        try:
+            result = await self._lookup(key[0], family)
+        finally:
+            del self._pending[key]
+        # DNS failures propagate uncached; answers and refusals are kept for ttl_s
+        self._cache[key] = (self._clock() + self.ttl_s, result)
+        return result
+
+    async def resolve(self, host: str, port: int = 0,
+                      family: socket.AddressFamily = socket.AF_INET) -> list[ResolveResult]:
+        key = (host.lower(), int(family))
+        hit = self._cache.get(key)
+        if hit is None or hit[0] <= self._clock():
+            fut = self._pending.get(key)
+            if fut is None:
+                # detached from its first caller: one waiter's cancellation (a connect
+                # timeout, shutdown) must not cancel the lookup the others wait on
+                fut = asyncio.ensure_future(self._settle(key, family))
+                fut.add_done_callback(_retrieve)
+                self._pending[key] = fut
+            hit = (0.0, await asyncio.shield(fut))
+        result = hit[1]
+        if isinstance(result, SsrfBlocked):
+            raise result
+        return [{**a, "hostname": host, "port": port} for a in result]
+
+    async def close(self) -> None:
+        if self._resolver is not None:
+            await self._resolver.close()
+
+
+def _retrieve(fut: asyncio.Future[Any]) -> None:
+    """Mark a lookup's error as seen: every caller may have given up on it."""
+    if not fut.cancelled():
+        fut.exception()
+
+
+class GuardedConnector(aiohttp.TCPConnector):
+    """TCPConnector whose every address comes from an SsrfGuard, IP-literal URLs included."""
+
+    def __init__(self, guard: SsrfGuard, **kwargs: Any) -> None:
+        # the guard's cache is the DNS cache: a second one could outlive its checks
+        super().__init__(resolver=guard, use_dns_cache=False, **kwargs)
+        self.guard = guard
+
+    async def _resolve_host(self, host: str, port: int,
+                            traces: Optional[Sequence[Trace]] = None) -> list[ResolveResult]:
+        # aiohttp hands IP literals straight to the socket, bypassing the resolver
+        self.guard.check_ip(host)
+        return await super()._resolve_host(host, port, traces=traces)
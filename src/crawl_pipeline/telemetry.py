@@ -0,0 +1,220 @@
+from __future__ import annotations
+import bisect, contextvars, os, time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any, Iterator, Optional
+
+import aiohttp
+
+STAGES = ("dns", "connect", "ttfb", "body", "extract", "store")
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_Key = tuple[str, tuple[tuple[str, str], ...]]
+
+
+@dataclass
+class _Histogram:
+    counts: list[int]
+    total: float = 0.0
+    count: int = 0
+
+    def observe(self, value: float, bounds: tuple[float, ...]) -> None:
+        self.counts[bisect.bisect_left(bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+@dataclass
+class ItemTrace:
+    """What the HTTP trace learns about the frontier item being processed."""
+    url: str
+    started: float = field(default_factory=time.perf_counter)
+    headers_at: Optional[float] = None
+    retries: int = 0
+
+
+_current: contextvars.ContextVar[Optional[ItemTrace]] = contextvars.ContextVar(
+    "crawl_item", default=None)
+
+
+def current() -> Optional[ItemTrace]:
+    return _current.get()
+
+
+def note_retry() -> None:
+    """Count a retry against the item being processed, if any (called by async_retry)."""
+    item = _current.get()
+    if item is not None:
+        item.retries += 1
+
+
+@contextmanager
+def tracing(url: str) -> Iterator[ItemTrace]:
+    """Make ``url`` the current item of this task, so HTTP trace events land on it."""
+    item = ItemTrace(url)
+    token = _current.set(item)
+    try:
+        yield item
+    finally:
+        _current.reset(token)
+
+
+def _key(name: str, labels: dict[str, Any]) -> _Key:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs: tuple[tuple[str, str], ...]) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}" if pairs else ""
+
+
+def _num(v: float) -> str:
+    return str(int(v)) if float(v).is_integer() else repr(float(v))
+
+
+class Metrics:
+    """
+    Counters, gauges and histograms for one crawl, cheap enough for the hot path: an
+    update is a dict lookup and an add. Meant to be touched from the event loop only.
+
+    ``crawl_stage_seconds{stage=...}`` times the stages of ``STAGES``: dns, connect
+    (TCP and TLS) and ttfb come from ``trace_config`` on the crawl's session, body is
+    headers to last byte, extract is link extraction and store the save. Per-host
+    traffic is in ``crawl_responses_total`` and ``crawl_bytes_total`` (counted by the
+    crawl's budget.ByteBudget as bytes are metered).
+
+    ``render_prometheus`` gives the text exposition format; ``snapshot`` a dict for the
+    JSONL log (logging.log).
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self._counters: dict[_Key, float] = {}
+        self._gauges: dict[_Key, float] = {}
+        self._hists: dict[_Key, _Histogram] = {}
+
+    def inc(self, name: str, n: float = 1, **labels: Any) -> None:
+        key = _key(name, labels)
+        self._counters[key] = self._counters.get(key, 0) + n
+
+    def set(self, name: str, value: float, **labels: Any) -> None:
+        self._gauges[_key(name, labels)] = value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        key = _key(name, labels)
+        h = self._hists.get(key)
+        if h is None:
+            h = self._hists[key] = _Histogram([0] * (len(self.buckets) + 1))
+        h.observe(value, self.buckets)
+
+    def stage(self, stage: str, seconds: float) -> None:
+        self.observe("crawl_stage_seconds", seconds, stage=stage)
+
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage(stage, time.perf_counter() - t0)
+
+    def counter(self, name: str, **labels: Any) -> float:
+        return self._counters.get(_key(name, labels), 0)
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        """aiohttp hooks feeding the dns/connect/ttfb stages and per-host traffic."""
+        tc = aiohttp.TraceConfig()
+        clock = time.perf_counter
+
+        async def dns_start(session: aiohttp.ClientSession, ctx: SimpleNamespace,
+                         params: aiohttp.TraceDnsResolveHostStartParams) -> None:
+            ctx.dns_at = clock()
+
+        async def dns_end(session: aiohttp.ClientSession, ctx: SimpleNamespace,
+                       params: aiohttp.TraceDnsResolveHostEndParams) -> None:
+            self.stage("dns", clock() - ctx.dns_at)
+
+        async def connect_start(session: aiohttp.ClientSession, ctx: SimpleNamespace,
+                             params: aiohttp.TraceConnectionCreateStartParams) -> None:
+            ctx.connect_at = clock()
+
+        async def connect_end(session: aiohttp.ClientSession, ctx: SimpleNamespace,
+                           params: aiohttp.TraceConnectionCreateEndParams) -> None:
+            self.stage("connect", clock() - ctx.connect_at)
+
+        async def request_start(session: aiohttp.ClientSession, ctx: SimpleNamespace,
+                             params: aiohttp.TraceRequestStartParams) -> None:
+            ctx.sent_at = clock()
+
+        async def request_end(session: aiohttp.ClientSession, ctx: SimpleNamespace,
+                           params: aiohttp.TraceRequestEndParams) -> None:
+            now = clock()
+            self.stage("ttfb", now - ctx.sent_at)
+            self.inc("crawl_responses_total", host=params.url.host or "",
+                     status=params.response.status)
+            item = _current.get()
+            if item is not None:
+                item.headers_at = now
+
+        async def request_exception(session: aiohttp.ClientSession, ctx: SimpleNamespace,
+                                 params: aiohttp.TraceRequestExceptionParams) -> None:
+            self.inc("crawl_request_errors_total", host=params.url.host or "",
+                     error=type(params.exception).__name__)
+
+        tc.on_dns_resolvehost_start.append(dns_start)
+        tc.on_dns_resolvehost_end.append(dns_end)
+        tc.on_connection_create_start.append(connect_start)
+        tc.on_connection_create_end.append(connect_end)
+        tc.on_request_start.append(request_start)
+        tc.on_request_end.append(request_end)
+        tc.on_request_exception.append(request_exception)
+        return tc
+
+    def snapshot(self) -> dict[str, Any]:
+        def flat(key: _Key) -> str:
+            name, pairs = key
+            return name + _labels(pairs)
+
+        return {
+            "counters": {flat(k): v for k, v in self._counters.items()},
+            "gauges": {flat(k): v for k, v in self._gauges.items()},
+            "histograms": {flat(k): {"count": h.count, "sum": round(h.total, 6)}
+                           for k, h in self._hists.items()},
+        }
+
+    def render_prometheus(self) -> str:
+        lines: list[str] = []
+        typed: set[str] = set()
+
+        def header(name: str, kind: str) -> None:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, pairs), v in sorted(self._counters.items()):
+            header(name, "counter")
+            lines.append(f"{name}{_labels(pairs)} {_num(v)}")
+        for (name, pairs), v in sorted(self._gauges.items()):
+            header(name, "gauge")
+            lines.append(f"{name}{_labels(pairs)} {_num(v)}")
+        for (name, pairs), h in sorted(self._hists.items()):
+            header(name, "histogram")
+            cumulative = 0
+            for bound, n in zip((*self.buckets, float("inf")), h.counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else _num(bound)
+                lines.append(f"{name}_bucket{_labels((*pairs, ('le', le)))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(pairs)} {_num(h.total)}")
+            lines.append(f"{name}_count{_labels(pairs)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """Write for node_exporter's textfile collector (atomically, via a rename)."""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp, path)
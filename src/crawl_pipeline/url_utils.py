@@ -1,13 +1,17 @@
 from __future__ import annotations
 import ipaddress, socket
+from urllib.parse import unquote_plus, urlsplit
 from yarl import URL
 
 PRIVATE_NETS = [
+    ipaddress.ip_network('0.0.0.0/8'),
     ipaddress.ip_network('10.0.0.0/8'),
+    ipaddress.ip_network('100.64.0.0/10'),
     ipaddress.ip_network('172.16.0.0/12'),
     ipaddress.ip_network('192.168.0.0/16'),
     ipaddress.ip_network('127.0.0.0/8'),
     ipaddress.ip_network('169.254.0.0/16'),
+    ipaddress.ip_network('::/128'),
     ipaddress.ip_network('::1/128'),
     ipaddress.ip_network('fc00::/7'),
     ipaddress.ip_network('fe80::/10'),
@@ -23,6 +27,43 @@ def normalize(u: str) -> str:
         url = url.with_port(None)
     return str(url)
 
+# analytics/ad click identifiers: never part of what a page is
+TRACKING_PARAMS = (
+    "utm_*", "gclid", "gbraid", "wbraid", "dclid", "fbclid", "msclkid", "yclid", "twclid",
+    "mc_cid", "mc_eid", "_ga", "_gl", "igshid", "si",
+)
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+def _stripped(name: str, strip: tuple[str, ...]) -> bool:
+    name = name.lower()
+    return any(name.startswith(p[:-1]) if p.endswith("*") else name == p for p in strip)
+
+def _param(segment: str) -> str:
+    return unquote_plus(segment.split("=", 1)[0])
+
+def canonicalize(u: str, strip_params: tuple[str, ...] = TRACKING_PARAMS) -> str:
+    """
+    The identity of a URL for dedup, and what gets fetched: ``normalize`` plus a
+    lowercase scheme/host, the default port dropped only for its own scheme, an empty
+    path as ``/``, ``strip_params`` removed from the query (a trailing ``*`` matches a
+    prefix) and the rest ordered by name. Query segments are kept as written, never
+    decoded and re-encoded, so the URL still asks the server for the same thing.
+    """
+    url = URL(u)
+    if url.scheme not in _DEFAULT_PORTS:
+        raise ValueError("Only http/https are allowed")
+    if not url.raw_host:
+        raise ValueError(f"No host in {u!r}")
+    # yarl already lowercases scheme/host and omits a port equal to the scheme default,
+    # but normalizes the query it parses: take it from the URL as given
+    query = [seg for seg in urlsplit(u).query.split("&")
+             if seg and not _stripped(_param(seg), strip_params)]
+    query.sort(key=_param)  # stable: repeated parameters keep their order
+    # re-setting the path spells an empty one "/" and drops query and fragment
+    base = str(url.with_path(url.raw_path or "/", encoded=True))
+    return f"{base}?{'&'.join(query)}" if query else base
+
 def same_scope(root: str, candidate: str, *, same_domain: bool, under_path: bool) -> bool:
     r, c = URL(root), URL(candidate)
     if same_domain and r.host != c.host:
@@ -32,7 +73,7 @@ def same_scope(root: str, candidate: str, *, same_domain: bool, under_path: bool
     return True
 
 def guard_ssrf(host: str) -> None:
-    # Resolve host and deny private/link-local
+    # Resolve host and deny private/link-local. Blocking; crawls use ssrf.SsrfGuard
     try:
         _, _, addrs = socket.gethostbyname_ex(host)
     except Exception:
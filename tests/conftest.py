@@ -0,0 +1,46 @@
+import asyncio, io
+import pytest
+from crawl_pipeline import logging as crawl_log
+
+# page -> outlinks; a three-level binary tree
+SITE = {
+    "https://example.com/": ["/a", "/b"],
+    "https://example.com/a": ["/a1", "/a2"],
+    "https://example.com/b": ["/b1", "/b2"],
+}
+
+
+class FakeFetcher:
+    def __init__(self, delay=0.01):
+        self.delay = delay
+        self.order: list[str] = []
+        self.inflight = 0
+        self.peak = 0
+        self.sessions: set[int] = set()
+
+    async def fetch_html(self, url, timeouts=None, retry=None, session=None, scheduler=None,
+                         validators=None, budget=None):
+        self.sessions.add(id(session))
+        self.inflight += 1
+        self.peak = max(self.peak, self.inflight)
+        self.order.append(url)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.inflight -= 1
+        links = "".join(f'<a href="{link}">x</a>' for link in SITE.get(url, []))
+        return "text/html", f"<html>{links}</html>".encode()
+
+
+@pytest.fixture
+def fake_fetcher():
+    """``FakeFetcher``, the class: tests build one per crawl."""
+    return FakeFetcher
+
+
+@pytest.fixture(autouse=True)
+def crawl_events():
+    """The JSONL events a test logs, kept in a buffer instead of on the terminal."""
+    out = io.StringIO()
+    crawl_log.configure(stream=out)
+    return out
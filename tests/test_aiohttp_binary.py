@@ -0,0 +1,75 @@
+import asyncio
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from crawl_pipeline.adapters.aiohttp_binary import ObjectChanged, fetch_binary
+from crawl_pipeline.config import Limits, RetryPolicy, Timeouts
+
+DATA = bytes(range(256)) * 400  # 100 KiB
+
+
+def _app(stats, versions=lambda n: '"v1"'):
+    """``versions(n)``: the object's ETag when the n-th part is requested."""
+    async def handler(request):
+        rng = request.headers.get("Range")
+        etag = versions(stats["requests"])
+        if request.method == "HEAD" or not rng:
+            return web.Response(body=DATA, headers={"Accept-Ranges": "bytes", "ETag": etag},
+                                content_type="application/pdf")
+        if request.headers.get("If-Range") != etag:
+            stats["requests"] += 1
+            return web.Response(body=DATA, headers={"ETag": etag}, content_type="application/pdf")
+        start, end = (int(x) for x in rng.split("=")[1].split("-"))
+        stats["requests"] += 1
+        stats["inflight"] += 1
+        stats["peak"] = max(stats["peak"], stats["inflight"])
+        try:
+            await asyncio.sleep(0.01)
+            if start == 0 and not stats["failed"]:
+                stats["failed"] = True
+                return web.Response(status=503)
+        finally:
+            stats["inflight"] -= 1
+        return web.Response(status=206, body=DATA[start:end + 1],
+                            headers={"Content-Range": f"bytes {start}-{end}/{len(DATA)}",
+                                     "ETag": etag})
+
+    app = web.Application()
+    app.router.add_get("/f.pdf", handler)
+    return app
+
+
+def test_parallel_ranges_in_order_with_part_retry():
+    stats = {"inflight": 0, "peak": 0, "failed": False, "requests": 0}
+    limits = Limits(multipart_threshold=32 * 1024, multipart_chunk_size=10 * 1024,
+                    multipart_parallelism=3)
+
+    async def go():
+        async with TestServer(_app(stats)) as srv:
+            ct, body, clen = await fetch_binary(
+                str(srv.make_url("/f.pdf")), timeouts=Timeouts(), limits=limits,
+                retry=RetryPolicy(backoff_base_s=0.01, jitter_s=0))
+            return ct, b"".join([c async for c in body]), clen
+
+    ct, got, clen = asyncio.get_event_loop().run_until_complete(go())
+    assert ct == "application/pdf" and clen == len(DATA)
+    assert got == DATA
+    assert stats["peak"] == 3
+    assert stats["requests"] == 11  # 10 parts; only the failed one was fetched again
+
+
+def test_object_changing_mid_download_fails_it():
+    stats = {"inflight": 0, "peak": 0, "failed": True, "requests": 0}
+    limits = Limits(multipart_threshold=32 * 1024, multipart_chunk_size=10 * 1024,
+                    multipart_parallelism=1)
+
+    async def go():
+        async with TestServer(_app(stats, lambda n: '"v1"' if n < 4 else '"v2"')) as srv:
+            ct, body, clen = await fetch_binary(
+                str(srv.make_url("/f.pdf")), timeouts=Timeouts(), limits=limits,
+                retry=RetryPolicy(backoff_base_s=0.01, jitter_s=0))
+            return b"".join([c async for c in body])
+
+    with pytest.raises(ObjectChanged):
+        asyncio.get_event_loop().run_until_complete(go())
+    assert stats["requests"] == 5  # four parts of v1, then the If-Range miss; no retry
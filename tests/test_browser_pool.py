@@ -0,0 +1,112 @@
+import asyncio
+import pytest
+from crawl_pipeline.adapters.browser_pool import BrowserPool
+
+
+class FakePage:
+    live = 0
+    peak = 0
+
+    def __init__(self):
+        self.closed = False
+        self.visits = []
+
+    async def goto(self, url, **kw):
+        FakePage.live += 1
+        FakePage.peak = max(FakePage.peak, FakePage.live)
+        await asyncio.sleep(0.01)
+        FakePage.live -= 1
+        if "boom" in url:
+            raise RuntimeError("navigation failed")
+        self.visits.append(url)
+
+    async def content(self):
+        return f"<html>{self.visits[-1]}</html>"
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeContext:
+    def __init__(self):
+        self.routes = []
+        self.pages = []
+
+    async def route(self, pattern, handler):
+        self.routes.append(handler)
+
+    async def new_page(self):
+        self.pages.append(FakePage())
+        return self.pages[-1]
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.contexts = []
+        self.stopped = False
+
+    async def new_context(self):
+        self.contexts.append(FakeContext())
+        return self.contexts[-1]
+
+
+def _pool(browsers, **kw):
+    async def launch():
+        b = FakeBrowser()
+        browsers.append(b)
+
+        async def stop():
+            b.stopped = True
+        return b, stop
+    return BrowserPool(launch=launch, **kw)
+
+
+def test_one_browser_bounded_pages_recycled():
+    browsers = []
+    FakePage.peak = 0
+
+    async def go():
+        async with _pool(browsers, contexts=2, pages_per_context=2, recycle_after=3) as pool:
+            out = await asyncio.gather(*(pool.render(f"https://e.com/{i}") for i in range(24)))
+            return pool, out
+
+    pool, out = asyncio.get_event_loop().run_until_complete(go())
+    assert out[5] == "<html>https://e.com/5</html>"
+    assert len(browsers) == 1 and browsers[0].stopped
+    assert len(browsers[0].contexts) == 2
+    assert FakePage.peak == 4
+    pages = [p for c in browsers[0].contexts for p in c.pages]
+    assert max(len(p.visits) for p in pages) == 3  # 24 renders over 4 slots -> 8 pages
+    assert len(pages) == pool.pages_opened == 8
+    assert sum(p.closed for p in pages) == 4  # the last four go down with the browser
+
+
+def test_failed_page_replaced_and_blocking():
+    browsers = []
+
+    class Route:
+        def __init__(self, kind):
+            self.request = type("R", (), {"resource_type": kind})()
+            self.result = None
+
+        async def abort(self):
+            self.result = "abort"
+
+        async def continue_(self):
+            self.result = "continue"
+
+    async def go():
+        async with _pool(browsers, contexts=1, pages_per_context=1) as pool:
+            with pytest.raises(RuntimeError):
+                await pool.render("https://e.com/boom")
+            await pool.render("https://e.com/ok")
+            handler = browsers[0].contexts[0].routes[0]
+            routes = [Route(k) for k in ("image", "font", "media", "document", "script")]
+            for r in routes:
+                await handler(r)
+            return [r.result for r in routes]
+
+    results = asyncio.get_event_loop().run_until_complete(go())
+    assert results == ["abort", "abort", "abort", "continue", "continue"]
+    first, second = browsers[0].contexts[0].pages
+    assert first.closed and second.visits == ["https://e.com/ok"]
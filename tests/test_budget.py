@@ -0,0 +1,90 @@
+import asyncio
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from crawl_pipeline.adapters import storage_fs
+from crawl_pipeline.adapters.aiohttp_binary import fetch_binary
+from crawl_pipeline.adapters.simple_html_fetcher import SimpleHtmlFetcher
+from crawl_pipeline.budget import BudgetExceeded, ByteBudget
+from crawl_pipeline.config import RetryPolicy, Timeouts
+
+RETRY = RetryPolicy(max_attempts=3, backoff_base_s=0.01, jitter_s=0)
+
+
+async def _chunks(n, size):
+    for _ in range(n):
+        yield b"x" * size
+
+
+def _drain(budget, url, n, size):
+    async def go():
+        return [c async for c in budget.meter(url, _chunks(n, size))]
+    return asyncio.get_event_loop().run_until_complete(go())
+
+
+def test_admit_and_meter():
+    b = ByteBudget(max_total=100, max_item=40)
+    with pytest.raises(BudgetExceeded):
+        b.admit("u", 41)
+    assert len(_drain(b, "a", 3, 10)) == 3
+    with pytest.raises(BudgetExceeded):
+        _drain(b, "b", 5, 10)  # cut at the fifth chunk
+    assert b.used == 70
+    with pytest.raises(BudgetExceeded):
+        b.admit("c", 31)  # fits the item cap, not what is left
+    with pytest.raises(BudgetExceeded):
+        _drain(b, "d", 4, 10)
+    assert b.exhausted
+
+
+def _app(hits):
+    async def big(request):
+        hits.append(request.method)
+        if request.method == "HEAD":
+            return web.Response(content_type="application/pdf")
+        resp = web.StreamResponse(headers={"Content-Type": "application/pdf"})
+        await resp.prepare(request)  # chunked: no Content-Length to refuse up front
+        for _ in range(64):
+            await resp.write(b"y" * 4096)
+        return resp
+
+    async def page(request):
+        hits.append(request.method)
+        return web.Response(text="<html>" + "z" * 10_000 + "</html>", content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/big.pdf", big)
+    app.router.add_get("/page", page)
+    return app
+
+
+def test_stream_aborted_mid_download_leaves_nothing(tmp_path):
+    hits = []
+    budget = ByteBudget(max_total=10**9, max_item=32 * 1024)
+
+    async def go():
+        async with TestServer(_app(hits)) as srv:
+            url = str(srv.make_url("/big.pdf"))
+            _, chunks, _ = await fetch_binary(url, timeouts=Timeouts(), retry=RETRY, budget=budget)
+            await storage_fs.save_stream(chunks=chunks, url=url, canonical_type="pdf",
+                                         root=str(tmp_path))
+
+    with pytest.raises(BudgetExceeded):
+        asyncio.get_event_loop().run_until_complete(go())
+    assert budget.used <= 32 * 1024
+    assert not [p for p in tmp_path.rglob("*") if p.is_file()]
+    assert hits.count("GET") == 1  # refused, not retried
+
+
+def test_html_refused_on_content_length():
+    hits = []
+    budget = ByteBudget(max_total=10**9, max_item=1024)
+
+    async def go():
+        async with TestServer(_app(hits)) as srv:
+            await SimpleHtmlFetcher().fetch_html(str(srv.make_url("/page")), Timeouts(), RETRY,
+                                                 budget=budget)
+
+    with pytest.raises(BudgetExceeded):
+        asyncio.get_event_loop().run_until_complete(go())
+    assert budget.used == 0 and hits == ["GET"]
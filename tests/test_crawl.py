@@ -0,0 +1,110 @@
+import asyncio, hashlib
+from contextlib import aclosing
+from crawl_pipeline.cli import BasicLinkExtractor
+from crawl_pipeline.config import Limits
+from crawl_pipeline.models import CrawlRequest
+from crawl_pipeline.pipeline.crawl import iter_crawl, run_crawl
+
+
+async def _save(url, html):
+    return {"url": url}
+
+
+def _run(fetcher, **limits):
+    req = CrawlRequest(url="https://example.com/", depth=2, limits=Limits(**limits))
+    return asyncio.get_event_loop().run_until_complete(
+        run_crawl(req, html_fetcher=fetcher, fetch_and_save_html=_save,
+                  link_extractor=BasicLinkExtractor(), limits=req.limits))
+
+
+def test_breadth_first_and_complete(fake_fetcher):
+    f = fake_fetcher()
+    saved = _run(f, max_concurrency_total=1)
+    assert len(saved) == 7
+    depths = [0 if u.endswith("/") else len(u.rsplit("/", 1)[1]) for u in f.order]
+    assert depths == sorted(depths)
+
+
+def test_html_concurrency_bounded(fake_fetcher):
+    f = fake_fetcher()
+    _run(f, max_concurrency_total=16, max_concurrency_html=2)
+    assert f.peak == 2
+
+
+def test_stops_at_max_files_and_pages(fake_fetcher):
+    assert len(_run(fake_fetcher(), max_files=3)) == 3
+    f = fake_fetcher()
+    _run(f, max_pages=4)
+    assert len(f.order) == 4
+
+
+def test_single_shared_session(fake_fetcher):
+    f = fake_fetcher()
+    _run(f)
+    assert len(f.sessions) == 1
+
+
+def test_iter_crawl_streams_with_backpressure(fake_fetcher):
+    f = fake_fetcher(delay=0.001)
+    req = CrawlRequest(url="https://example.com/", depth=2)
+
+    async def main():
+        items = iter_crawl(req, buffer=1, html_fetcher=f, fetch_and_save_html=_save,
+                           link_extractor=BasicLinkExtractor(), limits=req.limits)
+        async with aclosing(items):
+            first = await items.__anext__()
+            await asyncio.sleep(0.1)  # not consuming: one item buffered, the rest wait
+            stalled = len(f.order)
+            rest = [item async for item in items]
+        return first, stalled, rest
+
+    first, stalled, rest = asyncio.get_event_loop().run_until_complete(main())
+    assert first.url == "https://example.com/" and first.depth == 0
+    assert stalled < 7
+    assert len(rest) == 6
+
+
+def test_iter_crawl_stops_when_the_consumer_does(fake_fetcher):
+    f = fake_fetcher()
+    req = CrawlRequest(url="https://example.com/", depth=2)
+
+    async def main():
+        items = iter_crawl(req, html_fetcher=f, fetch_and_save_html=_save,
+                           link_extractor=BasicLinkExtractor(), limits=req.limits)
+        async with aclosing(items):
+            async for _ in items:
+                break
+        await asyncio.sleep(0.05)
+
+    asyncio.get_event_loop().run_until_complete(main())
+    assert len(f.order) < 7
+
+
+def test_cancelled_consumer_leaves_no_tasks_behind(fake_fetcher):
+    f = fake_fetcher(delay=0.5)
+    req = CrawlRequest(url="https://example.com/", depth=2)
+
+    async def consume():
+        items = iter_crawl(req, html_fetcher=f, fetch_and_save_html=_save,
+                           link_extractor=BasicLinkExtractor(), limits=req.limits)
+        async with aclosing(items):
+            async for _ in items:
+                pass
+
+    async def main():
+        consumer = asyncio.ensure_future(consume())
+        await asyncio.sleep(0.05)  # the consumer waits inside iter_crawl for the first item
+        consumer.cancel()
+        await asyncio.gather(consumer, return_exceptions=True)
+        return [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+
+    assert asyncio.get_event_loop().run_until_complete(main()) == []
+
+
+def test_saved_items_describe_what_was_stored(fake_fetcher):
+    saved = {i.url: i for i in _run(fake_fetcher())}
+    a1 = saved["https://example.com/a1"]
+    assert a1.parent == "https://example.com/a" and a1.depth == 2 and a1.type == "html"
+    assert a1.size == len(b"<html></html>")
+    assert a1.sha256 == hashlib.sha256(b"<html></html>").hexdigest()
+    assert a1.elapsed_ms >= 0 and a1.fetched_at > 0
@@ -0,0 +1,52 @@
+import asyncio
+from crawl_pipeline.cli import BasicLinkExtractor
+from crawl_pipeline.models import CrawlRequest
+from crawl_pipeline.pipeline.crawl import run_crawl
+from crawl_pipeline.pipeline.journal import CrawlJournal
+
+
+async def _save(url, html):
+    return {"url": url}
+
+
+def _crawl(journal, fetcher):
+    req = CrawlRequest(url="https://example.com/", depth=2)
+    return run_crawl(req, html_fetcher=fetcher, fetch_and_save_html=_save,
+                     link_extractor=BasicLinkExtractor(), limits=req.limits, journal=journal)
+
+
+def test_interrupted_crawl_resumes(tmp_path, fake_fetcher):
+    path = str(tmp_path / "j.sqlite")
+    first = fake_fetcher()
+
+    async def interrupted(journal):
+        task = asyncio.ensure_future(_crawl(journal, first))
+        while len(first.order) < 3:  # root done, its two children in flight
+            await asyncio.sleep(0.001)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    loop = asyncio.get_event_loop()
+    with CrawlJournal(path) as journal:
+        loop.run_until_complete(interrupted(journal))
+    assert len(first.order) < 7
+
+    with CrawlJournal(path) as journal:
+        assert not journal.is_complete()
+        done_before = {r["url"] for r in journal.saved_items()}
+        second = fake_fetcher()
+        saved = loop.run_until_complete(_crawl(journal, second))
+        assert journal.is_complete()
+    assert done_before and not done_before & set(second.order)
+    assert len({r.url for r in saved}) == 7
+
+
+def test_finished_journal_starts_fresh(tmp_path, fake_fetcher):
+    path = str(tmp_path / "j.sqlite")
+    loop = asyncio.get_event_loop()
+    with CrawlJournal(path) as journal:
+        loop.run_until_complete(_crawl(journal, fake_fetcher()))
+    with CrawlJournal(path) as journal:
+        again = fake_fetcher()
+        assert len(loop.run_until_complete(_crawl(journal, again))) == 7
+    assert len(again.order) == 7
@@ -0,0 +1,59 @@
+import asyncio, threading
+from concurrent.futures import ThreadPoolExecutor
+from crawl_pipeline.adapters.links_basic import extract as extract_basic
+from crawl_pipeline.adapters.links_fast import LinkScanner, extract, extract_anchors
+from crawl_pipeline.pipeline.crawl import _ExtractPool
+
+PAGE = b"""<html><head><base href="https://cdn.example.com/docs/">
+<link rel="alternate" href="feed.xml"></head><body>
+<a href="a.html">a</a> <A HREF='/b?x=1&amp;y=2'>b</A> <a data-href="no" href=c>c</a>
+<!-- <a href="commented.html"> -->
+<area shape="rect" href="map.html"><iframe src="https://other.example/embed"></iframe>
+<a href="#top">top</a><a href="mailto:x@y">m</a><a href="JavaScript:void(0)">j</a>
+</body></html>"""
+
+EXPECTED = [
+    "https://cdn.example.com/docs/feed.xml",
+    "https://cdn.example.com/docs/a.html",
+    "https://cdn.example.com/b?x=1&y=2",
+    "https://cdn.example.com/docs/c",
+    "https://cdn.example.com/docs/map.html",
+    "https://other.example/embed",
+]
+
+
+def test_extract_sources_and_base():
+    assert extract("https://example.com/page", PAGE) == EXPECTED
+
+
+def test_chunked_feed_matches_whole():
+    for size in (1, 7, 64):
+        s = LinkScanner("https://example.com/page")
+        for i in range(0, len(PAGE), size):
+            s.feed(PAGE[i:i + size])
+        assert s.links() == EXPECTED
+
+
+def test_agrees_with_basic_on_plain_anchors():
+    html = b"".join(b'<a href="/p/%d">x</a>' % i for i in range(50))
+    assert extract("https://example.com/", html) == extract_basic("https://example.com/", html)
+
+
+def test_offload_large_pages():
+    big = PAGE * 10
+    with ThreadPoolExecutor(1) as pool:
+        offload = _ExtractPool(1024, pool)
+        got = asyncio.get_event_loop().run_until_complete(
+            offload.run(extract, len(big), "https://example.com/page", big))
+        small = asyncio.get_event_loop().run_until_complete(
+            offload.run(threading.get_ident, 10))
+    assert got == EXPECTED * 10
+    assert small == threading.get_ident()  # small pages stay on the loop's thread
+
+
+def test_anchor_text_pairs_with_links():
+    html = (b'<a href="r.pdf"><b>Annual</b> &amp;\n Report</a><link href="/s.css">'
+            b'<a href="#top">up</a><a href="/z">')
+    assert extract_anchors("https://example.com/d/", html) == [
+        ("https://example.com/d/r.pdf", "Annual & Report"), ("https://example.com/s.css", ""),
+        ("https://example.com/z", "")]
@@ -0,0 +1,43 @@
+import pytest
+from crawl_pipeline.manifest import ManifestWriter, read_manifest
+from crawl_pipeline.models import SavedItem
+
+
+def _items(n):
+    for i in range(n):
+        host = "a.com" if i % 2 else "b.org"
+        typ = "pdf" if i % 3 == 0 else "html"
+        yield SavedItem(url=f"https://{host}/{i}.{typ}", path=f"/data/{host}/{i}.{typ}",
+                        type=typ, content_type=f"application/{typ}", size=i * 10,
+                        sha256=f"{i:064x}", parent=f"https://{host}/", depth=1,
+                        fetched_at=1700000000.0 + i, elapsed_ms=12.5)
+
+
+@pytest.mark.parametrize("name", ["m.jsonl", "m.jsonl.gz", "m.jsonl.zst"])
+def test_round_trip_in_batches_and_appends(tmp_path, name):
+    path = str(tmp_path / name)
+    with ManifestWriter(path, batch=7) as w:
+        w.write_many(_items(20))
+    with ManifestWriter(path) as w:  # a second run appends
+        w.write(SavedItem(url="https://c.net/x", path=None))
+    items = list(read_manifest(path))
+    assert items[:20] == list(_items(20))
+    assert items[20].url == "https://c.net/x" and items[20].path is None
+
+
+def test_filters_by_host_and_type(tmp_path):
+    path = str(tmp_path / "m.jsonl.zst")
+    with ManifestWriter(path) as w:
+        w.write_many(_items(30))
+    pdfs_on_a = list(read_manifest(path, host="a.com", type="pdf"))
+    assert pdfs_on_a == [i for i in _items(30) if i.type == "pdf" and "a.com" in i.url]
+    assert len(list(read_manifest(path, host="b.org"))) == 15
+    assert list(read_manifest(path, host="a.co")) == []
+
+
+def test_rows_do_not_repeat_keys(tmp_path):
+    path = tmp_path / "m.jsonl"
+    with ManifestWriter(str(path)) as w:
+        w.write_many(_items(3))
+    header, *rows = path.read_text().splitlines()
+    assert '"fields"' in header and all(r.startswith('["https://') for r in rows)
@@ -0,0 +1,103 @@
+import asyncio, hashlib, random
+from crawl_pipeline.cli import BasicLinkExtractor
+from crawl_pipeline.config import FrontierPolicy, Limits, NearDupPolicy
+from crawl_pipeline.models import CrawlRequest
+from crawl_pipeline.pipeline.crawl import run_crawl
+from crawl_pipeline.pipeline.neardup import (
+    NearDuplicates, SimHashIndex, simhash, url_shape, words,
+)
+from crawl_pipeline.pipeline.priority import Priority
+
+rng = random.Random(3)
+VOCAB = [f"w{i}" for i in range(400)]
+LISTING = [rng.choice(VOCAB) for _ in range(200)]
+ABOUT = [rng.choice(VOCAB) for _ in range(200)]
+
+
+def _page(tokens, links=()):
+    anchors = "".join(f'<a href="{link}">x</a>' for link in links)
+    return f"<html><script>var x = 1;</script><p>{' '.join(tokens)}</p>{anchors}</html>".encode()
+
+
+# a shoe listing served under five sort orders, each linking pages only it would lead to
+SITE = {"https://example.com/": _page(["home"], ["/shoes"] + [f"/shoes?sort={i}" for i in range(5)]
+                                      + ["/about"]),
+        "https://example.com/shoes": _page(LISTING, ["/shoe/1"]),
+        "https://example.com/about": _page(ABOUT)}
+for i in range(5):
+    SITE[f"https://example.com/shoes?sort={i}"] = _page(LISTING[:150] + ["sorted", str(i)]
+                                                        + LISTING[150:], [f"/hidden/{i}"])
+
+
+class SiteFetcher:
+    def __init__(self):
+        self.order: list[str] = []
+
+    async def fetch_html(self, url, **kwargs):
+        self.order.append(url)
+        return "text/html", SITE.get(url, _page(["gone"]))
+
+
+async def _save(url, html):
+    return {"url": url}
+
+
+def test_words_and_fingerprints():
+    assert words(b"<style>p{}</style><p>Hello &amp; <b>World</b></p><!-- x -->") == ["hello",
+                                                                                    "world"]
+    near = simhash(LISTING[:150] + ["sorted", "1"] + LISTING[150:])
+    assert (simhash(LISTING) ^ near).bit_count() <= 3
+    assert (simhash(LISTING) ^ simhash(ABOUT)).bit_count() > 10
+    assert NearDuplicates(NearDupPolicy()).fingerprint(b"<p>too few words</p>") is None
+
+
+def test_simhash_is_the_bitwise_majority_of_shingle_hashes():
+    tokens = LISTING[:40]
+    grams = {" ".join(tokens[i:i + 3]) for i in range(len(tokens) - 2)}
+    hashes = [int.from_bytes(hashlib.blake2b(g.encode(), digest_size=8).digest(), "little")
+              for g in grams]
+    majority = sum(1 << b for b in range(64)
+                   if sum(h >> b & 1 for h in hashes) > len(hashes) / 2)
+    assert simhash(tokens) == majority
+
+
+def test_index_finds_fingerprints_within_distance():
+    index = SimHashIndex(max_distance=3)
+    index.add(0b1011 << 40, "https://a.com/x")
+    assert index.find((0b1011 << 40) ^ 0b111) == "https://a.com/x"  # three bits off
+    assert index.find((0b1011 << 40) ^ 0b1111) is None
+    assert len(index) == 1
+
+
+def test_url_shape():
+    shape = url_shape("https://a.com/item/123/print?sid=9&sort=x&sid=2")
+    assert shape == "a.com/item/*/print?sid&sort"
+    assert url_shape("https://a.com/shoes") == "a.com/shoes"
+
+
+def test_near_duplicates_are_neither_stored_nor_followed():
+    req = CrawlRequest(url="https://example.com/", depth=2, near_dups=NearDupPolicy(enabled=True),
+                       limits=Limits(max_concurrency_total=1))
+    f = SiteFetcher()
+    saved = asyncio.get_event_loop().run_until_complete(
+        run_crawl(req, html_fetcher=f, fetch_and_save_html=_save,
+                  link_extractor=BasicLinkExtractor(), limits=req.limits))
+    assert sorted(s.url for s in saved) == ["https://example.com/", "https://example.com/about",
+                                            "https://example.com/shoe/1",
+                                            "https://example.com/shoes"]
+    assert not any("/hidden/" in u for u in f.order)
+
+
+def test_shapes_producing_duplicates_are_demoted():
+    nd = NearDuplicates(NearDupPolicy(demote_after=3))
+    priority = Priority.from_policy(FrontierPolicy(), [nd])
+    shoes = "https://example.com/shoes"
+    assert nd.check(shoes, nd.fingerprint(SITE[shoes])) is None
+    for i in range(3):
+        url = f"https://example.com/shoes?sort={i}"
+        assert nd.check(url, nd.fingerprint(SITE[url])) == "https://example.com/shoes"
+    assert nd.learned == {"example.com/shoes?sort"}
+    demoted = priority.rank("https://example.com/shoes?sort=9", 1)
+    assert priority.rank("https://example.com/shoe/2", 1) < demoted  # last of its level
+    assert demoted < priority.rank("https://example.com/shoe/3", 2)  # but still breadth-first
+    assert priority.rank("https://example.com/a", 1) < priority.rank("https://example.com/b", 2)
@@ -0,0 +1,84 @@
+import asyncio
+import pytest
+from crawl_pipeline.backoff import async_retry
+from crawl_pipeline.config import Politeness
+from crawl_pipeline.politeness import HostScheduler, parse_retry_after
+
+
+class Clock:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+
+def _sched(**kw):
+    clock = Clock()
+    return HostScheduler(Politeness(host_rate_per_s=2.0, host_burst=2, **kw), clock=clock), clock
+
+
+def test_token_bucket_per_host():
+    s, clock = _sched()
+    for _ in range(2):
+        assert s.delay("a") == 0
+        s._bucket("a").tokens -= 1
+    assert s.delay("a") == 0.5
+    assert s.delay("b") == 0  # other hosts are unaffected
+    clock.t = 0.5
+    assert s.delay("a") == 0
+
+
+def test_slowdown_retry_after_and_ramp():
+    s, clock = _sched(ramp_after=3, ramp_step_per_s=1.0)
+    s.feedback("a", 429, retry_after=10)
+    assert s.rate("a") == 1.0
+    assert s.delay("a") == 10
+    clock.t = 10
+    for _ in range(3):
+        s.feedback("a", 200)
+    assert s.rate("a") == 2.0
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("120") == 120
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT", now=1445412480 - 30) == 30
+    assert parse_retry_after("soon") is None
+
+
+class HttpError(Exception):
+    def __init__(self, status, headers=None):
+        self.status, self.headers = status, headers or {}
+
+
+def test_retry_charges_host_budget(monkeypatch):
+    s, clock = _sched()
+    calls = []
+
+    async def flaky():
+        calls.append(clock.t)
+        if len(calls) == 1:
+            raise HttpError(503, {"Retry-After": "3"})
+        return "ok"
+
+    async def fake_sleep(d):
+        clock.t += d
+
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    out = asyncio.get_event_loop().run_until_complete(
+        async_retry(flaky, attempts=3, base=0.1, max_s=1, jitter=0, scheduler=s, host="a"))
+    assert out == "ok"
+    assert calls[1] >= 3  # second attempt waited out Retry-After via the host gate
+
+
+def test_no_retry_on_client_error():
+    calls = []
+
+    async def missing():
+        calls.append(1)
+        raise HttpError(404)
+
+    with pytest.raises(HttpError):
+        asyncio.get_event_loop().run_until_complete(
+            async_retry(missing, attempts=4, base=0, max_s=0, jitter=0))
+    assert len(calls) == 1
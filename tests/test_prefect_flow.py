@@ -0,0 +1,53 @@
+from pathlib import Path
+import pytest
+
+pytest.importorskip("prefect")
+pytest.importorskip("crawl4ai")
+
+from crawl_pipeline.orchestration import prefect_flow  # noqa: E402
+
+PDF = b"%PDF-1.4\n" + b"x" * 4096
+
+
+class _Browser:
+    """Stands in for BrowserPool: the pages below never render."""
+
+    @classmethod
+    def from_limits(cls, limits):
+        return cls()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return None
+
+
+class _Pages:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def fetch_html(self, url, **kwargs):
+        return "text/html", b'<html><a href="/doc.pdf">report</a></html>'
+
+
+class _Documents:
+    @staticmethod
+    async def fetch_binary(url, **kwargs):
+        async def chunks():
+            yield PDF
+        return "application/pdf", chunks(), len(PDF)
+
+
+def test_flow_saves_documents_under_its_storage_root(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # where the "./downloads" default would land
+    monkeypatch.setattr(prefect_flow, "BrowserPool", _Browser)
+    monkeypatch.setattr(prefect_flow, "PooledHtmlFetcher", _Pages)
+    monkeypatch.setattr(prefect_flow, "aiohttp_binary", _Documents)
+    root = tmp_path / "crawl-root"
+    saved = prefect_flow.crawl_medium.fn("https://example.com/", depth=1,
+                                         storage_root=str(root))
+    (doc,) = [s for s in saved if s.url == "https://example.com/doc.pdf"]
+    assert Path(doc.path).is_relative_to(root)
+    assert Path(doc.path).read_bytes() == PDF
+    assert not (tmp_path / "downloads").exists()
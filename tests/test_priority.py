@@ -0,0 +1,85 @@
+import asyncio, heapq, random
+from crawl_pipeline.adapters.links_fast import FastLinkExtractor
+from crawl_pipeline.config import FrontierPolicy, Limits
+from crawl_pipeline.models import CrawlRequest
+from crawl_pipeline.pipeline.crawl import run_crawl
+from crawl_pipeline.pipeline.priority import Priority, SpillHeap
+
+# a home page linking ten navigation pages before two reports, each nav page linking more
+SITE = {"https://example.com/": [(f"/nav/{i}", "Menu") for i in range(10)]
+        + [("/reports/2023", "Annual report"), ("/about", "Our annual results")]}
+for i in range(10):
+    SITE[f"https://example.com/nav/{i}"] = [(f"/nav/{i}/{j}", "More") for j in range(3)]
+
+
+class SiteFetcher:
+    def __init__(self):
+        self.order: list[str] = []
+
+    async def fetch_html(self, url, **kwargs):
+        self.order.append(url)
+        await asyncio.sleep(0.001)
+        links = "".join(f'<a href="{h}">{t}</a>' for h, t in SITE.get(url, []))
+        return "text/html", f"<html>{links}</html>".encode()
+
+
+async def _save(url, html):
+    return {"url": url}
+
+
+def _crawl(policy, **limits):
+    req = CrawlRequest(url="https://example.com/", depth=2, frontier=policy,
+                       limits=Limits(max_concurrency_total=1, **limits))
+    f = SiteFetcher()
+    asyncio.get_event_loop().run_until_complete(
+        run_crawl(req, html_fetcher=f, fetch_and_save_html=_save,
+                  link_extractor=FastLinkExtractor(), limits=req.limits))
+    return f.order
+
+
+def test_best_first_spends_the_budget_on_preferred_pages():
+    bfs = _crawl(FrontierPolicy(), max_files=3)
+    assert bfs == ["https://example.com/", "https://example.com/nav/0", "https://example.com/nav/1"]
+    best = _crawl(FrontierPolicy(order="best_first", patterns=(("*/reports/*", 5.0),),
+                                 anchor_terms=(("annual", 2.0),)), max_files=3)
+    assert best == ["https://example.com/", "https://example.com/reports/2023",
+                    "https://example.com/about"]
+
+
+def test_quotas_cap_what_is_queued():
+    order = _crawl(FrontierPolicy(max_per_depth=((1, 4),)))
+    assert order[1:5] == [f"https://example.com/nav/{i}" for i in range(4)]
+    assert not any("reports" in u or "about" in u for u in order)  # past the depth-1 quota
+    p = Priority(max_per_host=2)
+    assert [p.admit(u, 1) for u in ("https://a.com/1", "https://a.com/2", "https://a.com/3",
+                                     "https://b.com/1")] == [True, True, False, True]
+    assert p.over_quota == 1
+
+
+def test_rank_scores_documents_and_is_depth_without_scorers():
+    p = Priority.from_policy(FrontierPolicy(order="best_first"))
+    assert p.rank("https://a.com/x.pdf", 2) < p.rank("https://a.com/x", 1)
+    assert Priority.from_policy(FrontierPolicy()).rank("https://a.com/x.pdf", 2) == 2.0
+    fair = Priority.from_policy(FrontierPolicy(order="best_first", host_fairness=1.0))
+    assert fair.rank("https://a.com/1", 1) < fair.rank("https://a.com/2", 1)
+
+
+def test_spill_heap_pops_in_order_across_spills(tmp_path):
+    rng = random.Random(7)
+    heap = SpillHeap(spill_after=16, path=str(tmp_path / "q.sqlite"))
+    ref: list = []
+    seq = 0
+    for _ in range(40):  # interleave bursts of pushes with pops
+        for _ in range(rng.randint(0, 30)):
+            row = (float(rng.randint(-5, 5)), seq, f"https://a.com/{seq}", 1, None)
+            seq += 1
+            heap.push(row)
+            heapq.heappush(ref, row)
+        for _ in range(rng.randint(0, 20)):
+            if ref:
+                assert heap.pop() == heapq.heappop(ref)
+        assert len(heap) == len(ref)
+    while ref:
+        assert heap.pop() == heapq.heappop(ref)
+    assert heap.spills > 0
+    heap.close()
@@ -0,0 +1,70 @@
+import asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from crawl_pipeline.adapters.simple_html_fetcher import SimpleHtmlFetcher
+from crawl_pipeline.cli import BasicLinkExtractor
+from crawl_pipeline.models import CrawlRequest
+from crawl_pipeline.pipeline.crawl import run_crawl
+from crawl_pipeline.revalidation import ValidatorCache
+
+PAGES = {"/": '<a href="/a">a</a><a href="/b">b</a>', "/a": '<a href="/a1">a1</a>',
+         "/b": "<p>b</p>", "/a1": "<p>a1</p>"}
+
+
+def _app(log):
+    async def page(request):
+        etag = f'"{request.path}-v1"'
+        if request.headers.get("If-None-Match") == etag:
+            log.append((request.path, 304))
+            return web.Response(status=304, headers={"ETag": etag})
+        log.append((request.path, 200))
+        return web.Response(text=PAGES[request.path], content_type="text/html",
+                            headers={"ETag": etag})
+
+    app = web.Application()
+    for path in PAGES:
+        app.router.add_get(path, page)
+    return app
+
+
+def test_recrawl_revalidates_and_follows_cached_links(tmp_path):
+    log = []
+    stored = []
+
+    async def save(url, html):
+        stored.append(url)
+        return {"url": url, "path": str(tmp_path / url.rsplit("/", 1)[1])}
+
+    async def crawl_twice():
+        async with TestServer(_app(log)) as srv:
+            req = CrawlRequest(url=str(srv.make_url("/")), depth=1)
+            with ValidatorCache(str(tmp_path / "v.sqlite")) as cache:
+                for _ in range(2):
+                    await run_crawl(req, html_fetcher=SimpleHtmlFetcher(), fetch_and_save_html=save,
+                                    link_extractor=BasicLinkExtractor(), limits=req.limits,
+                                    validators=cache)
+
+    asyncio.get_event_loop().run_until_complete(crawl_twice())
+    assert sorted(log[:3]) == [("/", 200), ("/a", 200), ("/b", 200)]
+    assert sorted(log[3:]) == [("/", 304), ("/a", 304), ("/b", 304)]
+    assert len(stored) == 3
+
+
+def test_deeper_recrawl_follows_links_cached_at_the_depth_limit(tmp_path):
+    log = []
+
+    async def save(url, html):
+        return {"url": url, "path": str(tmp_path / url.rsplit("/", 1)[1])}
+
+    async def crawl_deeper():
+        async with TestServer(_app(log)) as srv:
+            with ValidatorCache(str(tmp_path / "v.sqlite")) as cache:
+                for depth in (1, 2):
+                    req = CrawlRequest(url=str(srv.make_url("/")), depth=depth)
+                    await run_crawl(req, html_fetcher=SimpleHtmlFetcher(), fetch_and_save_html=save,
+                                    link_extractor=BasicLinkExtractor(), limits=req.limits,
+                                    validators=cache)
+
+    asyncio.get_event_loop().run_until_complete(crawl_deeper())
+    assert ("/a1", 200) not in log[:3]
+    assert sorted(log[3:]) == [("/", 304), ("/a", 304), ("/a1", 200), ("/b", 304)]
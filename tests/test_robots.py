@@ -0,0 +1,166 @@
+import asyncio
+import gzip
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from crawl_pipeline.adapters.links_fast import FastLinkExtractor
+from crawl_pipeline.adapters.simple_html_fetcher import SimpleHtmlFetcher
+from crawl_pipeline.config import Limits, Politeness, RetryPolicy, RobotsPolicy
+from crawl_pipeline.models import CrawlRequest
+from crawl_pipeline.pipeline.crawl import run_crawl
+from crawl_pipeline.politeness import HostScheduler
+from crawl_pipeline.robots import Robots, RobotsCache
+from crawl_pipeline.sitemaps import iter_sitemap
+
+ROBOTS = """User-agent: *
+Disallow: /private/
+Crawl-delay: 1
+
+User-agent: crawl-pipeline
+Disallow: /private/
+Request-rate: 100/1
+Sitemap: {base}sitemap_index.xml
+"""
+NS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+
+def _urlset(base, paths):
+    urls = "".join(f"<url><loc>{base}{p}</loc></url>" for p in paths)
+    return f'<?xml version="1.0"?><urlset {NS}>{urls}</urlset>'.encode()
+
+
+def _base(request):
+    return f"{request.url.origin()}/"
+
+
+def _site(robots_hits):
+    async def robots(request):
+        robots_hits.append(1)
+        return web.Response(text=ROBOTS.format(base=_base(request)))
+
+    async def index(request):
+        base = _base(request)
+        maps = "".join(f"<sitemap><loc>{base}{m}</loc></sitemap>"
+                       for m in ("sm1.xml", "sm2.xml.gz"))
+        return web.Response(body=f'<sitemapindex {NS}>{maps}</sitemapindex>'.encode(),
+                            content_type="application/xml")
+
+    async def sm1(request):
+        return web.Response(body=_urlset(_base(request), ["a/b/c/deep", "private/x"]),
+                            content_type="application/xml")
+
+    async def sm2(request):
+        body = gzip.compress(_urlset(_base(request), [f"p{i}" for i in range(3)]))
+        return web.Response(body=body, content_type="application/x-gzip")
+
+    async def page(request):
+        return web.Response(text='<html><a href="/private/y">no</a></html>',
+                            content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/robots.txt", robots)
+    app.router.add_get("/sitemap_index.xml", index)
+    app.router.add_get("/sm1.xml", sm1)
+    app.router.add_get("/sm2.xml.gz", sm2)
+    app.router.add_get("/{tail:.*}", page)
+    return app
+
+
+def test_crawl_obeys_robots_and_seeds_from_sitemaps():
+    hits = []
+    app = _site(hits)
+    fetched = []
+
+    async def save(url, html):
+        fetched.append(url)
+        return {"url": url}
+
+    async def main():
+        async with TestServer(app) as srv:
+            base = str(srv.make_url("/"))
+            req = CrawlRequest(url=base, depth=1, retry=RetryPolicy(max_attempts=1),
+                               politeness=Politeness(host_rate_per_s=1000, host_burst=100),
+                               robots=RobotsPolicy(obey=True, sitemaps=True))
+            scheduler = HostScheduler(req.politeness)
+            await run_crawl(req, html_fetcher=SimpleHtmlFetcher(), fetch_and_save_html=save,
+                            link_extractor=FastLinkExtractor(), limits=Limits(),
+                            scheduler=scheduler)
+            return base, scheduler.rate(srv.host)
+
+    base, rate = asyncio.get_event_loop().run_until_complete(main())
+    paths = sorted(u[len(base):] for u in fetched)
+    assert paths == ["", "a/b/c/deep", "p0", "p1", "p2"]
+    assert len(hits) == 1
+    assert rate == 100  # our group's Request-rate: 100/1
+
+
+def test_robots_cache_shares_one_fetch():
+    hits = []
+    app = _site(hits)
+
+    async def main():
+        async with TestServer(app) as srv:
+            cache = RobotsCache(RobotsPolicy(user_agent="other-bot"))
+            async with aiohttp.ClientSession() as s:
+                rules = await asyncio.gather(*(cache.get(str(srv.make_url(f"/{i}")), session=s)
+                                               for i in range(10)))
+            assert not cache.allows(str(srv.make_url("/private/a")))
+            assert cache.allows("https://elsewhere.example/private/a")  # not fetched yet
+            return rules[0]
+
+    rules = asyncio.get_event_loop().run_until_complete(main())
+    assert len(hits) == 1 and rules.crawl_delay == 1
+
+
+def test_robots_fetch_outlives_its_first_caller():
+    hits = []
+    app = web.Application()
+
+    async def slow_robots(request):
+        hits.append(1)
+        await asyncio.sleep(0.05)
+        return web.Response(text=ROBOTS.format(base=_base(request)))
+
+    app.router.add_get("/robots.txt", slow_robots)
+
+    async def main():
+        async with TestServer(app) as srv:
+            cache = RobotsCache(RobotsPolicy(user_agent="other-bot"))
+            async with aiohttp.ClientSession() as s:
+                first = asyncio.create_task(cache.get(str(srv.make_url("/a")), session=s))
+                await asyncio.sleep(0.01)
+                second = asyncio.create_task(cache.get(str(srv.make_url("/b")), session=s))
+                await asyncio.sleep(0.01)
+                first.cancel()  # e.g. its worker stopping while the fetch is in flight
+                rules = await second
+                with pytest.raises(asyncio.CancelledError):
+                    await first
+            return rules, str(srv.make_url("/private/a"))
+
+    rules, private = asyncio.get_event_loop().run_until_complete(main())
+    assert len(hits) == 1
+    assert not rules.allowed(private)
+
+
+def test_allow_all_and_disallow_all():
+    assert Robots.allow_all("bot").allowed("https://a.com/private/x")
+    assert not Robots.disallow_all("bot").allowed("https://a.com/")
+    assert Robots.disallow_all("bot").crawl_delay is None
+
+
+def test_sitemap_unreachable_is_skipped_and_cap_holds():
+    app = _site([])
+
+    async def main():
+        async with TestServer(app) as srv:
+            async with aiohttp.ClientSession() as s:
+                got = [u async for u in iter_sitemap(str(srv.make_url("/sitemap_index.xml")),
+                                                     session=s, max_urls=3)]
+                broken = [u async for u in iter_sitemap(str(srv.make_url("/robots.txt")),
+                                                        session=s)]
+            return got, broken
+
+    got, broken = asyncio.get_event_loop().run_until_complete(main())
+    assert [u.rsplit("/", 1)[1] for u in got] == ["deep", "x", "p0"]
+    assert broken == []
@@ -0,0 +1,84 @@
+import asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from crawl_pipeline.adapters import aiohttp_binary
+from crawl_pipeline.adapters.links_fast import FastLinkExtractor
+from crawl_pipeline.adapters.simple_html_fetcher import SimpleHtmlFetcher
+from crawl_pipeline.config import Limits, Politeness, RetryPolicy
+from crawl_pipeline.models import CrawlRequest
+from crawl_pipeline.pipeline.crawl import run_crawl
+from crawl_pipeline.pipeline.routing import BINARY, DROP, HTML, response_type, route_url
+
+PDF = b"%PDF-1.4\n" + b"x" * 4096
+
+
+def test_route_url():
+    types = ("html", "pdf")
+    assert route_url("https://e.com/docs/", types) == HTML
+    assert route_url("https://e.com/a.pdf", types) == BINARY
+    assert route_url("https://e.com/a.docx", types) == DROP
+    assert route_url("https://e.com/logo.PNG", types) == DROP
+    assert route_url("https://e.com/get.php?id=1", types) is None
+
+
+def test_response_type_trusts_specific_header():
+    assert response_type("image/png", "https://e.com/page") is None
+    assert response_type("application/pdf; q=1", "https://e.com/page") == "pdf"
+    assert response_type("application/octet-stream", "https://e.com/a.pdf") == "pdf"
+
+
+class _Storage:
+    def __init__(self):
+        self.streams, self.blobs = {}, {}
+
+    async def save_stream(self, *, chunks, url, canonical_type, root, size_hint=None,
+                          run=None):
+        self.streams[url] = b"".join([c async for c in chunks])
+        return f"mem://{canonical_type}/{url}"
+
+    def save_bytes(self, *, content, url, canonical_type, root):
+        self.blobs[url] = content
+        return f"mem://{canonical_type}/{url}"
+
+
+def test_crawl_routes_binaries_and_drops_assets():
+    hits: list[tuple[str, str]] = []
+
+    async def page(request):
+        hits.append((request.method, request.path))
+        links = ["/doc.pdf", "/logo.png", "/get.php", "/notes.docx"]
+        body = "".join(f'<a href="{link}">x</a>' for link in links)
+        return web.Response(text=f"<html>{body}</html>", content_type="text/html")
+
+    async def blob(request):
+        hits.append((request.method, request.path))
+        return web.Response(body=PDF, content_type="application/pdf")
+
+    app = web.Application()
+    app.router.add_get("/", page)
+    for path in ("/doc.pdf", "/logo.png", "/get.php", "/notes.docx"):
+        app.router.add_get(path, blob)
+
+    async def save(url, html):
+        return {"url": url, "path": "page"}
+
+    async def go(base):
+        req = CrawlRequest(url=base, depth=1, file_types=("html", "pdf"),
+                           retry=RetryPolicy(max_attempts=1),
+                           politeness=Politeness(host_rate_per_s=1000, host_burst=100))
+        storage = _Storage()
+        saved = await run_crawl(req, html_fetcher=SimpleHtmlFetcher(), fetch_and_save_html=save,
+                                link_extractor=FastLinkExtractor(), limits=Limits(),
+                                binary_fetcher=aiohttp_binary, storage=storage)
+        return saved, storage
+
+    async def main():
+        async with TestServer(app) as srv:
+            return await go(str(srv.make_url("/")))
+
+    saved, storage = asyncio.get_event_loop().run_until_complete(main())
+    assert sorted(u.rsplit("/", 1)[1] for u in storage.streams) == ["doc.pdf", "get.php"]
+    assert all(body == PDF for body in storage.streams.values())
+    assert len(saved) == 3
+    # the image and the unwanted docx were never requested; nothing binary went through GET /
+    assert not any(p in ("/logo.png", "/notes.docx") for _, p in hits)
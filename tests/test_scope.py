@@ -0,0 +1,39 @@
+import asyncio
+from crawl_pipeline.models import CrawlRequest
+from crawl_pipeline.pipeline.frontier import Frontier
+from crawl_pipeline.pipeline.scope import Scope
+from crawl_pipeline.url_utils import canonicalize
+
+
+def test_request_flags_scope_to_seed_host_and_path():
+    s = Scope.from_request(CrawlRequest(url="https://Example.com/docs/"))
+    assert s.allows("https://example.com/docs/a.html")
+    assert not s.allows("https://example.com/blog/")
+    assert not s.allows("https://other.com/docs/")
+    anywhere = CrawlRequest(url="https://example.com/docs/", same_domain_only=False,
+                            under_path_only=False)
+    assert Scope.from_request(anywhere).unbounded
+
+
+def test_hosts_patterns_and_depths():
+    s = Scope(hosts=("*.example.com", "cdn.net"), include=("*/docs/*", "re:/api/v\\d+/"),
+              exclude=("*.zip", "re:[?&]session="), max_depth=(("/docs/", 3), ("/docs/old/", 1)))
+    assert s.allows("https://example.com/docs/a")
+    assert s.allows("https://eu.example.com/api/v2/x")
+    assert s.allows("https://cdn.net/docs/a", depth=3)
+    assert not s.allows("https://notexample.com/docs/a")
+    assert not s.allows("https://example.com/blog/")        # no include matches
+    assert not s.allows("https://example.com/docs/a.zip")
+    assert not s.allows("https://example.com/docs/a?session=1")
+    assert not s.allows("https://example.com/docs/a", depth=4)
+    assert not s.allows("https://example.com/docs/old/a", depth=2)
+
+
+def test_frontier_filters_links_before_queueing():
+    f = Frontier(canonical=canonicalize, scope=Scope(hosts=("example.com",)))
+    queued = f.push_many(["https://EXAMPLE.com/a", "https://evil.com/a", "https://example.com/a#x",
+                          "javascript:void(0)"], depth=1, parent="https://example.com/")
+    assert queued == ["https://example.com/a"]
+    assert f.out_of_scope == 1 and "https://evil.com/a" not in f.seen
+    item = asyncio.get_event_loop().run_until_complete(f.get())
+    assert (item.url, item.depth, item.parent) == ("https://example.com/a", 1, "https://example.com/")
@@ -0,0 +1,49 @@
+import asyncio
+import pytest
+from crawl_pipeline.config import SeenPolicy
+from crawl_pipeline.pipeline.frontier import Frontier
+from crawl_pipeline.pipeline.seen import BloomSeen, DiskSeen, make_seen
+from crawl_pipeline.url_utils import canonicalize
+
+
+@pytest.mark.parametrize("mode", ["exact", "fingerprint", "bloom", "disk"])
+def test_modes_dedup(mode, tmp_path):
+    seen = make_seen(SeenPolicy(mode=mode, spill_after=50, spill_path=str(tmp_path / "s.db")))
+    urls = [f"https://e.com/p/{i}" for i in range(200)]
+    assert all(seen.add(u) for u in urls)
+    assert not any(seen.add(u) for u in urls)
+    assert len(seen) == 200 and urls[7] in seen
+    seen.close()
+
+
+def test_bloom_false_positive_rate_holds_past_capacity():
+    b = BloomSeen(capacity=2_000, fp_rate=1e-3)
+    for i in range(10_000):  # five times the first filter's capacity
+        b.add(f"https://e.com/seen/{i}")
+    false = sum(f"https://e.com/new/{i}" in b for i in range(20_000))
+    assert false / 20_000 < 2e-3
+    assert b.nbytes < 10_000 * 4  # a few bytes per URL, versus ~80 for a str
+
+
+def test_disk_seen_spills_and_reopens(tmp_path):
+    path = str(tmp_path / "seen.sqlite")
+    d = DiskSeen(path, spill_after=100)
+    for i in range(1_000):
+        d.add(f"u{i}")
+    assert len(d._recent) < 100
+    lookups = d.disk_lookups
+    assert all(d.add(f"new{i}") for i in range(500))
+    assert d.disk_lookups - lookups < 25  # the Bloom filter keeps misses off the disk
+    d.close()
+    again = DiskSeen(path, spill_after=100)
+    assert not again.add("u3") and again.add("u-fresh")
+    again.close()
+
+
+def test_frontier_queues_canonical_urls_once():
+    f = Frontier(canonical=canonicalize)
+    assert f.push("http://E.com:80/a?b=1&a=2#x", 0) == "http://e.com/a?a=2&b=1"
+    assert f.push("http://e.com/a?a=2&utm_medium=x&b=1", 1) is None
+    assert f.push("mailto:someone@e.com", 1) is None
+    item = asyncio.get_event_loop().run_until_complete(f.get())
+    assert item.url == "http://e.com/a?a=2&b=1" and f.qsize() == 0
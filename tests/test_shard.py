@@ -0,0 +1,95 @@
+import asyncio
+from crawl_pipeline.cli import BasicLinkExtractor
+from crawl_pipeline.models import CrawlRequest
+from crawl_pipeline.pipeline.crawl import run_crawl
+from crawl_pipeline.pipeline.shard import (
+    IDLE, ShardLink, SqliteShardStore, run_sharded, shard_of,
+)
+
+HOSTS = [f"https://h{i}.example.com" for i in range(6)]
+
+
+def _links(url):
+    """Every host's home links two pages of its own and the next host's home."""
+    for i, host in enumerate(HOSTS):
+        if url == host + "/":
+            return ["/a", "/b", HOSTS[(i + 1) % len(HOSTS)] + "/"]
+    return []
+
+
+ALL = {h + p for h in HOSTS for p in ("/", "/a", "/b")}
+
+
+class HostsFetcher:
+    def __init__(self):
+        self.order: list[str] = []
+
+    async def fetch_html(self, url, **kwargs):
+        self.order.append(url)
+        await asyncio.sleep(0.001)
+        links = "".join(f'<a href="{link}">x</a>' for link in _links(url))
+        return "text/html", f"<html>{links}</html>".encode()
+
+
+async def _save(url, html):
+    return {"url": url}
+
+
+def _request():
+    return CrawlRequest(url=HOSTS[0] + "/", depth=20, same_domain_only=False,
+                        under_path_only=False)
+
+
+async def crawl(req, **extra):
+    return await run_crawl(req, html_fetcher=HostsFetcher(), fetch_and_save_html=_save,
+                           link_extractor=BasicLinkExtractor(), limits=req.limits, **extra)
+
+
+def test_shard_of_is_per_host_and_stable():
+    assert shard_of("https://h1.example.com/a", 4) == shard_of("https://h1.example.com/b?x", 4)
+    assert {shard_of(h + "/", 3) for h in HOSTS} <= {0, 1, 2}
+    assert len({shard_of(f"https://s{i}.example.com/", 4) for i in range(64)}) == 4
+
+
+
+def test_taking_links_marks_the_shard_busy(tmp_path):
+    with SqliteShardStore.create(str(tmp_path / "s.sqlite"), 2) as store:
+        store.set_state(0, IDLE)
+        store.set_state(1, IDLE)
+        store.send([("https://h1.example.com/", 1, 2, None)])
+        assert not store.quiescent()
+        assert store.receive(1, 10) == [("https://h1.example.com/", 2, None)]
+        assert not store.quiescent()  # shard 1 has work in hand until it reports idle
+        store.set_state(1, IDLE)
+        assert store.quiescent()
+
+def test_shards_split_hosts_and_merge_one_manifest(tmp_path):
+    path, shards = str(tmp_path / "shards.sqlite"), 3
+    SqliteShardStore.create(path, shards).close()
+    stores = [SqliteShardStore(path) for _ in range(shards)]
+    fetchers = [HostsFetcher() for _ in range(shards)]
+    req = _request()
+
+    async def main():
+        return await asyncio.gather(*(
+            run_crawl(req, html_fetcher=fetchers[k], fetch_and_save_html=_save,
+                      link_extractor=BasicLinkExtractor(), limits=req.limits,
+                      shard=ShardLink(stores[k], k, shards, poll_s=0.005))
+            for k in range(shards)))
+
+    asyncio.get_event_loop().run_until_complete(asyncio.wait_for(main(), 10))
+    for k, f in enumerate(fetchers):
+        assert all(shard_of(u, shards) == k for u in f.order)
+    assert sum(bool(f.order) for f in fetchers) >= 2
+    fetched = [u for f in fetchers for u in f.order]
+    assert sorted(fetched) == sorted(ALL)
+    manifest = stores[0].manifest()
+    assert sorted(r.url for r in manifest) == sorted(ALL)
+    for s in stores:
+        s.close()
+
+
+def test_run_sharded_across_processes(tmp_path):
+    items = run_sharded(_request(), crawl, shards=2, store_path=str(tmp_path / "s.sqlite"),
+                        log_path=str(tmp_path / "crawl.log"))
+    assert sorted(r.url for r in items) == sorted(ALL)
@@ -0,0 +1,115 @@
+import asyncio
+import socket
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.abc import AbstractResolver
+from aiohttp.test_utils import TestServer
+from crawl_pipeline.backoff import async_retry
+from crawl_pipeline.config import Limits, Timeouts
+from crawl_pipeline.session import make_session
+from crawl_pipeline.ssrf import SsrfBlocked, SsrfGuard
+
+
+class FakeResolver(AbstractResolver):
+    def __init__(self, answers):
+        self.answers = answers
+        self.calls = 0
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return [{"hostname": host, "host": ip, "port": port, "family": socket.AF_INET,
+                 "proto": 0, "flags": 0} for ip in self.answers[host]]
+
+    async def close(self):
+        pass
+
+
+def _run(coro):
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+def test_one_lookup_per_host_within_ttl():
+    now = [0.0]
+    dns = FakeResolver({"example.com": ["93.184.216.34"]})
+    guard = SsrfGuard(resolver=dns, ttl_s=60, clock=lambda: now[0])
+
+    async def go():
+        await asyncio.gather(*(guard.check(f"https://example.com/{i}") for i in range(50)))
+        await guard.check("https://EXAMPLE.com/again")
+
+    _run(go())
+    assert dns.calls == 1
+    now[0] = 61
+    _run(guard.check("https://example.com/"))
+    assert dns.calls == 2
+
+
+def test_cancelled_first_caller_does_not_cancel_other_waiters():
+    dns = FakeResolver({"example.com": ["93.184.216.34"]})
+    guard = SsrfGuard(resolver=dns)
+
+    async def go():
+        first = asyncio.ensure_future(guard.resolve("example.com"))
+        await asyncio.sleep(0)
+        others = [asyncio.ensure_future(guard.resolve("example.com")) for _ in range(3)]
+        await asyncio.sleep(0)
+        first.cancel()
+        return await asyncio.gather(*others)
+
+    answers = _run(go())
+    assert [a[0]["host"] for a in answers] == ["93.184.216.34"] * 3
+    assert dns.calls == 1
+
+
+def test_private_answers_and_literals_blocked():
+    dns = FakeResolver({"intranet.example": ["93.184.216.34", "10.1.2.3"]})
+    guard = SsrfGuard(resolver=dns)
+    for _ in range(3):
+        with pytest.raises(SsrfBlocked):
+            _run(guard.check("http://intranet.example/admin"))
+    assert dns.calls == 1  # refusals are cached too
+    for url in ("http://127.0.0.1:8080/", "http://[::1]/", "http://[::ffff:169.254.169.254]/"):
+        with pytest.raises(SsrfBlocked):
+            _run(guard.check(url))
+    _run(guard.check("http://93.184.216.34/"))
+    assert dns.calls == 1
+
+
+def test_connector_is_pinned_to_vetted_addresses():
+    async def hello(request):
+        return web.Response(text="ok")
+
+    app = web.Application()
+    app.router.add_get("/", hello)
+
+    async def go():
+        async with TestServer(app) as srv:
+            dns = FakeResolver({"site.test": ["127.0.0.1"]})
+            open_guard = SsrfGuard(resolver=dns, blocked=())
+            async with make_session(Limits(), Timeouts(), open_guard) as s:
+                for _ in range(3):
+                    async with s.get(f"http://site.test:{srv.port}/") as r:
+                        assert await r.text() == "ok"
+                dns.answers["site.test"] = ["10.0.0.1"]  # a rebinding answer is never asked for
+                async with s.get(f"http://site.test:{srv.port}/",
+                                 headers={"Connection": "close"}) as r:
+                    assert r.status == 200
+            assert dns.calls == 1
+
+            strict = SsrfGuard(resolver=dns)
+            async with make_session(Limits(), Timeouts(), strict) as s:
+                calls = 0
+
+                async def fetch():
+                    nonlocal calls
+                    calls += 1
+                    async with s.get(str(srv.make_url("/"))) as r:
+                        return r.status
+
+                with pytest.raises(aiohttp.ClientConnectorError) as e:
+                    await async_retry(fetch, attempts=4, base=0, max_s=0, jitter=0)
+                assert isinstance(e.value.os_error, SsrfBlocked) and calls == 1
+
+    _run(go())
@@ -0,0 +1,82 @@
+import asyncio, pathlib, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from crawl_pipeline.adapters.storage_exec import StorageWriter
+from crawl_pipeline.adapters.storage_fs import GroupCommit
+from crawl_pipeline.adapters.storage_selector import get_storage
+
+
+class SlowStorage:
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def save_bytes(self, *, content, url, canonical_type, root):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.05)  # a slow disk or bucket
+        with self.lock:
+            self.active -= 1
+        return url
+
+
+def test_writer_keeps_loop_free_and_bounds_pending():
+    storage = SlowStorage()
+    writer = StorageWriter(storage, workers=4, max_pending=2)
+
+    async def go():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        t = asyncio.create_task(ticker())
+        out = await asyncio.gather(*(writer.save_bytes(content=b"x", url=f"u{i}",
+                                                       canonical_type="html", root="r")
+                                     for i in range(6)))
+        t.cancel()
+        return out, ticks
+
+    out, ticks = asyncio.get_event_loop().run_until_complete(go())
+    writer.close()
+    assert out == [f"u{i}" for i in range(6)]
+    assert storage.peak == 2
+    assert ticks >= 10  # ~150ms of saves while the loop kept running
+
+
+def test_group_commit_batches_concurrent_writers(tmp_path):
+    group = GroupCommit(str(tmp_path), window_s=0.02)
+    paths = []
+    for i in range(16):
+        p = tmp_path / f"f{i}"
+        p.write_bytes(b"data")
+        paths.append(str(p))
+    with ThreadPoolExecutor(16) as pool:
+        list(pool.map(group.sync, paths))
+    assert 1 <= group.batches < 16
+
+
+def test_group_commit_storage_through_writer(tmp_path):
+    writer = StorageWriter(get_storage(str(tmp_path), group_commit=True), workers=8)
+
+    async def chunks():
+        for _ in range(4):
+            yield b"y" * 1024
+
+    async def go():
+        saved = await asyncio.gather(
+            *(writer.save_bytes(content=f"page {i}".encode(), url=f"https://e.com/{i}",
+                                canonical_type="html", root=str(tmp_path)) for i in range(8)),
+            writer.save_stream(chunks=chunks(), url="https://e.com/f.pdf", canonical_type="pdf",
+                               root=str(tmp_path)))
+        return saved
+
+    saved = asyncio.get_event_loop().run_until_complete(go())
+    writer.close()
+    assert len(set(saved)) == 9 and all(pathlib.Path(p).exists() for p in saved)
+    assert pathlib.Path(saved[-1]).read_bytes() == b"y" * 4096
+    assert not list(tmp_path.rglob("*.tmp"))
@@ -1,4 +1,5 @@
-import os, pathlib, asyncio
+import os, pathlib, asyncio, hashlib
+from concurrent.futures import ThreadPoolExecutor
 from crawl_pipeline.adapters.storage_fs import save_bytes, save_stream
 
 def test_save_bytes(tmp_path):
@@ -13,3 +14,28 @@ def test_save_stream(tmp_path):
     p = asyncio.get_event_loop().run_until_complete(
         save_stream(chunks=_gen(), url="https://example.com/a", canonical_type="pdf", root=str(tmp_path)))
     assert pathlib.Path(p).exists()
+
+def test_dedup_links_known_blob(tmp_path):
+    from crawl_pipeline.adapters.dedup_index import DedupIndex
+    with DedupIndex(str(tmp_path / "dedup.sqlite")) as dedup:
+        a = save_bytes(content=b"same", url="https://a.example/x", canonical_type="html",
+                       root=str(tmp_path), dedup=dedup)
+        b = save_bytes(content=b"same", url="https://mirror.example/y", canonical_type="html",
+                       root=str(tmp_path), dedup=dedup)
+        assert a != b and os.path.samefile(a, b)
+        assert len(dedup) == 1
+
+        other = DedupIndex(str(tmp_path / "other.sqlite"))
+        assert other.merge_manifest(dedup.to_manifest()) == 1
+        assert other.lookup(hashlib.sha256(b"same").hexdigest()) == a
+        other.close()
+
+def test_concurrent_saves_of_the_same_content(tmp_path):
+    def save(i):
+        return save_bytes(content=b"same body", url=f"https://h.com/a/b/{i}.pdf",
+                          canonical_type="pdf", root=str(tmp_path))
+    for _ in range(20):
+        with ThreadPoolExecutor(8) as pool:
+            paths = list(pool.map(save, range(8)))
+        assert all(pathlib.Path(p).read_bytes() == b"same body" for p in paths)
+    assert not list(tmp_path.rglob("tmp*"))
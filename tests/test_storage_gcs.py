@@ -0,0 +1,96 @@
+import asyncio
+import pytest
+
+from crawl_pipeline.adapters import storage_gcs
+from crawl_pipeline.adapters.storage_gcs import GCSStorage
+
+
+class GcsFakes:
+    """A bucket and an HTTP session recording what a GCS resumable upload sends."""
+
+    def __init__(self):
+        self.puts, self.deleted, self.rewrites, self.objects = [], [], [], {}
+        fakes = self
+
+        class Blob:
+            def __init__(self, name):
+                self.name = name
+
+            def create_resumable_upload_session(self, **kw):
+                return f"https://upload/{self.name}"
+
+            def upload_from_string(self, data, content_type=None):
+                fakes.objects[self.name] = data
+
+            def rewrite(self, src, token=None):
+                fakes.rewrites.append((src.name, self.name))
+                return None, 0, 0
+
+            def delete(self):
+                fakes.deleted.append(self.name)
+
+        class Response:
+            def __init__(self, status_code):
+                self.status_code = status_code
+
+        class Bucket:
+            name = "b"
+
+            def blob(self, name):
+                return Blob(name)
+
+        class Http:
+            def put(self, url, data, headers):
+                fakes.puts.append(headers["Content-Range"])
+                return Response(308 if headers["Content-Range"].endswith("/*") else 201)
+
+            def delete(self, url):
+                fakes.deleted.append(url)
+
+        self.bucket, self.http = Bucket(), Http()
+
+    def save(self, chunks):
+        return asyncio.get_event_loop().run_until_complete(storage_gcs.save_stream(
+            chunks=chunks, url="https://e.com/f.pdf", canonical_type="pdf", root="gs://b/p",
+            part_size=256 * 1024, client=object(), bucket=self.bucket, http=self.http))
+
+
+def test_gcs_stream_sends_ordered_chunks_and_promotes():
+    body = b"y" * (600 * 1024)
+    gcs = GcsFakes()
+
+    async def chunks():
+        for i in range(0, len(body), 100 * 1024):
+            yield body[i:i + 100 * 1024]
+
+    uri = gcs.save(chunks())
+    assert gcs.puts == ["bytes 0-262143/*", "bytes 262144-524287/*", "bytes 524288-614399/614400"]
+    staging, final = gcs.rewrites[0]
+    assert uri == f"gs://b/{final}" and gcs.deleted == [staging]
+
+
+def test_failed_gcs_stream_cancels_the_session():
+    gcs = GcsFakes()
+
+    async def chunks():
+        yield b"z" * (300 * 1024)
+        raise RuntimeError("connection reset")
+
+    with pytest.raises(RuntimeError):
+        gcs.save(chunks())
+    assert gcs.puts == ["bytes 0-262143/*"]
+    assert len(gcs.deleted) == 1 and gcs.deleted[0].startswith("https://upload/")
+    assert gcs.rewrites == [] and gcs.objects == {}
+
+
+def test_gcs_storage_caches_bucket_handles():
+    class Client:
+        calls = 0
+
+        def bucket(self, name):
+            Client.calls += 1
+            return object()
+
+    backend = GCSStorage("gs://b/prefix", client=Client())
+    assert backend.bucket("gs://b/prefix") is backend.bucket("gs://b/other")
+    assert Client.calls == 1
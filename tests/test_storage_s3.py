@@ -0,0 +1,126 @@
+import asyncio, hashlib, time
+import pytest
+
+boto3 = pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+
+from crawl_pipeline.adapters import storage_s3  # noqa: E402
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with moto.mock_aws():
+        client = boto3.client("s3")
+        client.create_bucket(Bucket="crawl-bucket")
+        yield client
+
+
+def _save(body, piece, **kw):
+    async def chunks():
+        for i in range(0, len(body), piece):
+            yield body[i:i + piece]
+
+    return asyncio.get_event_loop().run_until_complete(storage_s3.save_stream(
+        chunks=chunks(), url="https://e.com/docs/f.pdf", canonical_type="pdf",
+        root="s3://crawl-bucket/crawl", **kw))
+
+
+def _keys(client):
+    listing = client.list_objects_v2(Bucket="crawl-bucket")
+    return sorted(o["Key"] for o in listing.get("Contents", []))
+
+
+def test_stream_uploads_parts_and_promotes(s3, monkeypatch):
+    body = bytes(range(256)) * (48 * 1024)  # 12 MiB -> three 5 MiB parts
+    calls = []
+    real = storage_s3._promote
+    monkeypatch.setattr(storage_s3, "_promote", lambda *a: calls.append(a) or real(*a))
+
+    uri = _save(body, 64 * 1024, part_size=1, parallelism=2)  # clamped to S3's 5 MiB minimum
+    sha = hashlib.sha256(body).hexdigest()
+    assert uri == f"s3://crawl-bucket/crawl/e.com/docs/f.pdf/{sha[:16]}.pdf"
+    key = uri.split("/", 3)[3]
+    obj = s3.get_object(Bucket="crawl-bucket", Key=key)
+    assert obj["Body"].read() == body
+    assert obj["ContentType"] == "application/pdf"
+    assert _keys(s3) == [key]  # staging object removed
+    assert len(calls) == 1
+    assert not s3.list_multipart_uploads(Bucket="crawl-bucket").get("Uploads")
+
+
+def test_small_stream_is_one_put(s3, monkeypatch):
+    monkeypatch.setattr(storage_s3, "_promote", lambda *a: pytest.fail("no staging expected"))
+    uri = _save(b"tiny pdf", 3)
+    obj = s3.get_object(Bucket="crawl-bucket", Key=uri.split("/", 3)[3])
+    assert obj["Body"].read() == b"tiny pdf"
+
+
+def test_failed_stream_aborts_upload(s3):
+    async def chunks():
+        yield b"x" * (6 * MB)
+        raise RuntimeError("connection reset")
+
+    with pytest.raises(RuntimeError):
+        asyncio.get_event_loop().run_until_complete(storage_s3.save_stream(
+            chunks=chunks(), url="https://e.com/f.pdf", canonical_type="pdf", root="s3://crawl-bucket"))
+    assert not s3.list_multipart_uploads(Bucket="crawl-bucket").get("Uploads")
+    assert _keys(s3) == []
+
+
+def test_failed_stream_waits_for_running_parts_before_abort(s3):
+    calls = []
+
+    async def run(fn, *args):
+        name = getattr(fn, "func", fn).__name__
+
+        def call():
+            if name == "upload_part":
+                time.sleep(0.2)
+            try:
+                return fn(*args)
+            finally:
+                calls.append(name)
+        return await asyncio.to_thread(call)
+
+    async def chunks():
+        yield b"x" * (6 * MB)
+        raise RuntimeError("connection reset")
+
+    with pytest.raises(RuntimeError):
+        asyncio.get_event_loop().run_until_complete(storage_s3.save_stream(
+            chunks=chunks(), url="https://e.com/f.pdf", canonical_type="pdf",
+            root="s3://crawl-bucket", part_size=5 * MB, run=run))
+    assert calls == ["create_multipart_upload", "upload_part", "abort_multipart_upload"]
+    assert not s3.list_multipart_uploads(Bucket="crawl-bucket").get("Uploads")
+
+
+def test_get_storage_reuses_one_tuned_client(s3, monkeypatch):
+    from crawl_pipeline.adapters.dedup_index import DedupIndex
+    from crawl_pipeline.adapters.storage_selector import (
+        get_storage, pull_dedup_manifest, push_dedup_manifest,
+    )
+    from crawl_pipeline.config import Limits
+
+    made = []
+    real = boto3.client
+    monkeypatch.setattr(boto3, "client", lambda *a, **kw: made.append(kw) or real(*a, **kw))
+    backend = get_storage("s3://crawl-bucket/p", limits=Limits(max_concurrency_total=48))
+    uris = [backend.save_bytes(content=f"page {i}".encode(), url=f"https://e.com/{i}",
+                               canonical_type="html", root="s3://crawl-bucket/p")
+            for i in range(5)]
+    assert len(made) == 1
+    assert made[0]["config"].max_pool_connections == 48
+    assert len(set(uris)) == 5
+
+    dedup = DedupIndex(":memory:")
+    dedup.record("abc", uris[0], 6)
+    push_dedup_manifest(backend, dedup)
+    fresh = DedupIndex(":memory:")
+    assert pull_dedup_manifest(backend, fresh) == 1
+    assert len(made) == 1
+
@@ -0,0 +1,78 @@
+import asyncio
+import io
+import json
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from crawl_pipeline.adapters.links_fast import FastLinkExtractor
+from crawl_pipeline.adapters.simple_html_fetcher import SimpleHtmlFetcher
+from crawl_pipeline.config import Limits, Politeness, RetryPolicy
+from crawl_pipeline.logging import JsonlEmitter
+from crawl_pipeline.models import CrawlRequest
+from crawl_pipeline.pipeline.crawl import run_crawl
+from crawl_pipeline.telemetry import Metrics
+
+
+def test_emitter_buffers_and_drops_oldest():
+    out = io.StringIO()
+    em = JsonlEmitter(stream=out, flush_interval_s=60, max_buffer=3)
+    for i in range(5):
+        em.emit({"i": i})
+    assert out.getvalue() == ""  # nothing written on the caller's thread
+    em.close()
+    assert [json.loads(line)["i"] for line in out.getvalue().splitlines()] == [2, 3, 4]
+    assert em.dropped == 2
+
+
+def test_prometheus_text():
+    m = Metrics(buckets=(0.1, 1.0))
+    m.inc("crawl_items_total", host="a.com", outcome="saved")
+    m.inc("crawl_items_total", 2, host='b"c', outcome="saved")
+    m.set("crawl_frontier_queued", 7)
+    for v in (0.05, 0.5, 5):
+        m.stage("body", v)
+    text = m.render_prometheus()
+    assert '# TYPE crawl_items_total counter' in text
+    assert 'crawl_items_total{host="b\\"c",outcome="saved"} 2' in text
+    assert 'crawl_frontier_queued 7' in text
+    assert 'crawl_stage_seconds_bucket{stage="body",le="1"} 2' in text
+    assert 'crawl_stage_seconds_bucket{stage="body",le="+Inf"} 3' in text
+    assert 'crawl_stage_seconds_count{stage="body"} 3' in text
+
+
+def test_crawl_reports_stages_hosts_and_retries():
+    flaky = {"n": 0}
+
+    async def root(request):
+        return web.Response(text='<a href="/a">a</a><a href="/b">b</a>', content_type="text/html")
+
+    async def page(request):
+        if request.path == "/b" and flaky["n"] == 0:
+            flaky["n"] += 1
+            return web.Response(status=503)
+        return web.Response(text="<p>leaf</p>", content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/", root)
+    app.router.add_get("/{p}", page)
+
+    async def save(url, html):
+        return {"url": url, "path": url}
+
+    async def main():
+        async with TestServer(app) as srv:
+            req = CrawlRequest(url=str(srv.make_url("/")), depth=1,
+                               retry=RetryPolicy(max_attempts=3, backoff_base_s=0.01, jitter_s=0),
+                               politeness=Politeness(host_rate_per_s=1000, host_burst=100))
+            m = Metrics()
+            await run_crawl(req, html_fetcher=SimpleHtmlFetcher(), fetch_and_save_html=save,
+                            link_extractor=FastLinkExtractor(), limits=Limits(), metrics=m)
+            return m, srv.host
+
+    m, host = asyncio.get_event_loop().run_until_complete(main())
+    assert m.counter("crawl_items_total", host=host, outcome="saved") == 3
+    assert m.counter("crawl_retries_total", host=host) == 1
+    assert m.counter("crawl_responses_total", host=host, status=503) == 1
+    assert m.counter("crawl_bytes_total", host=host) > 0
+    stages = m.snapshot()["histograms"]
+    for stage in ("connect", "ttfb", "body", "extract", "store"):
+        assert stages[f'crawl_stage_seconds{{stage="{stage}"}}']["count"] >= 1
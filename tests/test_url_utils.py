@@ -8,3 +8,16 @@ def test_same_scope():
     root = "https://example.com/docs/"
     assert same_scope(root, "https://example.com/docs/page.html", same_domain=True, under_path=True)
     assert not same_scope(root, "https://example.com/other", same_domain=True, under_path=True)
+
+def test_canonicalize_variants_collapse():
+    from crawl_pipeline.url_utils import canonicalize
+    same = ["http://x.com/a?b=2&a=1", "http://X.com:80/a?a=1&b=2#frag",
+            "http://x.com/a?utm_source=nl&a=1&gclid=9&b=2"]
+    assert {canonicalize(u) for u in same} == {"http://x.com/a?a=1&b=2"}
+    assert canonicalize("https://x.com:443") == "https://x.com/"
+    assert canonicalize("http://x.com:443/") == "http://x.com:443/"
+    assert canonicalize("http://x.com/?ref=1", strip_params=("ref",)) == "http://x.com/"
+    # the query is reordered and stripped, never re-encoded
+    assert canonicalize("http://x.com/s?flag&b=%2F&q=a%20b+c&utm_x=1") == \
+        "http://x.com/s?b=%2F&flag&q=a%20b+c"
+    assert canonicalize("http://x.com/s?t=2&a=1&t=1") == "http://x.com/s?a=1&t=2&t=1"